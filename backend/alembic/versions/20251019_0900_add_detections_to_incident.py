@@ -0,0 +1,37 @@
+"""Add vision confidence and detections to Incident
+
+Revision ID: 6b1f3e2a7c90
+Revises: 9dca5ba072cc
+Create Date: 2025-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import geoalchemy2
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '6b1f3e2a7c90'
+down_revision = '9dca5ba072cc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Vision confidence was already written by create_alert but had no column
+    op.add_column('incidents', sa.Column('confidence', sa.Float(), nullable=True))
+    # Detection boxes returned by the vision service (JSON array)
+    op.add_column(
+        'incidents',
+        sa.Column(
+            'detections',
+            sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'),
+            nullable=True,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('incidents', 'detections')
+    op.drop_column('incidents', 'confidence')
@@ -0,0 +1,35 @@
+"""Add llm_verdicts cache table
+
+Revision ID: 2c8d4f1a9e37
+Revises: 6b1f3e2a7c90
+Create Date: 2025-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import geoalchemy2
+
+
+# revision identifiers, used by Alembic.
+revision = '2c8d4f1a9e37'
+down_revision = '6b1f3e2a7c90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'llm_verdicts',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('valid', sa.Boolean(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_llm_verdicts_expires_at'), 'llm_verdicts', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_llm_verdicts_expires_at'), table_name='llm_verdicts')
+    op.drop_table('llm_verdicts')
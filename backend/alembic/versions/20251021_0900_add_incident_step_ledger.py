@@ -0,0 +1,30 @@
+"""Add incident_step_ledger table
+
+Revision ID: 4a9d2e7c1f53
+Revises: 7e5a9c2d4b18
+Create Date: 2025-10-21 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a9d2e7c1f53'
+down_revision = '7e5a9c2d4b18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'incident_step_ledger',
+        sa.Column('incident_id', sa.Integer(), nullable=False),
+        sa.Column('step', sa.String(length=50), nullable=False),
+        sa.Column('completed_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('incident_id', 'step')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('incident_step_ledger')
@@ -0,0 +1,45 @@
+"""Add incident_response_times table
+
+Revision ID: 9c3e6b1d8a24
+Revises: 4a9d2e7c1f53
+Create Date: 2025-10-22 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3e6b1d8a24'
+down_revision = '4a9d2e7c1f53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'incident_response_times',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('incident_id', sa.Integer(), nullable=False),
+        sa.Column('severity', sa.Integer(), nullable=True),
+        sa.Column('lat', sa.Float(), nullable=False),
+        sa.Column('lon', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('validated_at', sa.DateTime(), nullable=True),
+        sa.Column('notified_at', sa.DateTime(), nullable=False),
+        sa.Column('validation_seconds', sa.Float(), nullable=True),
+        sa.Column('notification_seconds', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    # Time-series queries filter on the notification time
+    op.create_index(
+        op.f('ix_incident_response_times_notified_at'),
+        'incident_response_times',
+        ['notified_at'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_incident_response_times_notified_at'), table_name='incident_response_times')
+    op.drop_table('incident_response_times')
@@ -0,0 +1,38 @@
+"""Add processed_events table
+
+Revision ID: 2f8b4c6e9a17
+Revises: 9c3e6b1d8a24
+Create Date: 2025-10-23 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f8b4c6e9a17'
+down_revision = '9c3e6b1d8a24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'processed_events',
+        sa.Column('event_key', sa.String(length=100), nullable=False),
+        sa.Column('processed_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('event_key')
+    )
+    # The worker purges expired rows periodically
+    op.create_index(
+        op.f('ix_processed_events_expires_at'),
+        'processed_events',
+        ['expires_at'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_processed_events_expires_at'), table_name='processed_events')
+    op.drop_table('processed_events')
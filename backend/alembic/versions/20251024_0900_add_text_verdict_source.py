@@ -0,0 +1,30 @@
+"""Add text_verdict_source to Incident
+
+Revision ID: 5d1a7f3c2e68
+Revises: 2f8b4c6e9a17
+Create Date: 2025-10-24 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1a7f3c2e68'
+down_revision = '2f8b4c6e9a17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Who decided confidence_text: llm, classifier or human
+    op.add_column('incidents', sa.Column('text_verdict_source', sa.String(length=20), nullable=True))
+    # Earlier verdicts are attributed to the LLM: the classifier stays
+    # disabled until a model has been trained from them
+    op.execute(
+        "UPDATE incidents SET text_verdict_source = 'llm' WHERE confidence_text IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('incidents', 'text_verdict_source')
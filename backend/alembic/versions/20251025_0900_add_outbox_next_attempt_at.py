@@ -0,0 +1,25 @@
+"""Add next_attempt_at to event_outbox
+
+Revision ID: 8b3e5d7f1a49
+Revises: 5d1a7f3c2e68
+Create Date: 2025-10-25 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b3e5d7f1a49'
+down_revision = '5d1a7f3c2e68'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Lease of the relay that claimed the row (NULL: available)
+    op.add_column('event_outbox', sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('event_outbox', 'next_attempt_at')
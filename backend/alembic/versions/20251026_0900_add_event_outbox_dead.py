@@ -0,0 +1,37 @@
+"""Add event_outbox_dead table
+
+Revision ID: 3c7f9a2e5b81
+Revises: 8b3e5d7f1a49
+Create Date: 2025-10-26 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3c7f9a2e5b81'
+down_revision = '8b3e5d7f1a49'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Events the broker kept returning as unroutable (no queue bound)
+    op.create_table(
+        'event_outbox_dead',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('event_type', sa.String(length=100), nullable=False),
+        sa.Column('routing_key', sa.String(length=255), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('parked_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('event_outbox_dead')
@@ -0,0 +1,34 @@
+"""Make incident_response_times unique per incident
+
+Revision ID: 6e2a8c4f9d13
+Revises: 3c7f9a2e5b81
+Create Date: 2025-10-27 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6e2a8c4f9d13'
+down_revision = '3c7f9a2e5b81'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Rows inserted again by a retried analytics step: keep the first one
+    op.execute(
+        "DELETE FROM incident_response_times a USING incident_response_times b "
+        "WHERE a.incident_id = b.incident_id AND a.id > b.id"
+    )
+    # Also the conflict target of the worker's ON CONFLICT DO NOTHING
+    op.create_index(
+        op.f('ix_incident_response_times_incident_id'),
+        'incident_response_times',
+        ['incident_id'],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_incident_response_times_incident_id'), table_name='incident_response_times')
@@ -0,0 +1,35 @@
+"""Add re-validation scheduling to Incident
+
+Revision ID: 1f4b8d2a6c97
+Revises: 6e2a8c4f9d13
+Create Date: 2025-10-28 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1f4b8d2a6c97'
+down_revision = '6e2a8c4f9d13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('incidents', sa.Column('validation_attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('incidents', sa.Column('next_validation_at', sa.DateTime(), nullable=True))
+    # The re-validation task only looks at pending_retry incidents
+    op.create_index(
+        'ix_incidents_pending_retry',
+        'incidents',
+        ['next_validation_at'],
+        unique=False,
+        postgresql_where=sa.text("state = 'pending_retry'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_incidents_pending_retry', table_name='incidents')
+    op.drop_column('incidents', 'next_validation_at')
+    op.drop_column('incidents', 'validation_attempts')
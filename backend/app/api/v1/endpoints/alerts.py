@@ -1,23 +1,229 @@
+import asyncio
 import json
-from typing import Any
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
 import geoalchemy2.functions as geo_func
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from prometheus_client import Counter
 from pydantic import ValidationError
 from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.config import settings
+from app.core.database import AsyncSessionLocal, get_db
 from app.core.events import IncidentValidated
 from app.core.models import Incident
 from app.schemas.alert import AlertIn, AlertOut
 from app.services.storage import storage
-from app.services.vision_client import detect_fire
+from app.services.vision_client import analyze_image
 from app.services.llm_client import verify_description
-from app.services.mq import publish_event
+from app.services.text_classifier import text_classifier
+from app.services.outbox import add_incident_validated, outbox_relay
+from app.services.resilience import DependencyUnavailable, deadline_scope
+from app.services.revalidation import PendingRetryRevalidator
 
 router = APIRouter()
 
+Validation = Tuple[str, Optional[float], Optional[float], Optional[str], Optional[List[Dict[str, Any]]]]
+
+SPECULATIVE_LLM_CALLS = Counter(
+    "speculative_llm_calls_total",
+    "LLM checks started alongside vision, by what happened to the verdict",
+    ["outcome"],  # used, cancelled, wasted
+)
+
+
+def _is_speculative(severity: int) -> bool:
+    """Whether an alert of this severity starts the LLM check alongside vision."""
+    return 0 < settings.speculative_min_severity <= severity
+
+
+async def _discard(task: "asyncio.Task[Tuple[bool, float]]") -> None:
+    """Cancel a speculative LLM call whose verdict is no longer needed."""
+    if task.done():
+        SPECULATIVE_LLM_CALLS.labels(outcome="wasted").inc()
+    else:
+        SPECULATIVE_LLM_CALLS.labels(outcome="cancelled").inc()
+        task.cancel()
+    try:
+        await task
+    except (asyncio.CancelledError, Exception):
+        pass
+
+
+async def _validate_alert(
+    alert_data: AlertIn, image_url: str
+) -> Validation:
+    """
+    Run vision and text validation for a new alert.
+    
+    Normally the LLM is only asked once vision has found a fire. For alerts
+    at or above SPECULATIVE_MIN_SEVERITY both checks start together and the
+    LLM call is cancelled if vision finds no fire, trading some LLM spend for
+    lower validation latency.
+    
+    A dependency that cannot answer (error, timeout, open circuit) yields the
+    pending_retry state instead of a rejection; the incident is validated
+    again later by pending_retry_revalidator.
+    
+    Args:
+        alert_data: The submitted alert
+        image_url: URL of the uploaded image
+        
+    Returns:
+        Tuple of (state, confidence, confidence_text, text verdict source,
+        detection boxes); the source is "classifier" or "llm" (None without
+        a text verdict)
+    """
+    # The local classifier is cheap, so it always runs first
+    verdict = text_classifier.classify(alert_data.type, alert_data.description)
+    source = "classifier" if verdict is not None else "llm"
+    
+    llm_task = None
+    if verdict is None and _is_speculative(alert_data.severity):
+        llm_task = asyncio.create_task(
+            verify_description(alert_data.type, alert_data.description)
+        )
+    
+    # Detect fire in the uploaded image, keeping the boxes for later display
+    try:
+        detection = await analyze_image(image_url)
+    except DependencyUnavailable:
+        if llm_task is not None:
+            await _discard(llm_task)
+        return "pending_retry", None, None, None, None
+    except BaseException:
+        if llm_task is not None:
+            await _discard(llm_task)
+        raise
+    
+    # If no fire detected, reject immediately
+    if not detection.is_fire:
+        if llm_task is not None:
+            await _discard(llm_task)
+        return "rejected_no_fire", detection.confidence, None, None, detection.boxes
+    
+    # Verify the alert description unless the classifier was confident
+    if verdict is None:
+        try:
+            if llm_task is not None:
+                SPECULATIVE_LLM_CALLS.labels(outcome="used").inc()
+                verdict = await llm_task
+            else:
+                verdict = await verify_description(alert_data.type, alert_data.description)
+        except DependencyUnavailable:
+            return "pending_retry", detection.confidence, None, None, detection.boxes
+    is_valid, text_confidence = verdict
+    
+    new_state = "validated_fire" if is_valid else "rejected_text"
+    return new_state, detection.confidence, text_confidence, source, detection.boxes
+
+
+async def _record_validation(
+    db: AsyncSession, incident_id: int, validation: Validation, from_state: Optional[str] = None
+) -> Optional[Tuple[Incident, Dict[str, Any]]]:
+    """
+    Store a validation outcome, staging the event of a validated fire.
+    
+    The caller commits (and wakes the outbox relay for a validated fire).
+    
+    Args:
+        db: Session to write with
+        incident_id: Validated incident
+        validation: Result of _validate_alert
+        from_state: Only update the incident if it is still in this state
+        
+    Returns:
+        The updated incident and its GeoJSON point, or None if the incident
+        was no longer in from_state
+    """
+    new_state, confidence, text_confidence, text_source, boxes = validation
+    
+    # Update incident state, confidences and detection boxes
+    query = update(Incident).where(Incident.id == incident_id)
+    if from_state is not None:
+        query = query.where(Incident.state == from_state)
+    query = query.values(
+        state=new_state,
+        confidence=confidence,
+        confidence_text=text_confidence,
+        text_verdict_source=text_source,
+        detections=boxes,
+    ).returning(Incident)
+    
+    result = await db.execute(query)
+    updated_incident = result.scalar_one_or_none()
+    if updated_incident is None:
+        return None
+    
+    # Extract point coordinates for the event and the response
+    point = await db.scalar(
+        geo_func.ST_AsGeoJSON(updated_incident.location)
+    )
+    point_json = json.loads(point)
+    
+    if new_state == "validated_fire":
+        # Stage the event in the same transaction as the state change;
+        # the outbox relay publishes it once committed
+        event = IncidentValidated(
+            id=updated_incident.id,
+            lat=point_json["coordinates"][1],  # Latitude is Y coordinate
+            lon=point_json["coordinates"][0],  # Longitude is X coordinate
+            created_at=updated_incident.created_at,
+            severity=updated_incident.severity,
+            validated_at=datetime.utcnow(),
+        )
+        await add_incident_validated(db, event)
+    
+    return updated_incident, point_json
+
+
+async def revalidate_incident(incident: Incident) -> str:
+    """
+    Validate a pending_retry incident again and record the outcome.
+    
+    Args:
+        incident: The incident, as claimed by the re-validation task
+        
+    Returns:
+        The new state (pending_retry if a dependency is still unavailable)
+    """
+    lat, lon = incident.get_lat_lon()
+    alert_data = AlertIn(
+        type=incident.type,
+        severity=incident.severity,
+        description=incident.description,
+        lat=lat,
+        lon=lon,
+    )
+    with deadline_scope(settings.alert_deadline):
+        validation = await _validate_alert(alert_data, incident.image_url)
+    
+    new_state = validation[0]
+    if new_state == "pending_retry":
+        return new_state
+    
+    async with AsyncSessionLocal() as db:
+        recorded = await _record_validation(db, incident.id, validation, from_state="pending_retry")
+        await db.commit()
+    
+    if recorded is not None and new_state == "validated_fire":
+        outbox_relay.wake()
+    return new_state
+
+
+# Shared re-validation task, started in the application lifespan
+pending_retry_revalidator = PendingRetryRevalidator(
+    revalidate_incident,
+    batch_size=settings.revalidation_batch_size,
+    interval=settings.revalidation_interval,
+    backoff=settings.revalidation_backoff,
+    backoff_max=settings.revalidation_backoff_max,
+    # Incidents of a batch are validated one after the other
+    claim_timeout=settings.alert_deadline * settings.revalidation_batch_size + 60,
+)
+
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=AlertOut)
 async def create_alert(
@@ -33,6 +239,9 @@ async def create_alert(
     - An image file showing the environmental incident
     
     The image will be uploaded to MinIO and the incident created with pending_validation state.
+    Validation must finish within ALERT_DEADLINE seconds; if the vision or LLM
+    service cannot answer in time the incident is left in pending_retry state
+    and validated again in the background.
     """
     try:
         # Parse alert data from JSON
@@ -75,77 +284,16 @@ async def create_alert(
         incident = result.scalar_one()
         await db.commit()
         
-        # Detect fire in the uploaded image
-        is_fire, confidence = await detect_fire(incident.image_url)
+        # Validate within the request deadline budget
+        with deadline_scope(settings.alert_deadline):
+            validation = await _validate_alert(alert_data, incident.image_url)
+        new_state, confidence = validation[0], validation[1]
         
-        # Update incident state based on fire detection
-        if is_fire:
-            # If fire detected, set to pending_llm state
-            new_state = "pending_llm"
-            
-            # Verify the alert description with LLM
-            is_valid, text_confidence = await verify_description(
-                alert_data.type, alert_data.description
-            )
-            
-            # Update final state based on LLM verification
-            if is_valid:
-                new_state = "validated_fire"
-                
-                # Get point coordinates for publishing event
-                point = await db.scalar(
-                    geo_func.ST_AsGeoJSON(incident.location)
-                )
-                point_json = json.loads(point)
-                
-                # Publish incident validated event to message queue
-                event = IncidentValidated(
-                    id=incident.id,
-                    lat=point_json["coordinates"][1],  # Latitude is Y coordinate
-                    lon=point_json["coordinates"][0],  # Longitude is X coordinate
-                    created_at=incident.created_at,
-                    severity=incident.severity
-                )
-                await publish_event(event)
-            else:
-                new_state = "rejected_text"
-                
-            # Update incident state, confidence and text confidence
-            query = (
-                update(Incident)
-                .where(Incident.id == incident.id)
-                .values(
-                    state=new_state,
-                    confidence=confidence,
-                    confidence_text=text_confidence
-                )
-                .returning(Incident)
-            )
-        else:
-            # If no fire detected, reject immediately
-            new_state = "rejected_no_fire"
-            
-            # Update incident state and confidence
-            query = (
-                update(Incident)
-                .where(Incident.id == incident.id)
-                .values(
-                    state=new_state,
-                    confidence=confidence,
-                    confidence_text=None
-                )
-                .returning(Incident)
-            )
-            
-        result = await db.execute(query)
-        updated_incident = result.scalar_one()
+        updated_incident, point_json = await _record_validation(db, incident.id, validation)
         await db.commit()
         
-        # Extract point coordinates for the response
-        point = await db.scalar(
-            geo_func.ST_AsGeoJSON(updated_incident.location)
-        )
-        point_json = json.loads(point)
+        if new_state == "validated_fire":
+            outbox_relay.wake()
         
         return AlertOut(
             id=updated_incident.id,
@@ -161,6 +309,7 @@ async def create_alert(
             updated_at=updated_incident.updated_at,
             confidence=confidence,
             confidence_text=updated_incident.confidence_text,
+            detections=updated_incident.detections or [],
         )
         
     except Exception as e:
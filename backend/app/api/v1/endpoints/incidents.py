@@ -14,7 +14,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.models import Incident, User
-from app.core.schemas import IncidentIn, IncidentOut
+from app.core.schemas import IncidentDetailOut, IncidentIn, IncidentOut
 from app.core.security import get_admin_user
 
 router = APIRouter(tags=["Incidents"])
@@ -200,3 +200,47 @@ async def export_incidents(
                 "Content-Disposition": f"attachment; filename=\"incidents_{today_str}.csv\""
             },
         )
+
+
+@router.get("/{incident_id}", response_model=IncidentDetailOut)
+async def get_incident(
+    incident_id: int,
+    db: AsyncSession = Depends(get_db)
+) -> IncidentDetailOut:
+    """
+    Get a single incident with its validation results.
+    
+    The vision detection boxes are read from the incident row, so the
+    image never needs to be sent to the vision service again.
+    
+    Args:
+        incident_id: ID of the incident
+        db: Database session dependency
+        
+    Returns:
+        Incident with state, confidences and detection boxes
+    """
+    result = await db.execute(select(Incident).where(Incident.id == incident_id))
+    incident = result.scalar_one_or_none()
+    if incident is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Incident {incident_id} not found",
+        )
+    
+    lat, lon = incident.get_lat_lon()
+    return {
+        "id": incident.id,
+        "type": incident.type,
+        "severity": incident.severity,
+        "description": incident.description,
+        "created_at": incident.created_at,
+        "reporter_id": incident.reporter_id,
+        "lat": lat,
+        "lon": lon,
+        "state": incident.state,
+        "image_url": incident.image_url,
+        "confidence": incident.confidence,
+        "confidence_text": incident.confidence_text,
+        "detections": incident.detections or [],
+    }
@@ -1,39 +1,51 @@
 """
 Event models for the GreenSentinel system.
 These models are serialized/deserialized for message queue communications.
+
+Events are msgspec Structs tagged with a versioned name (the "event" field),
+encoded and decoded with cached msgspec instances. The worker service keeps
+an identical copy of these definitions in worker_service/app/events.py;
+bump the version tag and add a new Struct when a change is not backward
+compatible.
 """
 from datetime import datetime
 from typing import Optional
 
 import msgspec
-from pydantic import BaseModel, Field
 
 
-class IncidentValidated(BaseModel):
+class IncidentValidated(
+    msgspec.Struct,
+    tag_field="event",
+    tag="incident.validated.v1",
+    frozen=True,
+    kw_only=True,
+):
     """
     Event emitted when an incident is validated as a fire.
     This event is published to RabbitMQ for asynchronous processing.
     """
-    id: int = Field(..., description="Incident ID")
-    lat: float = Field(..., description="Latitude coordinate")
-    lon: float = Field(..., description="Longitude coordinate")
-    created_at: datetime = Field(..., description="Incident creation timestamp")
-    severity: Optional[int] = Field(None, description="Severity level (1-5)")
-    
-    class Config:
-        """Pydantic model configuration."""
-        json_encoders = {
-            datetime: lambda dt: dt.isoformat()
-        }
-        
-    def model_dump_msgspec(self) -> bytes:
-        """
-        Serialize the event using msgspec for high-performance serialization.
-        
-        Returns:
-            bytes: Serialized event data
-        """
-        # Convert to dict and then serialize
-        data = self.model_dump(mode="json")
-        encoder = msgspec.json.Encoder()
-        return encoder.encode(data)
+    id: int  # Incident ID
+    lat: float  # Latitude coordinate
+    lon: float  # Longitude coordinate
+    created_at: datetime  # Incident creation timestamp
+    severity: Optional[int] = None  # Severity level (1-5)
+    validated_at: Optional[datetime] = None  # Validation timestamp (absent in older events)
+
+
+# Cached codec instances (building them is far more expensive than using them)
+encoder = msgspec.json.Encoder()
+incident_validated_decoder = msgspec.json.Decoder(IncidentValidated)
+
+
+def encode_event(event: msgspec.Struct) -> bytes:
+    """
+    Serialize an event to JSON.
+
+    Args:
+        event: The event to serialize
+
+    Returns:
+        bytes: Serialized event data, including its versioned "event" tag
+    """
+    return encoder.encode(event)
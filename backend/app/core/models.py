@@ -3,7 +3,8 @@ from typing import List, Optional
 
 from geoalchemy2 import Geometry
 from geoalchemy2.shape import to_shape
-from sqlalchemy import Float, ForeignKey, String, func
+from sqlalchemy import JSON, BigInteger, Float, ForeignKey, Integer, String, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -41,7 +42,17 @@ class Incident(Base):
     )
     image_url: Mapped[Optional[str]] = mapped_column(String)
     state: Mapped[str] = mapped_column(String(50), default="pending_validation")
+    confidence: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     confidence_text: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    # Who decided confidence_text: llm, classifier or human
+    text_verdict_source: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    # Vision detection boxes, stored once so they never need recomputing
+    detections: Mapped[Optional[list]] = mapped_column(
+        JSON().with_variant(JSONB(), "postgresql"), nullable=True
+    )
+    # Re-validations of a pending_retry incident and when the next one is due
+    validation_attempts: Mapped[int] = mapped_column(default=0, server_default="0")
+    next_validation_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
     
     # Relationships
     reporter: Mapped[User] = relationship(back_populates="incidents")
@@ -50,3 +61,77 @@ class Incident(Base):
         """Get latitude and longitude from the geometric point."""
         point = to_shape(self.location)
         return point.y, point.x  # PostGIS returns (lon, lat) but we want (lat, lon)
+
+
+class LLMVerdict(Base):
+    """Cached LLM moderation verdict for a normalised description."""
+    __tablename__ = "llm_verdicts"
+    
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    valid: Mapped[bool]
+    score: Mapped[float] = mapped_column(Float)
+    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
+    expires_at: Mapped[datetime] = mapped_column(index=True)
+
+
+class EventOutbox(Base):
+    """Event waiting to be published, written in the same transaction as the state change."""
+    __tablename__ = "event_outbox"
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    event_type: Mapped[str] = mapped_column(String(100))
+    routing_key: Mapped[str] = mapped_column(String(255))
+    payload: Mapped[dict] = mapped_column(JSON().with_variant(JSONB(), "postgresql"))
+    attempts: Mapped[int] = mapped_column(default=0)
+    # Claimed by a relay until then (NULL: available)
+    next_attempt_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
+
+
+class EventOutboxDead(Base):
+    """Outbox event parked after the broker kept returning it as unroutable."""
+    __tablename__ = "event_outbox_dead"
+    
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    event_type: Mapped[str] = mapped_column(String(100))
+    routing_key: Mapped[str] = mapped_column(String(255))
+    payload: Mapped[dict] = mapped_column(JSON().with_variant(JSONB(), "postgresql"))
+    attempts: Mapped[int]
+    last_error: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    created_at: Mapped[datetime]
+    parked_at: Mapped[datetime] = mapped_column(server_default=func.now())
+
+
+class IncidentStepLedger(Base):
+    """Side effect completed by the worker for an incident (written by worker_service)."""
+    __tablename__ = "incident_step_ledger"
+    
+    incident_id: Mapped[int] = mapped_column(primary_key=True)
+    step: Mapped[str] = mapped_column(String(50), primary_key=True)
+    completed_at: Mapped[datetime] = mapped_column(server_default=func.now())
+
+
+class IncidentResponseTime(Base):
+    """Response times of a processed incident (time series written by worker_service)."""
+    __tablename__ = "incident_response_times"
+    
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    # One row per incident: a retried analytics step does not add another
+    incident_id: Mapped[int] = mapped_column(index=True, unique=True)
+    severity: Mapped[Optional[int]]
+    lat: Mapped[float] = mapped_column(Float)
+    lon: Mapped[float] = mapped_column(Float)
+    created_at: Mapped[datetime]
+    validated_at: Mapped[Optional[datetime]]
+    notified_at: Mapped[datetime] = mapped_column(index=True)
+    validation_seconds: Mapped[Optional[float]] = mapped_column(Float)
+    notification_seconds: Mapped[float] = mapped_column(Float)
+
+
+class ProcessedEvent(Base):
+    """Event fully processed by the worker, kept until it expires (written by worker_service)."""
+    __tablename__ = "processed_events"
+    
+    event_key: Mapped[str] = mapped_column(String(100), primary_key=True)
+    processed_at: Mapped[datetime]
+    expires_at: Mapped[datetime] = mapped_column(index=True)
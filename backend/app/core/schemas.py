@@ -1,8 +1,10 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, Field, EmailStr
 
+from app.schemas.alert import DetectionBox
+
 
 class UserBase(BaseModel):
     """Base user schema."""
@@ -63,3 +65,13 @@ class IncidentOut(IncidentBase):
     
     class Config:
         from_attributes = True
+
+
+class IncidentDetailOut(IncidentOut):
+    """Schema for a single incident with its validation results."""
+    
+    state: str
+    image_url: Optional[str] = None
+    confidence: Optional[float] = None
+    confidence_text: Optional[float] = None
+    detections: List[DetectionBox] = Field(default_factory=list)
@@ -7,6 +7,12 @@ from prometheus_fastapi_instrumentator import Instrumentator
 
 from app.api.v1.endpoints import auth, health, incidents, alerts, websocket_incidents, users
 from app.config import settings
+from app.services.broadcast import broadcast_listener
+from app.services.llm_client import close_llm_client, get_llm_client
+from app.services.mq import publisher
+from app.services.outbox import outbox_relay
+from app.services.text_classifier import text_classifier
+from app.services.verdict_cache import verdict_cache
 
 
 @asynccontextmanager
@@ -19,10 +25,50 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # In the future, implement asyncpg/PostGIS connection here
     print("Starting up API...")
     
+    # Create the shared OpenAI client (one connection pool per process)
+    try:
+        get_llm_client()
+    except Exception as e:
+        # Calls will retry the creation; until then they fail with
+        # DependencyUnavailable and alerts are left pending_retry
+        print(f"LLM client not initialized: {str(e)}")
+    
+    # Load the local description pre-classifier (disabled if no model file)
+    text_classifier.low = settings.text_classifier_low
+    text_classifier.high = settings.text_classifier_high
+    text_classifier.load(settings.text_classifier_path)
+    
+    # Drop expired LLM verdicts left over from previous runs
+    try:
+        await verdict_cache.purge_expired()
+    except Exception as e:
+        print(f"Could not purge expired LLM verdicts: {str(e)}")
+    
+    # Connect the event publisher and declare the queues once
+    try:
+        await publisher.connect()
+    except Exception as e:
+        # The first publish will retry the connection
+        print(f"RabbitMQ publisher not connected: {str(e)}")
+    
+    # Relay committed outbox events to RabbitMQ in the background
+    outbox_relay.start()
+    
+    # Relay worker broadcasts to the WebSocket clients of this replica
+    broadcast_listener.start()
+    
+    # Validate again the alerts left pending_retry by an unavailable dependency
+    alerts.pending_retry_revalidator.start()
+    
     yield
     
     # Cleanup on shutdown
     # Close database connections, etc.
+    await alerts.pending_retry_revalidator.stop()
+    await broadcast_listener.stop()
+    await outbox_relay.stop()
+    await publisher.close()
+    await close_llm_client()
     print("Shutting down API...")
 
 
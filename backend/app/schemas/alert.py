@@ -1,9 +1,22 @@
 from datetime import datetime
-from typing import Literal, Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field, validator
 
 
+class DetectionBox(BaseModel):
+    """Bounding box returned by the vision service for a detected fire."""
+    class_id: int = Field(0, alias="class", description="Detected class index")
+    confidence: float = Field(..., ge=0, le=1, description="Box confidence")
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+    
+    class Config:
+        populate_by_name = True
+
+
 class AlertBase(BaseModel):
     """Base schema for alert data with validation."""
     type: str = Field(..., min_length=3, max_length=50, 
@@ -35,6 +48,9 @@ class AlertOut(AlertBase):
     confidence: Optional[float] = None
     confidence_text: Optional[float] = None
     updated_at: Optional[datetime] = None
+    detections: List[DetectionBox] = Field(
+        default_factory=list, description="Vision detection boxes"
+    )
     
     class Config:
         orm_mode = True
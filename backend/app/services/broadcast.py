@@ -0,0 +1,126 @@
+"""
+Relay of worker broadcasts to the WebSocket clients of this API replica.
+
+The worker publishes every processed incident to the "incident.broadcast"
+fanout exchange. Each API replica binds its own exclusive, auto-deleted
+queue to it and forwards what it receives to the clients connected to this
+process (ws_manager.broadcast_incident), so every client gets the update
+whichever replica holds its socket.
+
+Real-time updates are only useful while fresh: messages are consumed
+without acks and expire after BROADCAST_TTL_MS in the replica's queue.
+"""
+import asyncio
+from typing import Optional
+
+import aio_pika
+import msgspec
+from aio_pika.abc import AbstractIncomingMessage, AbstractQueue, AbstractRobustConnection
+from prometheus_client import Counter
+
+from app.config import settings
+from app.core.events import incident_validated_decoder
+from app.services.ws_manager import broadcast_incident
+
+# Fanout exchange fed by the worker service
+BROADCAST_EXCHANGE = "incident.broadcast"
+
+# Seconds between connection attempts while RabbitMQ is unreachable
+CONNECT_RETRY_DELAY = 5.0
+
+BROADCASTS_RELAYED = Counter(
+    "ws_broadcasts_relayed_total",
+    "Worker broadcasts relayed to the WebSocket clients of this replica",
+)
+
+
+class BroadcastListener:
+    """Consumes incident.broadcast and relays events to local WebSocket clients."""
+
+    def __init__(self, url: str, ttl_ms: int = 30000) -> None:
+        """
+        Initialize the listener (no connection is made yet).
+
+        Args:
+            url: RabbitMQ connection URL
+            ttl_ms: Milliseconds a broadcast may wait in this replica's queue
+        """
+        self.url = url
+        self.ttl_ms = ttl_ms
+        self.connection: Optional[AbstractRobustConnection] = None
+        self.queue: Optional[AbstractQueue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Connect in the background, retrying until RabbitMQ is reachable."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._connect_until_ready())
+
+    async def _connect_until_ready(self) -> None:
+        """Retry connect() until it succeeds (the robust connection then recovers by itself)."""
+        while True:
+            try:
+                await self.connect()
+                return
+            except Exception as e:
+                print(f"WebSocket broadcast listener not connected: {str(e)}")
+                await self._close_connection()
+                await asyncio.sleep(CONNECT_RETRY_DELAY)
+
+    async def connect(self) -> None:
+        """Connect, bind a private queue to the fanout exchange and start consuming."""
+        self.connection = await aio_pika.connect_robust(
+            self.url,
+            client_properties={"connection_name": "greensentinel_backend_broadcast"},
+        )
+        channel = await self.connection.channel()
+        exchange = await channel.declare_exchange(
+            BROADCAST_EXCHANGE,
+            type=aio_pika.ExchangeType.FANOUT,
+            durable=True,
+        )
+        # Server-named queue, deleted with the connection: one per replica
+        self.queue = await channel.declare_queue(
+            exclusive=True,
+            auto_delete=True,
+            arguments={"x-message-ttl": self.ttl_ms},
+        )
+        await self.queue.bind(exchange)
+        await self.queue.consume(self.on_message, no_ack=True)
+
+    async def on_message(self, message: AbstractIncomingMessage) -> None:
+        """
+        Relay one broadcast to the local WebSocket clients.
+
+        Args:
+            message: Serialized IncidentValidated event
+        """
+        try:
+            event = incident_validated_decoder.decode(message.body)
+        except msgspec.DecodeError as e:
+            print(f"Ignoring malformed broadcast: {str(e)}")
+            return
+
+        await broadcast_incident(msgspec.to_builtins(event))
+        BROADCASTS_RELAYED.inc()
+
+    async def stop(self) -> None:
+        """Stop connecting and close the connection (the private queue is deleted with it)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close_connection()
+
+    async def _close_connection(self) -> None:
+        if self.connection is not None:
+            await self.connection.close()
+        self.connection = None
+        self.queue = None
+
+
+# Shared listener, started in the application lifespan
+broadcast_listener = BroadcastListener(settings.rabbitmq_url, ttl_ms=settings.broadcast_ttl_ms)
@@ -0,0 +1,203 @@
+"""
+Batching moderator for LLM description checks.
+
+Descriptions submitted within a short window are sent to the LLM in a
+single request that returns one verdict per item, so the instruction prompt
+is paid once per batch instead of once per alert. Items the model answers
+badly fall back to individual calls. A failed request (provider error,
+timeout, rate limiter) fails every item of the batch instead, so an outage
+does not multiply the calls made to the provider.
+"""
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter, Histogram
+
+# Prompt template for validating several alert descriptions at once
+BATCH_PROMPT_TEMPLATE = (
+    "Tu es un modérateur. Pour chaque signalement de la liste JSON suivante, "
+    "vérifie que la description correspond bien à un incendie forestier réel "
+    "et n'est pas un spam.\n"
+    "Signalements: {items}\n"
+    "Réponds strictement par un tableau JSON contenant un objet par signalement: "
+    "[{{\"id\":<id>, \"valid\":true/false, \"score\":0-1}}]"
+)
+
+# Completion budget per item in a batch
+TOKENS_PER_ITEM = 30
+
+LLM_BATCH_SIZE = Histogram(
+    "llm_batch_size",
+    "Number of descriptions sent in one batched moderation request",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+LLM_BATCH_FALLBACKS = Counter(
+    "llm_batch_fallbacks_total",
+    "Descriptions re-sent individually after a batched answer was unusable",
+)
+
+Verdict = Tuple[bool, float]
+_Pending = Tuple[str, Optional[str], "asyncio.Future[Verdict]"]
+
+
+def parse_batch_verdicts(content: Optional[str], count: int) -> Dict[int, Verdict]:
+    """
+    Parse and validate the JSON array returned for a batch.
+
+    Invalid or out-of-range items are skipped, so the caller can fall back
+    to single calls for exactly the items that are missing.
+
+    Args:
+        content: Raw message content from the LLM
+        count: Number of items that were sent
+
+    Returns:
+        Mapping of item id to (is_valid, confidence_score)
+
+    Raises:
+        ValueError: If the content is not a JSON array
+    """
+    if not content:
+        raise ValueError("empty LLM response")
+
+    result = json.loads(content)
+    if not isinstance(result, list):
+        raise ValueError("LLM response is not a JSON array")
+
+    verdicts: Dict[int, Verdict] = {}
+    for item in result:
+        if not isinstance(item, dict):
+            continue
+        item_id, valid, score = item.get("id"), item.get("valid"), item.get("score")
+        if not isinstance(item_id, int) or not 0 <= item_id < count:
+            continue
+        if not isinstance(valid, bool):
+            continue
+        if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 1:
+            continue
+        verdicts[item_id] = (valid, float(score))
+    return verdicts
+
+
+class BatchModerator:
+    """Collects pending descriptions and moderates them in batches."""
+
+    def __init__(
+        self,
+        complete: Callable[[str, int], Awaitable[Optional[str]]],
+        moderate_one: Callable[[str, Optional[str]], Awaitable[Verdict]],
+        window: float,
+        max_size: int,
+    ) -> None:
+        """
+        Initialize the moderator.
+
+        Args:
+            complete: Sends a prompt with a token budget and returns the content
+            moderate_one: Moderates a single description (fallback path)
+            window: Seconds to wait for more descriptions before flushing
+            max_size: Flush immediately once this many descriptions are pending
+        """
+        self.complete = complete
+        self.moderate_one = moderate_one
+        self.window = window
+        self.max_size = max_size
+        self._pending: List[_Pending] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def submit(self, type_: str, description: Optional[str]) -> Verdict:
+        """
+        Queue a description and wait for its verdict.
+
+        Args:
+            type_: The alert type
+            description: The alert description
+
+        Returns:
+            Tuple containing (is_valid, confidence_score)
+
+        Raises:
+            Exception: Whatever the batched request or the single-call
+                fallback raised for this item
+        """
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[Verdict]" = loop.create_future()
+        self._pending.append((type_, description, future))
+
+        if len(self._pending) >= self.max_size:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush_now)
+
+        return await future
+
+    def _flush_now(self) -> None:
+        """Hand the pending descriptions to a background flush task."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._flush(batch))
+        # Keep a reference so the task is not garbage collected
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, batch: List[_Pending]) -> None:
+        """Moderate one batch, falling back to single calls where needed."""
+        LLM_BATCH_SIZE.observe(len(batch))
+
+        if len(batch) == 1:
+            await self._resolve_single(batch[0])
+            return
+
+        items = [
+            {"id": i, "type": type_, "description": description or ""}
+            for i, (type_, description, _) in enumerate(batch)
+        ]
+        prompt = BATCH_PROMPT_TEMPLATE.format(items=json.dumps(items, ensure_ascii=False))
+
+        try:
+            content = await self.complete(prompt, TOKENS_PER_ITEM * len(batch))
+        except Exception as e:
+            print(f"Batched moderation failed: {str(e)}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        try:
+            verdicts = parse_batch_verdicts(content, len(batch))
+        except ValueError as e:
+            print(f"Unusable batched answer, falling back to single calls: {str(e)}")
+            verdicts = {}
+
+        fallback = []
+        for i, pending in enumerate(batch):
+            future = pending[2]
+            if i in verdicts:
+                if not future.done():
+                    future.set_result(verdicts[i])
+            else:
+                fallback.append(pending)
+
+        if fallback:
+            LLM_BATCH_FALLBACKS.inc(len(fallback))
+            await asyncio.gather(*(self._resolve_single(pending) for pending in fallback))
+
+    async def _resolve_single(self, pending: _Pending) -> None:
+        """Moderate one description on its own and resolve its future."""
+        type_, description, future = pending
+        try:
+            verdict = await self.moderate_one(type_, description)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(verdict)
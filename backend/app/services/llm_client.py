@@ -1,13 +1,24 @@
 """
 LLM client for validating alert descriptions using OpenAI.
+
+A single AsyncOpenAI client (and its HTTP connection pool) is shared by the
+whole process. Calls go through a semaphore and a token-bucket limiter sized
+to the configured RPM/TPM, so traffic spikes queue locally instead of
+turning into provider 429s.
 """
+import asyncio
 import json
-from typing import Tuple
+import time
+from typing import Optional, Tuple
 
 import openai
 from openai.types.chat import ChatCompletion
+from prometheus_client import Counter, Gauge, Histogram
 
 from app.config import settings
+from app.services.llm_batch import BatchModerator
+from app.services.resilience import CircuitBreaker, DependencyUnavailable, call_timeout
+from app.services.verdict_cache import cache_key, verdict_cache
 
 # Prompt template for validating alert descriptions
 PROMPT_TEMPLATE = (
@@ -18,47 +29,290 @@ PROMPT_TEMPLATE = (
     "Réponds strictement par JSON: {{\"valid\":true/false, \"score\":0-1}}"
 )
 
+# Bump whenever PROMPT_TEMPLATE changes, so cached verdicts are not reused
+PROMPT_VERSION = "1"
+
+# Completion budget requested for each moderation call
+MAX_COMPLETION_TOKENS = 100
+
+# Burst allowed by the token buckets, in seconds of quota
+BUCKET_BURST_SECONDS = 10
+
+LLM_LIMITER_WAIT = Histogram(
+    "llm_limiter_wait_seconds",
+    "Time spent waiting for the LLM concurrency and rate limiters",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+LLM_LIMITER_TIMEOUTS = Counter(
+    "llm_limiter_timeouts_total",
+    "LLM calls dropped because the limiter queue deadline expired",
+)
+LLM_IN_FLIGHT = Gauge(
+    "llm_requests_in_flight",
+    "LLM requests currently sent to the provider",
+)
+
+
+class LimiterTimeout(DependencyUnavailable):
+    """Raised when a request cannot be scheduled before its deadline."""
+
+
+class TokenBucket:
+    """
+    Asynchronous token bucket refilled at a constant per-minute rate.
+
+    Waiters are served in arrival order: the lock is held while sleeping,
+    so a large request is not starved by a stream of small ones.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = BUCKET_BURST_SECONDS) -> None:
+        """
+        Initialize the bucket.
+
+        Args:
+            per_minute: Refill rate in units per minute
+            burst_seconds: Bucket capacity expressed in seconds of refill
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        """Add the tokens accumulated since the last refill."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float, deadline: float) -> None:
+        """
+        Take `amount` tokens, waiting for refill if needed.
+
+        Args:
+            amount: Number of tokens to take (clamped to the bucket capacity)
+            deadline: time.monotonic() value after which we give up
+
+        Raises:
+            LimiterTimeout: If the tokens would only be available after the deadline
+        """
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+                if time.monotonic() + wait > deadline:
+                    raise LimiterTimeout("rate limit queue deadline exceeded")
+                await asyncio.sleep(wait)
+
+
+class LLMClient:
+    """Process-wide OpenAI client with concurrency and rate limiting."""
+
+    def __init__(self) -> None:
+        """Create the OpenAI client and limiters from settings."""
+        self.client = openai.AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=str(settings.openai_api_base),
+            timeout=settings.openai_timeout,
+        )
+        self.semaphore = asyncio.Semaphore(settings.openai_max_concurrency)
+        self.requests = TokenBucket(settings.openai_rpm)
+        self.tokens = TokenBucket(settings.openai_tpm)
+
+    async def close(self) -> None:
+        """Close the underlying HTTP connection pool."""
+        await self.client.close()
+
+    async def complete(self, prompt: str, max_tokens: int = MAX_COMPLETION_TOKENS) -> Optional[str]:
+        """
+        Send a single-message chat completion through the limiters.
+
+        Args:
+            prompt: The system prompt to send
+            max_tokens: Completion token budget
+
+        Returns:
+            The message content, or None if the model returned nothing
+
+        Raises:
+            LimiterTimeout: If the request could not be scheduled in time
+            DeadlineExceeded: If the request deadline has already expired
+        """
+        # Rough token estimate (~4 characters per token) plus the completion budget
+        estimated_tokens = len(prompt) / 4 + max_tokens
+        # Never queue past the request deadline, if one is set
+        queue_timeout = call_timeout(settings.openai_queue_timeout)
+        deadline = time.monotonic() + queue_timeout
+        started = time.monotonic()
+
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=queue_timeout)
+        except asyncio.TimeoutError:
+            LLM_LIMITER_TIMEOUTS.inc()
+            raise LimiterTimeout("concurrency queue deadline exceeded")
+
+        try:
+            try:
+                await self.requests.acquire(1, deadline)
+                await self.tokens.acquire(estimated_tokens, deadline)
+            except LimiterTimeout:
+                LLM_LIMITER_TIMEOUTS.inc()
+                raise
+            LLM_LIMITER_WAIT.observe(time.monotonic() - started)
+
+            LLM_IN_FLIGHT.inc()
+            try:
+                response: ChatCompletion = await self.client.chat.completions.create(
+                    model=settings.openai_model,
+                    messages=[{"role": "system", "content": prompt}],
+                    max_tokens=max_tokens,
+                    temperature=0.1,
+                    timeout=call_timeout(settings.openai_timeout),
+                )
+            finally:
+                LLM_IN_FLIGHT.dec()
+        finally:
+            self.semaphore.release()
+
+        return response.choices[0].message.content
+
+
+# Shared client instance, created in the application lifespan
+llm_client: Optional[LLMClient] = None
+
+# Circuit breaker shared by every call to the LLM provider
+llm_breaker = CircuitBreaker(
+    "llm",
+    failure_threshold=settings.breaker_failure_threshold,
+    reset_timeout=settings.breaker_reset_timeout,
+)
+
+
+def get_llm_client() -> LLMClient:
+    """
+    Get the shared LLM client, creating it on first use.
+
+    Returns:
+        LLMClient: The process-wide client
+    """
+    global llm_client
+
+    if llm_client is None:
+        llm_client = LLMClient()
+
+    return llm_client
+
+
+async def close_llm_client() -> None:
+    """Close the shared LLM client, if it was created."""
+    global llm_client
+
+    if llm_client is not None:
+        await llm_client.close()
+        llm_client = None
+
+
+def parse_verdict(content: Optional[str]) -> Tuple[bool, float]:
+    """
+    Parse the JSON verdict returned by the moderation prompt.
+
+    Args:
+        content: Raw message content from the LLM
+
+    Returns:
+        Tuple containing (is_valid, confidence_score)
+
+    Raises:
+        ValueError: If the content is empty or not a JSON verdict
+    """
+    if not content:
+        raise ValueError("empty LLM response")
+
+    # json.JSONDecodeError is a ValueError
+    result = json.loads(content)
+    if not isinstance(result, dict):
+        raise ValueError("LLM response is not a JSON object")
+    return bool(result.get("valid", False)), float(result.get("score", 0.0))
+
+
+async def moderate_single(type_: str, description: Optional[str]) -> Tuple[bool, float]:
+    """
+    Moderate one description with its own LLM request.
+
+    Args:
+        type_: The alert type
+        description: The alert description
+
+    Returns:
+        Tuple containing (is_valid, confidence_score)
+
+    Raises:
+        LimiterTimeout: If the request could not be scheduled in time
+        ValueError: If the LLM answer is not a JSON verdict
+    """
+    prompt = PROMPT_TEMPLATE.format(type=type_, description=description)
+    content = await get_llm_client().complete(prompt)
+    return parse_verdict(content)
+
+
+async def _complete(prompt: str, max_tokens: int) -> Optional[str]:
+    """Send a prompt through the shared client (used by the batch moderator)."""
+    return await get_llm_client().complete(prompt, max_tokens)
+
+
+# Shared batching moderator, used when LLM_BATCH_ENABLED is set
+batch_moderator = BatchModerator(
+    complete=_complete,
+    moderate_one=moderate_single,
+    window=settings.llm_batch_window_ms / 1000,
+    max_size=settings.llm_batch_max_size,
+)
+
 
 async def verify_description(type_: str, description: str) -> Tuple[bool, float]:
     """
     Verify if an alert description is legitimate using OpenAI.
 
+    Verdicts are looked up in the verdict cache first; only real LLM answers
+    are cached. The call goes through the LLM circuit breaker and is bounded
+    by the current request deadline.
+
     Args:
         type_: The alert type
         description: The alert description
 
     Returns:
         Tuple containing (is_valid, confidence_score)
+
+    Raises:
+        DependencyUnavailable: If the LLM could not answer (error, timeout,
+            rate-limit queue full or open circuit); the caller should retry later
     """
-    client = openai.AsyncOpenAI(
-        api_key=settings.openai_api_key,
-        base_url=settings.openai_api_base,
-    )
+    key = cache_key(type_, description, settings.openai_model, PROMPT_VERSION)
+    cached = await verdict_cache.get(key)
+    if cached is not None:
+        return cached
 
-    prompt = PROMPT_TEMPLATE.format(type=type_, description=description)
+    async def moderate() -> Tuple[bool, float]:
+        if settings.llm_batch_enabled:
+            return await batch_moderator.submit(type_, description)
+        return await moderate_single(type_, description)
 
     try:
-        response: ChatCompletion = await client.chat.completions.create(
-            model=settings.openai_model,
-            messages=[{"role": "system", "content": prompt}],
-            max_tokens=100,
-            temperature=0.1,
+        # Local queueing and malformed answers do not say the provider is down
+        verdict = await llm_breaker.call(
+            moderate, ignore=(LimiterTimeout, ValueError)
         )
-
-        # Extract the JSON response
-        content = response.choices[0].message.content
-        if not content:
-            return False, 0.0
-
-        try:
-            result = json.loads(content)
-            return result.get("valid", False), result.get("score", 0.0)
-        except json.JSONDecodeError:
-            # Fallback in case the LLM doesn't return valid JSON
-            return False, 0.0
-
-    except Exception as e:
-        # Log the error in a production environment
-        print(f"Error calling OpenAI API: {str(e)}")
-        # Default to False in case of API error
+    except ValueError:
+        # Fallback in case the LLM doesn't return valid JSON
         return False, 0.0
+    except DependencyUnavailable as e:
+        print(f"OpenAI API unavailable: {str(e)}")
+        raise
+
+    await verdict_cache.set(key, verdict)
+    return verdict
@@ -1,68 +1,334 @@
 """
 Message queue client for RabbitMQ using aio_pika.
-This module provides functions to publish events to RabbitMQ.
+This module provides the event publisher used by the API.
+
+One EventPublisher per process holds a robust connection and a small pool
+of long-lived channels in publisher-confirm mode. Topology is declared once
+when connecting; robust channels re-declare it by themselves after a
+reconnect.
+
+Events go to the "incident.events" topic exchange with routing keys
+"incident.validated.<geohash4>.<severity>", so consumers bind only to the
+regions and severities they serve (e.g. "incident.validated.u09t.*" or
+"incident.validated.*.5").
+
+Incident events also carry the incident id in the "x-incident-id" header.
+Workers running partitioned consumers hash on it (consistent-hash exchange)
+so every event of an incident lands in the same shard queue, and the
+publisher sends all events of an incident on the same channel so they
+reach the broker in order.
+
+Publishes are pipelined: channels are shared, so many messages can wait for
+their broker confirm at the same time (aiormq matches acks, including
+multiple-acks, to each message by delivery tag). Nacked or unconfirmed
+messages are re-published with backoff.
+
+Messages are published as mandatory: the broker confirms a message that no
+queue is bound to receive, so without it an event published before the
+worker declared its queues would count as delivered and be lost. A returned
+message raises PublishError right away (no retry); the outbox relay keeps
+the event, retries it with back-off and parks it in event_outbox_dead if it
+is still unroutable after OUTBOX_MAX_ATTEMPTS.
 """
-from typing import Optional
+import asyncio
+import time
+import zlib
+from typing import Iterable, List, Optional, Tuple
 
 import aio_pika
-from aio_pika.abc import AbstractRobustConnection
+from aio_pika.abc import AbstractChannel, AbstractExchange, AbstractRobustConnection
+from aio_pika.exceptions import AMQPError, ChannelInvalidStateError, DeliveryError, PublishError
+from prometheus_client import Counter, Gauge, Histogram
 
 from app.config import settings
-from app.core.events import IncidentValidated
+from app.core import geohash
+from app.core.events import IncidentValidated, encode_event
+
+# Topic exchange receiving every incident event
+EVENTS_EXCHANGE = "incident.events"
 
+# Routing key prefix of IncidentValidated events
+INCIDENT_VALIDATED = "incident.validated"
 
-# Global connection instance (lazy initialized)
-connection: Optional[aio_pika.RobustConnection] = None
+# Geohash length used in routing keys (~39 x 20 km cells)
+ROUTING_GEOHASH_PRECISION = 4
 
+# Header carrying the partition key (incident id) of an event
+PARTITION_HEADER = "x-incident-id"
 
-async def get_connection() -> aio_pika.RobustConnection:
+# First retry delay after a nack or a broken channel (doubled on each retry)
+RETRY_BACKOFF = 0.1
+
+MQ_PUBLISH_LATENCY = Histogram(
+    "mq_publish_duration_seconds",
+    "Time from publish to broker confirm, including retries",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+MQ_PUBLISH_ERRORS = Counter(
+    "mq_publish_errors_total",
+    "Publish attempts that failed on a broken channel, connection or confirm timeout",
+)
+MQ_PUBLISH_NACKS = Counter(
+    "mq_publish_nacks_total",
+    "Publishes negatively acknowledged by the broker",
+)
+MQ_PUBLISH_UNROUTED = Counter(
+    "mq_publish_unrouted_total",
+    "Mandatory publishes returned by the broker because no queue is bound",
+)
+MQ_PUBLISH_RETRIES = Counter(
+    "mq_publish_retries_total",
+    "Messages re-published after a nack or a failed attempt",
+)
+MQ_IN_FLIGHT = Gauge(
+    "mq_publishes_in_flight",
+    "Published messages waiting for a broker confirm",
+)
+MQ_CHANNELS = Gauge(
+    "mq_publisher_channels",
+    "Channels currently open by the event publisher",
+)
+
+
+def incident_routing_key(event: IncidentValidated) -> str:
     """
-    Get or create a robust connection to RabbitMQ.
-    Uses a singleton pattern to reuse the connection.
-    
+    Build the routing key of an IncidentValidated event.
+
+    Args:
+        event: The event to route
+
     Returns:
-        aio_pika.RobustConnection: Connection to RabbitMQ
+        "incident.validated.<geohash4>.<severity>" (severity 0 when unknown)
     """
-    global connection
-    
-    # If connection does not exist or is closed, create a new one
-    if connection is None or connection.is_closed:
-        # Use RobustConnection for automatic reconnection
-        connection = await aio_pika.connect_robust(
-            settings.rabbitmq_url,
-            client_properties={
-                "connection_name": "greensentinel_backend",
-            },
+    cell = geohash.encode(event.lat, event.lon, ROUTING_GEOHASH_PRECISION)
+    return f"{INCIDENT_VALIDATED}.{cell}.{event.severity or 0}"
+
+
+class EventPublisher:
+    """Publishes events with broker confirms over a pool of long-lived channels."""
+
+    def __init__(
+        self,
+        url: str,
+        pool_size: int,
+        max_in_flight: int = 256,
+        confirm_timeout: float = 5.0,
+        max_retries: int = 3,
+    ) -> None:
+        """
+        Initialize the publisher (no connection is made yet).
+
+        Args:
+            url: RabbitMQ connection URL
+            pool_size: Number of channels kept open
+            max_in_flight: Maximum messages waiting for a confirm at once
+            confirm_timeout: Seconds to wait for the confirm of one message
+            max_retries: Re-publish attempts after a nack or a failure
+        """
+        self.url = url
+        self.pool_size = pool_size
+        self.confirm_timeout = confirm_timeout
+        self.max_retries = max_retries
+        self.connection: Optional[AbstractRobustConnection] = None
+        self._channels: List[AbstractChannel] = []
+        self._exchanges: List[AbstractExchange] = []
+        self._next_channel = 0
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._connect_lock = asyncio.Lock()
+
+    async def connect(self) -> None:
+        """Open the connection, the channel pool and declare the topology, if not done yet."""
+        if self.connection is not None and not self.connection.is_closed:
+            return
+
+        async with self._connect_lock:
+            if self.connection is not None and not self.connection.is_closed:
+                return
+
+            # RobustConnection reconnects automatically and restores its channels
+            self.connection = await aio_pika.connect_robust(
+                self.url,
+                client_properties={
+                    "connection_name": "greensentinel_backend",
+                },
+            )
+            channel = await self._open_channel()
+            exchange = await channel.declare_exchange(
+                EVENTS_EXCHANGE,
+                type=aio_pika.ExchangeType.TOPIC,
+                durable=True,  # Exchange survives broker restart
+            )
+            self._channels = [channel]
+            self._exchanges = [exchange]
+            for _ in range(self.pool_size - 1):
+                await self._add_channel()
+            MQ_CHANNELS.set(len(self._channels))
+
+    async def close(self) -> None:
+        """Close every channel and the connection."""
+        if self.connection is not None:
+            await self.connection.close()
+        self.connection = None
+        self._channels = []
+        self._exchanges = []
+        MQ_CHANNELS.set(0)
+
+    async def _open_channel(self) -> AbstractChannel:
+        """Open a channel in publisher-confirm mode on the shared connection."""
+        # Returned (unroutable) mandatory messages fail their publish
+        return await self.connection.channel(publisher_confirms=True, on_return_raises=True)
+
+    async def _exchange_on(self, channel: AbstractChannel) -> AbstractExchange:
+        """Get the events exchange on a channel without re-declaring it."""
+        return await channel.get_exchange(EVENTS_EXCHANGE, ensure=False)
+
+    async def _add_channel(self) -> None:
+        """Add one channel to the pool."""
+        channel = await self._open_channel()
+        self._channels.append(channel)
+        self._exchanges.append(await self._exchange_on(channel))
+
+    async def _get_exchange(self, partition_key: Optional[str] = None) -> AbstractExchange:
+        """
+        Pick the events exchange on a pooled channel, replacing closed channels.
+
+        Args:
+            partition_key: Messages with the same key always use the same
+                channel (keeping their order); others are spread round-robin
+        """
+        await self.connect()
+
+        if partition_key is None:
+            index = self._next_channel % len(self._channels)
+            self._next_channel += 1
+        else:
+            index = zlib.crc32(partition_key.encode()) % len(self._channels)
+        if self._channels[index].is_closed:
+            channel = await self._open_channel()
+            self._channels[index] = channel
+            self._exchanges[index] = await self._exchange_on(channel)
+        return self._exchanges[index]
+
+    async def publish(self, event: IncidentValidated) -> None:
+        """
+        Publish an IncidentValidated event and wait for the broker confirm.
+
+        The event is published to the events exchange with its regional
+        routing key (see incident_routing_key).
+
+        Args:
+            event: The IncidentValidated event to publish
+
+        Raises:
+            AMQPError: If the message was still not confirmed after the last retry
+            asyncio.TimeoutError: If the last attempt timed out waiting for the confirm
+        """
+        await self.publish_body(encode_event(event), incident_routing_key(event), str(event.id))
+
+    async def publish_body(
+        self, body: bytes, routing_key: str, partition_key: Optional[str] = None
+    ) -> None:
+        """
+        Publish an already serialized message and wait for the broker confirm.
+
+        Nacks, confirm timeouts and broken channels are retried with
+        exponential backoff, so a message may be delivered more than once.
+
+        Args:
+            body: Serialized message
+            routing_key: Routing key on the events exchange
+            partition_key: Incident id, sent in the x-incident-id header and
+                used to keep the events of an incident in order
+
+        Raises:
+            PublishError: If the broker returned the message (no queue bound)
+            AMQPError: If the message was still not confirmed after the last retry
+            asyncio.TimeoutError: If the last attempt timed out waiting for the confirm
+        """
+        started = time.perf_counter()
+
+        async with self._in_flight:
+            MQ_IN_FLIGHT.inc()
+            try:
+                await self._publish_confirmed(body, routing_key, partition_key)
+            finally:
+                MQ_IN_FLIGHT.dec()
+
+        MQ_PUBLISH_LATENCY.observe(time.perf_counter() - started)
+
+    async def publish_many(
+        self, messages: Iterable[Tuple[bytes, str, Optional[str]]]
+    ) -> List[Optional[BaseException]]:
+        """
+        Publish several messages, with all their confirms tracked concurrently.
+
+        Args:
+            messages: (body, routing_key, partition_key) tuples
+
+        Returns:
+            One entry per message: None if confirmed, otherwise the error
+        """
+        return await asyncio.gather(
+            *(
+                self.publish_body(body, routing_key, partition_key)
+                for body, routing_key, partition_key in messages
+            ),
+            return_exceptions=True,
         )
-    
-    return connection
+
+    async def _publish_confirmed(
+        self, body: bytes, routing_key: str, partition_key: Optional[str] = None
+    ) -> None:
+        """Publish one message until the broker acks it or retries run out."""
+        headers = {PARTITION_HEADER: partition_key} if partition_key is not None else None
+        for attempt in range(self.max_retries + 1):
+            try:
+                exchange = await self._get_exchange(partition_key)
+                await exchange.publish(
+                    aio_pika.Message(
+                        body=body,
+                        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,  # Message survives broker restart
+                        headers=headers,
+                    ),
+                    routing_key=routing_key,
+                    mandatory=True,
+                    timeout=self.confirm_timeout,
+                )
+                return
+            except PublishError:
+                # No queue bound yet: retrying right away would not help
+                MQ_PUBLISH_UNROUTED.inc()
+                raise
+            except DeliveryError:
+                MQ_PUBLISH_NACKS.inc()
+                if attempt == self.max_retries:
+                    raise
+            except (AMQPError, ChannelInvalidStateError, ConnectionError, asyncio.TimeoutError):
+                MQ_PUBLISH_ERRORS.inc()
+                if attempt == self.max_retries:
+                    raise
+
+            MQ_PUBLISH_RETRIES.inc()
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+
+# Shared publisher, connected in the application lifespan
+publisher = EventPublisher(
+    settings.rabbitmq_url,
+    pool_size=settings.rabbitmq_channel_pool_size,
+    max_in_flight=settings.rabbitmq_max_in_flight,
+    confirm_timeout=settings.rabbitmq_confirm_timeout,
+    max_retries=settings.rabbitmq_publish_retries,
+)
 
 
 async def publish_event(event: IncidentValidated) -> None:
     """
-    Publish an IncidentValidated event to RabbitMQ.
-    The event is published to the default exchange with routing key "incident.validated".
-    
+    Publish an IncidentValidated event to RabbitMQ through the shared publisher.
+
+    Returns once the broker has confirmed the message.
+
     Args:
         event: The IncidentValidated event to publish
     """
-    # Get connection
-    conn = await get_connection()
-    
-    # Create channel
-    channel = await conn.channel()
-    
-    # Declare queue (ensure it exists)
-    queue = await channel.declare_queue(
-        "incident.validated",
-        durable=True,  # Queue survives broker restart
-    )
-    
-    # Publish message
-    await channel.default_exchange.publish(
-        aio_pika.Message(
-            body=event.model_dump_json().encode(),
-            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,  # Message survives broker restart
-        ),
-        routing_key="incident.validated",
-    )
+    await publisher.publish(event)
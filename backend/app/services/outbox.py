@@ -0,0 +1,260 @@
+"""
+Transactional outbox for incident events.
+
+Events are inserted into the event_outbox table in the same transaction as
+the incident state change, so an event exists if and only if the state was
+committed. A relay task drains the table in batches: it claims a batch in a
+short transaction (FOR UPDATE SKIP LOCKED, so several API replicas can relay
+concurrently) by setting a lease in next_attempt_at, publishes it with broker
+confirms outside any transaction, then deletes the confirmed rows and releases
+the others in a second one. No connection or row lock is held while waiting
+for the broker.
+
+A failed event is retried with exponential back-off (next_attempt_at), so
+rows that keep failing never hold back newer events. Events the broker
+returns as unroutable (no queue bound to their region and severity) are
+moved to event_outbox_dead after max_attempts; other failures (broker
+unavailable, nacks) are retried until they succeed.
+
+Delivery is at-least-once: a crash between the confirm and the delete
+re-publishes the batch once its lease expires, so consumers must be
+idempotent.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+import msgspec
+
+from aio_pika.exceptions import PublishError
+from prometheus_client import Counter, Histogram
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.events import IncidentValidated, encoder
+from app.core.models import EventOutbox, EventOutboxDead
+from app.services.mq import EventPublisher, incident_routing_key, publisher
+
+OUTBOX_PUBLISHED = Counter(
+    "outbox_events_published_total",
+    "Outbox events published and confirmed by the broker",
+)
+OUTBOX_FAILED = Counter(
+    "outbox_publish_failures_total",
+    "Outbox events left in the table after a failed publish",
+)
+OUTBOX_PARKED = Counter(
+    "outbox_events_parked_total",
+    "Unroutable outbox events moved to event_outbox_dead after the last attempt",
+)
+OUTBOX_BATCH_SIZE = Histogram(
+    "outbox_batch_size",
+    "Number of events drained from the outbox in one batch",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500),
+)
+
+
+async def add_incident_validated(db: AsyncSession, event: IncidentValidated) -> None:
+    """
+    Stage an IncidentValidated event in the caller's transaction.
+
+    Args:
+        db: Session holding the incident update
+        event: The event to publish once the transaction commits
+    """
+    await db.execute(
+        insert(EventOutbox).values(
+            event_type="incident.validated",
+            routing_key=incident_routing_key(event),
+            payload=msgspec.to_builtins(event),
+        )
+    )
+
+
+class OutboxRelay:
+    """Background task moving committed outbox events to RabbitMQ."""
+
+    def __init__(
+        self,
+        publisher: EventPublisher,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        claim_timeout: float = 60.0,
+        retry_backoff: float = 1.0,
+        retry_backoff_max: float = 300.0,
+        max_attempts: int = 10,
+    ) -> None:
+        """
+        Initialize the relay.
+
+        Args:
+            publisher: Publisher used to send events with confirms
+            session_factory: Factory for database sessions
+            batch_size: Maximum events drained per pass
+            poll_interval: Seconds between polls when the outbox is empty
+            claim_timeout: Seconds other relays leave a claimed batch alone
+            retry_backoff: Delay before the first retry of a failed event
+                (doubled on each attempt)
+            retry_backoff_max: Maximum delay between two attempts
+            max_attempts: Attempts before an unroutable event is parked
+        """
+        self.publisher = publisher
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.claim_timeout = claim_timeout
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self.max_attempts = max_attempts
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def wake(self) -> None:
+        """Drain now instead of waiting for the next poll (call after a commit)."""
+        self._wakeup.set()
+
+    async def _claim(self) -> List[EventOutbox]:
+        """
+        Lease the oldest available events to this relay.
+
+        Returns:
+            The claimed rows (detached, their transaction is committed)
+        """
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            async with db.begin():
+                result = await db.execute(
+                    select(EventOutbox)
+                    .where(or_(EventOutbox.next_attempt_at.is_(None), EventOutbox.next_attempt_at <= now))
+                    .order_by(EventOutbox.id)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                rows = result.scalars().all()
+                if rows:
+                    await db.execute(
+                        update(EventOutbox)
+                        .where(EventOutbox.id.in_([row.id for row in rows]))
+                        .values(next_attempt_at=now + timedelta(seconds=self.claim_timeout))
+                    )
+            return rows
+
+    def _retry_delay(self, attempts: int) -> float:
+        """Back-off before the next attempt of an event that failed attempts times."""
+        return min(self.retry_backoff * 2 ** (attempts - 1), self.retry_backoff_max)
+
+    async def drain_once(self) -> int:
+        """
+        Publish one batch of pending events.
+
+        Returns:
+            Number of events confirmed and removed from the outbox
+        """
+        rows = await self._claim()
+        if not rows:
+            return 0
+
+        OUTBOX_BATCH_SIZE.observe(len(rows))
+        errors = await self.publisher.publish_many(
+            (encoder.encode(row.payload), row.routing_key, str(row.payload["id"]))
+            for row in rows
+        )
+
+        confirmed = [row.id for row, error in zip(rows, errors) if error is None]
+        failed = [(row, error) for row, error in zip(rows, errors) if error is not None]
+        parked = [
+            (row, error) for row, error in failed
+            if isinstance(error, PublishError) and row.attempts + 1 >= self.max_attempts
+        ]
+        parked_ids = {row.id for row, _ in parked}
+        retried = [row for row, _ in failed if row.id not in parked_ids]
+
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            async with db.begin():
+                if confirmed:
+                    await db.execute(delete(EventOutbox).where(EventOutbox.id.in_(confirmed)))
+                if parked:
+                    await db.execute(
+                        insert(EventOutboxDead).values([
+                            {
+                                "id": row.id,
+                                "event_type": row.event_type,
+                                "routing_key": row.routing_key,
+                                "payload": row.payload,
+                                "attempts": row.attempts + 1,
+                                "last_error": str(error)[:500],
+                                "created_at": row.created_at,
+                            }
+                            for row, error in parked
+                        ])
+                    )
+                    await db.execute(
+                        delete(EventOutbox).where(EventOutbox.id.in_([row.id for row, _ in parked]))
+                    )
+                for row in retried:
+                    # Skipped by the next passes until its back-off elapsed
+                    await db.execute(
+                        update(EventOutbox)
+                        .where(EventOutbox.id == row.id)
+                        .values(
+                            attempts=EventOutbox.attempts + 1,
+                            next_attempt_at=now + timedelta(seconds=self._retry_delay(row.attempts + 1)),
+                        )
+                    )
+
+        OUTBOX_PUBLISHED.inc(len(confirmed))
+        OUTBOX_FAILED.inc(len(retried))
+        OUTBOX_PARKED.inc(len(parked))
+        if retried:
+            print(f"Outbox relay: {len(retried)} events not confirmed, will retry")
+        if parked:
+            print(f"Outbox relay: {len(parked)} unroutable events moved to event_outbox_dead")
+        return len(confirmed)
+
+    async def run(self) -> None:
+        """Drain the outbox until cancelled."""
+        while True:
+            self._wakeup.clear()
+            try:
+                published = await self.drain_once()
+            except Exception as e:
+                print(f"Outbox relay error: {str(e)}")
+                published = 0
+
+            # A full batch means more events are probably waiting
+            if published < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self) -> None:
+        """Start the relay as a background task."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Cancel the background task and wait for it to finish."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Shared relay, started in the application lifespan
+outbox_relay = OutboxRelay(
+    publisher,
+    batch_size=settings.outbox_batch_size,
+    poll_interval=settings.outbox_poll_interval,
+    claim_timeout=settings.outbox_claim_timeout,
+    retry_backoff=settings.outbox_retry_backoff,
+    retry_backoff_max=settings.outbox_retry_backoff_max,
+    max_attempts=settings.outbox_max_attempts,
+)
@@ -0,0 +1,251 @@
+"""
+Resilience helpers shared by the vision and LLM clients.
+
+- A request-level Deadline, propagated through a context variable from
+  create_alert down to every outbound call, so no dependency can wait longer
+  than what is left of the request budget.
+- Per-dependency circuit breakers that fail fast while a dependency is down
+  instead of making every alert wait out a full timeout.
+
+Callers get a DependencyUnavailable error and can record a pending_retry
+outcome instead of silently rejecting the incident; such incidents are
+validated again in the background (app.services.revalidation).
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Iterator, Optional, Tuple, Type, TypeVar
+
+from prometheus_client import Counter, Gauge
+
+T = TypeVar("T")
+
+CIRCUIT_STATE = Gauge(
+    "dependency_circuit_state",
+    "Circuit breaker state per dependency (0=closed, 1=half-open, 2=open)",
+    ["dependency"],
+)
+CIRCUIT_REJECTIONS = Counter(
+    "dependency_circuit_rejections_total",
+    "Calls rejected without trying because the circuit was open",
+    ["dependency"],
+)
+DEPENDENCY_FAILURES = Counter(
+    "dependency_failures_total",
+    "Failed dependency calls (errors and timeouts)",
+    ["dependency"],
+)
+
+
+class DependencyUnavailable(Exception):
+    """A dependency could not give an answer; the work should be retried later."""
+
+
+class CircuitOpenError(DependencyUnavailable):
+    """The circuit breaker for a dependency is open."""
+
+
+class DeadlineExceeded(DependencyUnavailable):
+    """The request deadline expired before the dependency answered."""
+
+
+class Deadline:
+    """Absolute point in time by which a request must be answered."""
+
+    def __init__(self, budget: float) -> None:
+        """
+        Initialize the deadline.
+
+        Args:
+            budget: Seconds from now
+        """
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """
+        Timeout to use for the next call.
+
+        Args:
+            cap: Per-call timeout the dependency would use on its own
+
+        Returns:
+            The smaller of the cap and the remaining budget
+
+        Raises:
+            DeadlineExceeded: If the deadline has already expired
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("request deadline exceeded")
+        return remaining if cap is None else min(cap, remaining)
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Deadline of the request being handled, if any."""
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(budget: float) -> Iterator[Deadline]:
+    """
+    Set the request deadline for the duration of the block.
+
+    Args:
+        budget: Seconds from now
+
+    Yields:
+        The new Deadline
+    """
+    deadline = Deadline(budget)
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def call_timeout(cap: Optional[float]) -> Optional[float]:
+    """
+    Timeout for an outbound call, bounded by the current request deadline.
+
+    Args:
+        cap: Per-call timeout the dependency would use on its own
+
+    Returns:
+        Timeout in seconds, or the cap when no deadline is set
+
+    Raises:
+        DeadlineExceeded: If the current deadline has already expired
+    """
+    deadline = current_deadline()
+    return cap if deadline is None else deadline.timeout(cap)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls fail fast. Once `reset_timeout` has elapsed a single trial call is
+    let through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float) -> None:
+        """
+        Initialize the breaker.
+
+        Args:
+            name: Dependency name, used as the metric label
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds to stay open before a trial call
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self._set_state(self.CLOSED)
+
+    def _set_state(self, state: str) -> None:
+        """Change state and export it."""
+        self.state = state
+        CIRCUIT_STATE.labels(dependency=self.name).set(self._STATE_VALUES[state])
+
+    def allow(self) -> None:
+        """
+        Check whether a call may proceed.
+
+        Raises:
+            CircuitOpenError: If the circuit is open (or a trial is already running)
+        """
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._set_state(self.HALF_OPEN)
+            self.trial_in_flight = False
+
+        if self.state == self.CLOSED:
+            return
+        if self.state == self.HALF_OPEN and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return
+
+        CIRCUIT_REJECTIONS.labels(dependency=self.name).inc()
+        raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful call."""
+        self.failures = 0
+        self.trial_in_flight = False
+        if self.state != self.CLOSED:
+            self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the circuit past the threshold."""
+        DEPENDENCY_FAILURES.labels(dependency=self.name).inc()
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    async def call(
+        self,
+        func: Callable[[], Awaitable[T]],
+        cap: Optional[float] = None,
+        ignore: Tuple[Type[BaseException], ...] = (),
+    ) -> T:
+        """
+        Run a dependency call under the breaker and the request deadline.
+
+        Args:
+            func: Zero-argument coroutine function performing the call
+            cap: Per-call timeout, further bounded by the request deadline
+            ignore: Exception types re-raised as-is, without counting for or
+                against the circuit
+
+        Returns:
+            Whatever func returned
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            DeadlineExceeded: If the deadline expired before or during the call
+            DependencyUnavailable: If the call failed
+        """
+        timeout = call_timeout(cap)
+        self.allow()
+
+        try:
+            result = await asyncio.wait_for(func(), timeout=timeout)
+        except ignore:
+            self.trial_in_flight = False
+            raise
+        except asyncio.CancelledError:
+            # The caller gave up; this says nothing about the dependency
+            self.trial_in_flight = False
+            raise
+        except asyncio.TimeoutError as e:
+            self.record_failure()
+            raise DeadlineExceeded(f"{self.name} did not answer in time") from e
+        except DependencyUnavailable:
+            self.record_failure()
+            raise
+        except Exception as e:
+            self.record_failure()
+            raise DependencyUnavailable(f"{self.name} call failed: {str(e)}") from e
+
+        self.record_success()
+        return result
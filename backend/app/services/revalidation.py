@@ -0,0 +1,161 @@
+"""
+Re-validation of incidents left in pending_retry.
+
+An alert whose vision or LLM check could not answer (error, timeout, open
+circuit) is stored as pending_retry. A background task started with the API
+validates these incidents again: each pass leases the due ones (FOR UPDATE
+SKIP LOCKED, so several API replicas share the work) and re-runs the
+validation one incident at a time, outside any transaction. An incident that
+is still pending_retry is scheduled again with exponential back-off
+(validation_attempts, next_validation_at), so an outage costs one attempt
+per incident and back-off period rather than one per pass.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional
+
+from prometheus_client import Counter
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.core.models import Incident
+
+REVALIDATIONS = Counter(
+    "incident_revalidations_total",
+    "Re-validations of pending_retry incidents, by outcome",
+    ["outcome"],  # resolved, pending
+)
+
+
+class PendingRetryRevalidator:
+    """Background task validating pending_retry incidents again."""
+
+    def __init__(
+        self,
+        revalidate: Callable[[Incident], Awaitable[str]],
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        batch_size: int = 20,
+        interval: float = 30.0,
+        backoff: float = 60.0,
+        backoff_max: float = 3600.0,
+        claim_timeout: float = 600.0,
+    ) -> None:
+        """
+        Initialize the task.
+
+        Args:
+            revalidate: Validates an incident again, records the outcome and
+                returns the new state ("pending_retry" if still unavailable)
+            session_factory: Factory for database sessions
+            batch_size: Maximum incidents re-validated per pass
+            interval: Seconds between passes when no incident is due
+            backoff: Delay before the first re-validation (doubled on each attempt)
+            backoff_max: Maximum delay between two attempts
+            claim_timeout: Seconds other replicas leave a claimed batch alone
+        """
+        self.revalidate = revalidate
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval = interval
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.claim_timeout = claim_timeout
+        self._task: Optional[asyncio.Task] = None
+
+    def _retry_delay(self, attempts: int) -> float:
+        """Back-off before the next attempt of an incident validated attempts times."""
+        return min(self.backoff * 2 ** (attempts - 1), self.backoff_max)
+
+    async def _claim(self) -> List[Incident]:
+        """
+        Lease the due pending_retry incidents to this replica.
+
+        Returns:
+            The claimed incidents (detached, their transaction is committed)
+        """
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            async with db.begin():
+                result = await db.execute(
+                    select(Incident)
+                    .where(
+                        Incident.state == "pending_retry",
+                        or_(Incident.next_validation_at.is_(None), Incident.next_validation_at <= now),
+                    )
+                    .order_by(Incident.id)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                incidents = result.scalars().all()
+                if incidents:
+                    await db.execute(
+                        update(Incident)
+                        .where(Incident.id.in_([incident.id for incident in incidents]))
+                        .values(next_validation_at=now + timedelta(seconds=self.claim_timeout))
+                    )
+            return incidents
+
+    async def _reschedule(self, incident: Incident) -> None:
+        """Schedule the next attempt of an incident that is still pending_retry."""
+        attempts = incident.validation_attempts + 1
+        async with self.session_factory() as db:
+            async with db.begin():
+                await db.execute(
+                    update(Incident)
+                    .where(Incident.id == incident.id, Incident.state == "pending_retry")
+                    .values(
+                        validation_attempts=attempts,
+                        next_validation_at=datetime.utcnow() + timedelta(seconds=self._retry_delay(attempts)),
+                    )
+                )
+
+    async def revalidate_once(self) -> int:
+        """
+        Re-validate one batch of due incidents.
+
+        Returns:
+            Number of incidents re-validated, whatever the outcome
+        """
+        incidents = await self._claim()
+        for incident in incidents:
+            try:
+                state = await self.revalidate(incident)
+            except Exception as e:
+                print(f"Re-validation of incident {incident.id} failed: {str(e)}")
+                state = "pending_retry"
+
+            if state == "pending_retry":
+                REVALIDATIONS.labels(outcome="pending").inc()
+                await self._reschedule(incident)
+            else:
+                REVALIDATIONS.labels(outcome="resolved").inc()
+        return len(incidents)
+
+    async def run(self) -> None:
+        """Re-validate due incidents until cancelled."""
+        while True:
+            try:
+                count = await self.revalidate_once()
+            except Exception as e:
+                print(f"Re-validation error: {str(e)}")
+                count = 0
+
+            # A full batch means more incidents are probably due
+            if count < self.batch_size:
+                await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the task in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Cancel the background task and wait for it to finish."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,234 @@
+"""
+Local pre-classifier for alert descriptions.
+
+A logistic regression over hashed word and character n-grams, trained
+offline from stored LLM verdicts (see scripts/train_text_classifier.py).
+It scores a description in microseconds; only descriptions whose score
+falls inside the uncertainty band are escalated to the LLM.
+"""
+import json
+import math
+import random
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from prometheus_client import Counter
+
+from app.services.verdict_cache import normalize
+
+# Number of hashed feature buckets
+N_FEATURES = 2 ** 18
+
+MODEL_VERSION = 1
+
+TEXT_CLASSIFIER_DECISIONS = Counter(
+    "text_classifier_decisions_total",
+    "Local description pre-classifier decisions",
+    ["outcome"],  # valid, spam, escalated, disabled
+)
+
+
+def _bucket(feature: str) -> int:
+    """Stable hash of a feature string into a bucket index."""
+    return zlib.crc32(feature.encode("utf-8")) % N_FEATURES
+
+
+def extract_features(type_: str, description: Optional[str]) -> Dict[int, float]:
+    """
+    Build the L2-normalised hashed feature vector of a description.
+
+    Features are the alert type, word unigrams and character trigrams of the
+    normalised description.
+
+    Args:
+        type_: The alert type
+        description: The alert description
+
+    Returns:
+        Sparse vector as a {bucket: value} mapping
+    """
+    text = normalize(description)
+    counts: Dict[int, float] = defaultdict(float)
+
+    counts[_bucket("t:" + normalize(type_))] += 1.0
+    if not text:
+        counts[_bucket("empty")] += 1.0
+    for word in text.split():
+        counts[_bucket("w:" + word)] += 1.0
+    padded = f" {text} "
+    for i in range(len(padded) - 2):
+        counts[_bucket("c:" + padded[i:i + 3])] += 1.0
+
+    norm = math.sqrt(sum(value * value for value in counts.values()))
+    return {index: value / norm for index, value in counts.items()}
+
+
+def _sigmoid(z: float) -> float:
+    """Numerically safe logistic function."""
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    ez = math.exp(z)
+    return ez / (1.0 + ez)
+
+
+class TextClassifier:
+    """Hashed n-gram logistic regression with an escalation band."""
+
+    def __init__(
+        self,
+        weights: Optional[Dict[int, float]] = None,
+        bias: float = 0.0,
+        low: float = 0.1,
+        high: float = 0.9,
+    ) -> None:
+        """
+        Initialize the classifier.
+
+        Args:
+            weights: Sparse model weights; None means no model is loaded
+            bias: Model intercept
+            low: Scores at or below this are rejected as spam
+            high: Scores at or above this are accepted as valid
+        """
+        self.weights = weights
+        self.bias = bias
+        self.low = low
+        self.high = high
+
+    @property
+    def enabled(self) -> bool:
+        """Whether a trained model is loaded."""
+        return self.weights is not None
+
+    def predict_proba(self, type_: str, description: Optional[str]) -> float:
+        """
+        Probability that a description is a legitimate fire report.
+
+        Args:
+            type_: The alert type
+            description: The alert description
+
+        Returns:
+            Probability in [0, 1]
+        """
+        weights = self.weights or {}
+        z = self.bias
+        for index, value in extract_features(type_, description).items():
+            z += weights.get(index, 0.0) * value
+        return _sigmoid(z)
+
+    def classify(self, type_: str, description: Optional[str]) -> Optional[Tuple[bool, float]]:
+        """
+        Decide locally when the model is confident.
+
+        Args:
+            type_: The alert type
+            description: The alert description
+
+        Returns:
+            (is_valid, score) when the score is outside the uncertainty band,
+            None when the description must be escalated to the LLM
+        """
+        if not self.enabled:
+            TEXT_CLASSIFIER_DECISIONS.labels(outcome="disabled").inc()
+            return None
+
+        score = self.predict_proba(type_, description)
+        if score >= self.high:
+            TEXT_CLASSIFIER_DECISIONS.labels(outcome="valid").inc()
+            return True, score
+        if score <= self.low:
+            TEXT_CLASSIFIER_DECISIONS.labels(outcome="spam").inc()
+            return False, score
+
+        TEXT_CLASSIFIER_DECISIONS.labels(outcome="escalated").inc()
+        return None
+
+    def fit(
+        self,
+        samples: Iterable[Tuple[str, Optional[str], bool]],
+        epochs: int = 10,
+        learning_rate: float = 1.0,
+        l2: float = 1e-5,
+        seed: int = 0,
+    ) -> None:
+        """
+        Train with plain SGD on (type, description, is_valid) samples.
+
+        Args:
+            samples: Labelled training samples
+            epochs: Passes over the data
+            learning_rate: Initial SGD step size (decays per epoch)
+            l2: L2 regularisation strength
+            seed: Shuffle seed, for reproducible models
+        """
+        data: List[Tuple[Dict[int, float], float]] = [
+            (extract_features(type_, description), 1.0 if label else 0.0)
+            for type_, description, label in samples
+        ]
+        weights: Dict[int, float] = defaultdict(float)
+        bias = 0.0
+        rng = random.Random(seed)
+
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            step = learning_rate / math.sqrt(1 + epoch)
+            for features, label in data:
+                z = bias + sum(weights[i] * v for i, v in features.items())
+                error = _sigmoid(z) - label
+                for i, v in features.items():
+                    weights[i] -= step * (error * v + l2 * weights[i])
+                bias -= step * error
+
+        self.weights = {i: w for i, w in weights.items() if w != 0.0}
+        self.bias = bias
+
+    def save(self, path: str) -> None:
+        """
+        Write the model to a JSON file.
+
+        Args:
+            path: Destination file
+        """
+        model = {
+            "version": MODEL_VERSION,
+            "n_features": N_FEATURES,
+            "bias": self.bias,
+            "weights": {str(i): w for i, w in (self.weights or {}).items()},
+        }
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(model))
+
+    def load(self, path: str) -> bool:
+        """
+        Load a model written by save().
+
+        A missing or incompatible file leaves the classifier disabled.
+
+        Args:
+            path: Model file
+
+        Returns:
+            True if a model was loaded
+        """
+        try:
+            model = json.loads(Path(path).read_text())
+        except (OSError, ValueError) as e:
+            print(f"Text classifier disabled: {str(e)}")
+            self.weights = None
+            return False
+
+        if model.get("version") != MODEL_VERSION or model.get("n_features") != N_FEATURES:
+            print("Text classifier disabled: incompatible model file")
+            self.weights = None
+            return False
+
+        self.weights = {int(i): w for i, w in model["weights"].items()}
+        self.bias = model["bias"]
+        return True
+
+
+# Shared classifier; the model is loaded in the application lifespan
+text_classifier = TextClassifier()
@@ -0,0 +1,194 @@
+"""
+Cache of LLM moderation verdicts.
+
+Verdicts are keyed on the normalised (type, description, model, prompt
+version) tuple. Lookups hit an in-process LRU first, then the llm_verdicts
+table, so repeated or template descriptions never reach the OpenAI API twice.
+"""
+import hashlib
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from prometheus_client import Counter
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.models import LLMVerdict
+
+LLM_CACHE_LOOKUPS = Counter(
+    "llm_verdict_cache_lookups_total",
+    "LLM verdict cache lookups by result",
+    ["result"],  # memory, db, miss
+)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: Optional[str]) -> str:
+    """
+    Normalise free text so trivial variations share a cache entry.
+
+    Args:
+        text: Raw text (may be None)
+
+    Returns:
+        NFKC-folded, lower-cased text with collapsed whitespace
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def cache_key(type_: str, description: Optional[str], model: str, prompt_version: str) -> str:
+    """
+    Build the cache key for a moderation request.
+
+    Args:
+        type_: The alert type
+        description: The alert description
+        model: LLM model name
+        prompt_version: Version of the moderation prompt
+
+    Returns:
+        Hex SHA-256 digest of the normalised tuple
+    """
+    raw = "\x1f".join((normalize(type_), normalize(description), model, prompt_version))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    """Two-tier (memory LRU + database) verdict cache with TTL."""
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: int,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of entries kept in memory
+            ttl: Entry lifetime in seconds (both tiers)
+            session_factory: Session factory for the database tier
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.session_factory = session_factory
+        # key -> (valid, score, expires_at as time.monotonic())
+        self._entries: "OrderedDict[str, Tuple[bool, float, float]]" = OrderedDict()
+
+    def _get_memory(self, key: str) -> Optional[Tuple[bool, float]]:
+        """Look up a key in the in-process LRU."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        valid, score, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return valid, score
+
+    def _set_memory(self, key: str, verdict: Tuple[bool, float], ttl: float) -> None:
+        """Store a verdict in the in-process LRU, evicting the oldest entry."""
+        self._entries[key] = (verdict[0], verdict[1], time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Tuple[bool, float]]:
+        """
+        Look up a verdict, memory first then database.
+
+        Database errors are logged and treated as a miss.
+
+        Args:
+            key: Cache key from cache_key()
+
+        Returns:
+            (is_valid, score) or None on miss
+        """
+        verdict = self._get_memory(key)
+        if verdict is not None:
+            LLM_CACHE_LOOKUPS.labels(result="memory").inc()
+            return verdict
+
+        try:
+            async with self.session_factory() as session:
+                row = await session.scalar(
+                    select(LLMVerdict).where(
+                        LLMVerdict.key == key,
+                        LLMVerdict.expires_at > datetime.utcnow(),
+                    )
+                )
+        except Exception as e:
+            print(f"LLM verdict cache lookup failed: {str(e)}")
+            row = None
+
+        if row is None:
+            LLM_CACHE_LOOKUPS.labels(result="miss").inc()
+            return None
+
+        LLM_CACHE_LOOKUPS.labels(result="db").inc()
+        verdict = (row.valid, row.score)
+        # Promote to memory for the remaining lifetime of the row
+        remaining = (row.expires_at - datetime.utcnow()).total_seconds()
+        self._set_memory(key, verdict, remaining)
+        return verdict
+
+    async def set(self, key: str, verdict: Tuple[bool, float]) -> None:
+        """
+        Store a verdict in both tiers.
+
+        Database errors are logged and ignored.
+
+        Args:
+            key: Cache key from cache_key()
+            verdict: (is_valid, score) returned by the LLM
+        """
+        self._set_memory(key, verdict, self.ttl)
+
+        try:
+            async with self.session_factory() as session:
+                await session.merge(
+                    LLMVerdict(
+                        key=key,
+                        valid=verdict[0],
+                        score=verdict[1],
+                        expires_at=datetime.utcnow() + timedelta(seconds=self.ttl),
+                    )
+                )
+                await session.commit()
+        except Exception as e:
+            print(f"LLM verdict cache write failed: {str(e)}")
+
+    async def purge_expired(self) -> int:
+        """
+        Delete expired rows from the database tier.
+
+        Returns:
+            Number of rows deleted
+        """
+        async with self.session_factory() as session:
+            result = await session.execute(
+                delete(LLMVerdict).where(LLMVerdict.expires_at <= datetime.utcnow())
+            )
+            await session.commit()
+            return result.rowcount or 0
+
+    def clear(self) -> None:
+        """Drop all in-memory entries."""
+        self._entries.clear()
+
+
+# Shared cache instance
+verdict_cache = VerdictCache(settings.llm_cache_size, settings.llm_cache_ttl)
@@ -1,52 +1,126 @@
 import json
-from typing import Tuple, Dict, Any
+from typing import Any, Dict, List, NamedTuple, Tuple
 
 import aiohttp
 from fastapi import HTTPException
 
 from app.config import settings
+from app.services.resilience import CircuitBreaker, DependencyUnavailable
 
+# Keys kept from each bounding box returned by the vision service
+BOX_KEYS = ("class", "confidence", "x1", "y1", "x2", "y2")
 
-async def detect_fire(image_url: str) -> Tuple[bool, float]:
+# Circuit breaker shared by every call to the vision service
+vision_breaker = CircuitBreaker(
+    "vision",
+    failure_threshold=settings.breaker_failure_threshold,
+    reset_timeout=settings.breaker_reset_timeout,
+)
+
+
+class FireDetection(NamedTuple):
+    """Result of a vision service call, including the raw detection boxes."""
+    is_fire: bool
+    confidence: float
+    boxes: List[Dict[str, Any]]
+
+
+NO_DETECTION = FireDetection(False, 0.0, [])
+
+
+def _compact_boxes(boxes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
-    Detect fire in an image by calling the vision service.
+    Keep only the box fields we persist, dropping anything else the model returns.
+    
+    Args:
+        boxes: Boxes as returned by the vision service
+        
+    Returns:
+        List of boxes restricted to BOX_KEYS
+    """
+    return [
+        {key: box[key] for key in BOX_KEYS if key in box}
+        for box in boxes or []
+        if isinstance(box, dict)
+    ]
+
+
+async def _predict(image_url: str) -> FireDetection:
+    """
+    Call the vision service once.
     
     Args:
         image_url: URL of the image to analyze
         
     Returns:
-        Tuple of (is_fire, confidence)
-        - is_fire: Boolean indicating if fire was detected
-        - confidence: Confidence level of the detection (0-1)
+        FireDetection parsed from the response
+        
+    Raises:
+        DependencyUnavailable: If the service answers with an error status
+        aiohttp.ClientError: On connection errors
     """
     # Prepare request payload
     payload = {
         "image_url": image_url
     }
     
+    async with aiohttp.ClientSession() as session:
+        async with session.post(str(settings.vision_url), json=payload) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise DependencyUnavailable(
+                    f"Vision service error: {response.status} - {error_text}"
+                )
+            
+            # Parse response
+            data = await response.json()
+            return FireDetection(
+                data.get("is_fire", False),
+                data.get("confidence", 0.0),
+                _compact_boxes(data.get("boxes", [])),
+            )
+
+
+async def analyze_image(image_url: str) -> FireDetection:
+    """
+    Run fire detection on an image and keep the detection boxes.
+    
+    The call goes through the vision circuit breaker and is bounded by
+    VISION_TIMEOUT and by the current request deadline.
+    
+    Args:
+        image_url: URL of the image to analyze
+        
+    Returns:
+        FireDetection with is_fire, confidence and the detection boxes
+        
+    Raises:
+        DependencyUnavailable: If the service failed, timed out or its circuit is open
+    """
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                settings.vision_url,
-                json=payload,
-                timeout=30  # Timeout after 30 seconds
-            ) as response:
-                if response.status == 200:
-                    # Parse response
-                    data = await response.json()
-                    return data.get("is_fire", False), data.get("confidence", 0.0)
-                else:
-                    # Handle error response
-                    error_text = await response.text()
-                    print(f"Vision service error: {response.status} - {error_text}")
-                    # Return default values on error (not fire, 0 confidence)
-                    return False, 0.0
-                    
-    except aiohttp.ClientError as e:
-        print(f"Connection error to vision service: {str(e)}")
-        # Return default values on connection error
-        return False, 0.0
-    except Exception as e:
-        print(f"Unexpected error calling vision service: {str(e)}")
-        # Return default values on general error
+        return await vision_breaker.call(
+            lambda: _predict(image_url), cap=settings.vision_timeout
+        )
+    except DependencyUnavailable as e:
+        print(f"Vision service unavailable: {str(e)}")
+        raise
+
+
+async def detect_fire(image_url: str) -> Tuple[bool, float]:
+    """
+    Detect fire in an image by calling the vision service.
+    
+    Args:
+        image_url: URL of the image to analyze
+        
+    Returns:
+        Tuple of (is_fire, confidence)
+        - is_fire: Boolean indicating if fire was detected
+        - confidence: Confidence level of the detection (0-1)
+    """
+    try:
+        detection = await analyze_image(image_url)
+    except DependencyUnavailable:
+        # Return default values on error (not fire, 0 confidence)
         return False, 0.0
+    return detection.is_fire, detection.confidence
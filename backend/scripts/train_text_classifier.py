@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Train the local description pre-classifier from stored LLM verdicts.
+
+Incidents whose description verdict came from the LLM or from a human
+reviewer (text_verdict_source) are labelled valid when they ended in
+validated_fire and spam when they ended in rejected_text. Verdicts of the
+classifier itself are left out, so it never learns from its own
+predictions. The model is written as JSON to TEXT_CLASSIFIER_PATH and
+holdout metrics (accuracy on local decisions, escalation rate) are printed.
+
+Usage:
+    python scripts/train_text_classifier.py [--output PATH] [--epochs N]
+"""
+
+import argparse
+import asyncio
+import random
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.models import Incident
+from app.services.text_classifier import TextClassifier
+
+Sample = Tuple[str, Optional[str], bool]
+
+# Verdict sources trusted as labels
+TRAINING_SOURCES = ("llm", "human")
+
+
+async def load_samples() -> List[Sample]:
+    """Load labelled (type, description, is_valid) samples from the database."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Incident.type, Incident.description, Incident.state).where(
+                Incident.text_verdict_source.in_(TRAINING_SOURCES),
+                Incident.state.in_(("validated_fire", "rejected_text")),
+            )
+        )
+        return [
+            (type_, description, state == "validated_fire")
+            for type_, description, state in result.all()
+        ]
+
+
+def evaluate(model: TextClassifier, samples: List[Sample]) -> None:
+    """Print accuracy of local decisions and escalation rate on a holdout set."""
+    decided = correct = 0
+    for type_, description, label in samples:
+        score = model.predict_proba(type_, description)
+        if model.low < score < model.high:
+            continue
+        decided += 1
+        correct += (score >= model.high) == label
+
+    total = len(samples)
+    escalated = total - decided
+    print(f"Holdout samples:     {total}")
+    print(f"Escalation rate:     {escalated / total:.1%} ({escalated} sent to the LLM)")
+    if decided:
+        print(f"Local accuracy:      {correct / decided:.1%} on {decided} local decisions")
+
+
+async def main() -> None:
+    """Train, evaluate and save the classifier."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", default=settings.text_classifier_path)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--min-samples", type=int, default=50)
+    args = parser.parse_args()
+
+    print("🧠 Loading LLM verdicts...")
+    samples = await load_samples()
+    if len(samples) < args.min_samples:
+        print(f"Only {len(samples)} labelled incidents, need {args.min_samples}. Aborting.")
+        return
+
+    random.Random(0).shuffle(samples)
+    split = int(len(samples) * (1 - args.holdout))
+    train, holdout = samples[:split], samples[split:]
+
+    model = TextClassifier(
+        low=settings.text_classifier_low, high=settings.text_classifier_high
+    )
+    print(f"Training on {len(train)} samples...")
+    model.fit(train, epochs=args.epochs)
+    if holdout:
+        evaluate(model, holdout)
+
+    # Final model uses every sample
+    model.fit(samples, epochs=args.epochs)
+    model.save(args.output)
+    print(f"✅ Model written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -15,7 +15,8 @@ from app.core.database import Base, get_db
 
 # Mock implementation for Incident model# Create a mock Incident class for testing
 class MockIncident:
-    def __init__(self, id, type, severity, description, created_at, reporter_id, lat, lon, state="validated_fire", image_url=None):
+    def __init__(self, id, type, severity, description, created_at, reporter_id, lat, lon, state="validated_fire", image_url=None,
+                 confidence=None, confidence_text=None, detections=None):
         self.id = id
         self.type = type
         self.severity = severity
@@ -26,6 +27,9 @@ class MockIncident:
         self.lon = lon
         self.state = state
         self.image_url = image_url
+        self.confidence = confidence
+        self.confidence_text = confidence_text
+        self.detections = detections
         # Simulated location field that would come from PostGIS
         self._location = None
     
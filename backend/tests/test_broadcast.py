@@ -0,0 +1,62 @@
+"""
+Tests for the relay of worker broadcasts to local WebSocket clients.
+"""
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core.events import IncidentValidated, encode_event
+from app.services.broadcast import BroadcastListener
+
+
+def _event() -> IncidentValidated:
+    return IncidentValidated(id=5, lat=48.8566, lon=2.3522, created_at=datetime(2025, 6, 19), severity=4)
+
+
+@pytest.mark.asyncio
+async def test_listener_binds_private_queue_to_fanout():
+    """Each replica consumes its own exclusive queue with a TTL."""
+    connection = MagicMock()
+    channel = MagicMock()
+    queue = MagicMock(bind=AsyncMock(), consume=AsyncMock())
+    exchange = MagicMock()
+    connection.channel = AsyncMock(return_value=channel)
+    channel.declare_exchange = AsyncMock(return_value=exchange)
+    channel.declare_queue = AsyncMock(return_value=queue)
+    listener = BroadcastListener("amqp://test", ttl_ms=1000)
+
+    with patch("app.services.broadcast.aio_pika.connect_robust", AsyncMock(return_value=connection)):
+        await listener.connect()
+
+    assert channel.declare_exchange.call_args[0][0] == "incident.broadcast"
+    channel.declare_queue.assert_awaited_once_with(
+        exclusive=True, auto_delete=True, arguments={"x-message-ttl": 1000}
+    )
+    queue.bind.assert_awaited_once_with(exchange)
+    queue.consume.assert_awaited_once_with(listener.on_message, no_ack=True)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_relayed_to_local_clients():
+    """A worker broadcast is forwarded as a dict to ws_manager."""
+    listener = BroadcastListener("amqp://test")
+    message = MagicMock(body=encode_event(_event()))
+
+    with patch("app.services.broadcast.broadcast_incident", AsyncMock()) as broadcast:
+        await listener.on_message(message)
+
+    data = broadcast.call_args[0][0]
+    assert data["id"] == 5
+    assert data["severity"] == 4
+
+
+@pytest.mark.asyncio
+async def test_malformed_broadcast_is_ignored():
+    """Garbage on the exchange does not reach the clients."""
+    listener = BroadcastListener("amqp://test")
+
+    with patch("app.services.broadcast.broadcast_incident", AsyncMock()) as broadcast:
+        await listener.on_message(MagicMock(body=b"not json"))
+
+    broadcast.assert_not_called()
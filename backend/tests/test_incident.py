@@ -1,4 +1,6 @@
 import asyncio
+from unittest.mock import MagicMock
+
 import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -123,3 +125,37 @@ async def test_invalid_coordinates(client: AsyncClient):
     
     response = await client.post("/api/v1/incidents", json=incident_data)
     assert response.status_code == 422  # Validation error
+
+
+def test_get_incident_detail_with_detections(client, mock_incidents, mock_db_session):
+    """Test that incident detail serves the stored detection boxes."""
+    incident = mock_incidents[0]
+    incident.confidence = 0.87
+    incident.detections = [
+        {"class": 0, "confidence": 0.87, "x1": 100, "y1": 200, "x2": 300, "y2": 400}
+    ]
+    result_mock = MagicMock()
+    result_mock.scalar_one_or_none.return_value = incident
+    mock_db_session.execute.return_value = result_mock
+    
+    response = client.get(f"/api/v1/incidents/{incident.id}")
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["id"] == incident.id
+    assert data["state"] == incident.state
+    assert data["confidence"] == 0.87
+    assert data["detections"] == [
+        {"class": 0, "confidence": 0.87, "x1": 100, "y1": 200, "x2": 300, "y2": 400}
+    ]
+
+
+def test_get_incident_detail_not_found(client, mock_db_session):
+    """Test that an unknown incident returns 404."""
+    result_mock = MagicMock()
+    result_mock.scalar_one_or_none.return_value = None
+    mock_db_session.execute.return_value = result_mock
+    
+    response = client.get("/api/v1/incidents/999")
+    
+    assert response.status_code == 404
@@ -0,0 +1,146 @@
+"""
+Tests for batched LLM moderation.
+"""
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.services.llm_batch import BatchModerator, parse_batch_verdicts
+
+
+def _moderator(complete, moderate_one=None, window=0.01, max_size=10) -> BatchModerator:
+    """Build a BatchModerator with a default single-call fallback."""
+    if moderate_one is None:
+        moderate_one = AsyncMock(return_value=(True, 0.5))
+    return BatchModerator(complete, moderate_one, window=window, max_size=max_size)
+
+
+def test_parse_batch_verdicts_skips_invalid_items():
+    """Malformed or out-of-range items are left out."""
+    content = json.dumps([
+        {"id": 0, "valid": True, "score": 0.9},
+        {"id": 1, "valid": "yes", "score": 0.9},
+        {"id": 2, "valid": False, "score": 1.5},
+        {"id": 7, "valid": True, "score": 0.4},
+        "garbage",
+    ])
+    
+    assert parse_batch_verdicts(content, 3) == {0: (True, 0.9)}
+
+
+def test_parse_batch_verdicts_rejects_non_array():
+    """A response that is not a JSON array is a parse failure."""
+    with pytest.raises(ValueError):
+        parse_batch_verdicts('{"valid": true, "score": 0.9}', 2)
+    with pytest.raises(ValueError):
+        parse_batch_verdicts("not json", 2)
+
+
+@pytest.mark.asyncio
+async def test_descriptions_in_window_share_one_request():
+    """Concurrent submissions are answered by a single batched request."""
+    async def complete(prompt, max_tokens):
+        items = json.loads(prompt.split("Signalements: ", 1)[1].split("\n", 1)[0])
+        return json.dumps([
+            {"id": item["id"], "valid": "feu" in item["description"].lower(), "score": 0.8}
+            for item in items
+        ])
+    
+    complete_mock = AsyncMock(side_effect=complete)
+    moderator = _moderator(complete_mock)
+    
+    results = await asyncio.gather(
+        moderator.submit("fire", "Feu de forêt"),
+        moderator.submit("fire", "Achetez maintenant"),
+        moderator.submit("fire", "Gros feu"),
+    )
+    
+    assert results == [(True, 0.8), (False, 0.8), (True, 0.8)]
+    assert complete_mock.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_max_size_flushes_without_waiting():
+    """A full batch is sent immediately instead of waiting for the window."""
+    complete = AsyncMock(return_value=json.dumps([
+        {"id": 0, "valid": True, "score": 0.7},
+        {"id": 1, "valid": True, "score": 0.7},
+    ]))
+    moderator = _moderator(complete, window=60, max_size=2)
+    
+    results = await asyncio.wait_for(
+        asyncio.gather(moderator.submit("fire", "a"), moderator.submit("fire", "b")),
+        timeout=1,
+    )
+    
+    assert results == [(True, 0.7), (True, 0.7)]
+
+
+@pytest.mark.asyncio
+async def test_parse_failure_falls_back_to_single_calls():
+    """An unparseable batch answer re-sends every item on its own."""
+    complete = AsyncMock(return_value="Désolé, je ne peux pas répondre.")
+    moderate_one = AsyncMock(side_effect=[(True, 0.6), (False, 0.2)])
+    moderator = _moderator(complete, moderate_one)
+    
+    results = await asyncio.gather(
+        moderator.submit("fire", "Flammes"),
+        moderator.submit("fire", "Spam"),
+    )
+    
+    assert results == [(True, 0.6), (False, 0.2)]
+    assert moderate_one.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_missing_item_falls_back_individually():
+    """Only the items missing from the batch answer are re-sent."""
+    complete = AsyncMock(return_value=json.dumps([{"id": 0, "valid": True, "score": 0.9}]))
+    moderate_one = AsyncMock(return_value=(False, 0.1))
+    moderator = _moderator(complete, moderate_one)
+    
+    results = await asyncio.gather(
+        moderator.submit("fire", "Incendie"),
+        moderator.submit("fire", "???"),
+    )
+    
+    assert results == [(True, 0.9), (False, 0.1)]
+    moderate_one.assert_awaited_once_with("fire", "???")
+
+
+@pytest.mark.asyncio
+async def test_single_fallback_error_reaches_caller():
+    """An error in the single-call fallback is raised to that caller only."""
+    complete = AsyncMock(return_value="[]")
+    moderate_one = AsyncMock(side_effect=[(True, 0.9), RuntimeError("boom")])
+    moderator = _moderator(complete, moderate_one)
+    
+    results = await asyncio.gather(
+        moderator.submit("fire", "a"),
+        moderator.submit("fire", "b"),
+        return_exceptions=True,
+    )
+    
+    assert results[0] == (True, 0.9)
+    assert isinstance(results[1], RuntimeError)
+
+
+@pytest.mark.asyncio
+async def test_request_error_fails_every_item_without_fallback():
+    """A failed batch request is raised to every caller, not retried item by item."""
+    complete = AsyncMock(side_effect=TimeoutError("provider timeout"))
+    moderate_one = AsyncMock(return_value=(True, 0.9))
+    moderator = _moderator(complete, moderate_one)
+    
+    results = await asyncio.gather(
+        moderator.submit("fire", "a"),
+        moderator.submit("fire", "b"),
+        moderator.submit("fire", "c"),
+        return_exceptions=True,
+    )
+    
+    assert all(isinstance(result, TimeoutError) for result in results)
+    complete.assert_awaited_once()
+    moderate_one.assert_not_called()
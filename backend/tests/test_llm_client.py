@@ -0,0 +1,112 @@
+"""
+Tests for the shared, rate-limited OpenAI client.
+"""
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services import llm_client
+from app.services.resilience import CircuitBreaker
+from app.services.verdict_cache import VerdictCache
+from app.services.llm_client import (
+    LimiterTimeout,
+    LLMClient,
+    TokenBucket,
+    get_llm_client,
+    verify_description,
+)
+
+
+def _completion(content: str) -> MagicMock:
+    """Build a mock ChatCompletion with the given message content."""
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+
+@pytest.fixture
+def shared_client(monkeypatch):
+    """Install a fresh shared LLMClient with a mocked OpenAI transport."""
+    monkeypatch.setattr("app.config.settings.openai_api_key", "test-key")
+    client = LLMClient()
+    client.client = MagicMock()
+    client.client.chat.completions.create = AsyncMock(
+        return_value=_completion('{"valid": true, "score": 0.9}')
+    )
+    monkeypatch.setattr(llm_client, "llm_client", client)
+    # Keep the verdict cache out of the way (memory only, no database)
+    cache = VerdictCache(max_size=0, ttl=0, session_factory=None)
+    monkeypatch.setattr(llm_client, "verdict_cache", cache)
+    monkeypatch.setattr(llm_client, "llm_breaker", CircuitBreaker("llm", 5, 30))
+    return client
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_times_out_past_deadline():
+    """A request that cannot be refilled before its deadline is rejected."""
+    bucket = TokenBucket(per_minute=60, burst_seconds=1)  # 1 token/s, capacity 1
+    await bucket.acquire(1, time.monotonic() + 1)
+    
+    with pytest.raises(LimiterTimeout):
+        await bucket.acquire(1, time.monotonic() + 0.1)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_waits_for_refill():
+    """A request queued within its deadline waits for the bucket to refill."""
+    bucket = TokenBucket(per_minute=600, burst_seconds=0.1)  # 10 tokens/s, capacity 1
+    await bucket.acquire(1, time.monotonic() + 1)
+    
+    started = time.monotonic()
+    await bucket.acquire(1, time.monotonic() + 1)
+    assert time.monotonic() - started >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_verify_description_reuses_shared_client(shared_client):
+    """Every call goes through the same process-wide client."""
+    with patch("openai.AsyncOpenAI") as client_factory:
+        assert await verify_description("fire", "Feu de forêt") == (True, 0.9)
+        assert await verify_description("fire", "Fumée") == (True, 0.9)
+        client_factory.assert_not_called()
+    
+    assert get_llm_client() is shared_client
+    assert shared_client.client.chat.completions.create.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_verify_description_limits_concurrency(shared_client):
+    """No more requests than the semaphore allows reach the provider at once."""
+    shared_client.semaphore = asyncio.Semaphore(2)
+    in_flight = 0
+    peak = 0
+    
+    async def slow_create(**kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return _completion('{"valid": true, "score": 0.8}')
+    
+    shared_client.client.chat.completions.create = AsyncMock(side_effect=slow_create)
+    
+    results = await asyncio.gather(
+        *(verify_description("fire", f"Incendie {i}") for i in range(6))
+    )
+    
+    assert results == [(True, 0.8)] * 6
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_verify_description_queue_timeout(shared_client, monkeypatch):
+    """A request that cannot be scheduled in time is reported, not sent."""
+    monkeypatch.setattr("app.config.settings.openai_queue_timeout", 0.01)
+    shared_client.semaphore = asyncio.Semaphore(0)
+    
+    with pytest.raises(LimiterTimeout):
+        await verify_description("fire", "Feu")
+    shared_client.client.chat.completions.create.assert_not_called()
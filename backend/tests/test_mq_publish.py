@@ -1,20 +1,22 @@
 """
 Tests for the RabbitMQ message publishing functionality.
 """
+import asyncio
 import json
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import msgspec
 import pytest
+from aio_pika.exceptions import ChannelInvalidStateError, DeliveryError, PublishError
 
-from app.core.events import IncidentValidated
-from app.services.mq import publish_event
+from app.core import geohash
+from app.core.events import IncidentValidated, encode_event, incident_validated_decoder
+from app.services.mq import EventPublisher, incident_routing_key
 
 
-@pytest.mark.asyncio
-async def test_incident_validated_serialization():
-    """Test that IncidentValidated events serialize correctly."""
-    # Create a test incident event
+def test_incident_validated_serialization():
+    """Test that IncidentValidated events serialize with their version tag."""
     now = datetime.utcnow()
     event = IncidentValidated(
         id=123,
@@ -24,13 +26,9 @@ async def test_incident_validated_serialization():
         severity=3
     )
     
-    # Serialize to JSON
-    json_data = event.model_dump_json()
-    
-    # Parse back to dict
-    parsed = json.loads(json_data)
+    parsed = json.loads(encode_event(event))
     
-    # Verify fields
+    assert parsed["event"] == "incident.validated.v1"
     assert parsed["id"] == 123
     assert parsed["lat"] == 48.8566
     assert parsed["lon"] == 2.3522
@@ -38,72 +36,217 @@ async def test_incident_validated_serialization():
     assert parsed["created_at"] == now.isoformat()
 
 
-@pytest.mark.asyncio
-async def test_msgspec_serialization():
-    """Test that msgspec serialization works correctly."""
-    # Create a test incident event
-    now = datetime.utcnow()
+def test_incident_validated_round_trip():
+    """Test that the cached decoder rebuilds the typed event."""
     event = IncidentValidated(
         id=123,
         lat=48.8566,
         lon=2.3522,
-        created_at=now,
+        created_at=datetime(2025, 6, 19, 1, 23, 45),
         severity=3
     )
     
-    # Serialize using msgspec
-    binary_data = event.model_dump_msgspec()
+    assert incident_validated_decoder.decode(encode_event(event)) == event
+    
+    # Untagged payloads from before versioning still decode
+    legacy = b'{"id": 1, "lat": 1.0, "lon": 2.0, "created_at": "2025-06-19T01:23:45"}'
+    assert incident_validated_decoder.decode(legacy).severity is None
+
+
+def _mock_connection() -> MagicMock:
+    """Build a mock robust connection whose channels accept publishes."""
+    connection = MagicMock()
+    connection.is_closed = False
+    connection.close = AsyncMock()
     
-    # Verify it's bytes
-    assert isinstance(binary_data, bytes)
+    def new_channel():
+        channel = MagicMock()
+        channel.is_closed = False
+        exchange = MagicMock()
+        exchange.publish = AsyncMock()
+        channel.declare_exchange = AsyncMock(return_value=exchange)
+        channel.get_exchange = AsyncMock(return_value=exchange)
+        return channel
     
-    # Verify we can parse it back
-    parsed = json.loads(binary_data)
-    assert parsed["id"] == 123
+    connection.channel = AsyncMock(side_effect=lambda **kwargs: new_channel())
+    return connection
 
 
-@pytest.mark.asyncio
-async def test_publish_event():
-    """Test that events are published to RabbitMQ."""
-    # Create a test incident event
-    event = IncidentValidated(
+def _event() -> IncidentValidated:
+    return IncidentValidated(
         id=123,
         lat=48.8566,
         lon=2.3522,
         created_at=datetime.utcnow(),
         severity=3
     )
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    """Retry immediately in tests."""
+    monkeypatch.setattr("app.services.mq.RETRY_BACKOFF", 0)
+
+
+@pytest.mark.asyncio
+async def test_publish_event():
+    """Test that events are published to RabbitMQ with confirms."""
+    mock_connection = _mock_connection()
+    publisher = EventPublisher("amqp://test", pool_size=1)
     
-    # Mock the RabbitMQ connection and channel
-    mock_connection = AsyncMock()
-    mock_channel = AsyncMock()
-    mock_queue = AsyncMock()
-    mock_exchange = AsyncMock()
-    
-    # Configure mocks
-    mock_connection.channel.return_value = mock_channel
-    mock_channel.declare_queue.return_value = mock_queue
-    mock_channel.default_exchange = mock_exchange
-    
-    # Patch the get_connection function
-    with patch("app.services.mq.get_connection", return_value=mock_connection):
-        # Call the function under test
-        await publish_event(event)
-        
-        # Verify the exchange.publish was called
-        mock_exchange.publish.assert_called_once()
+    with patch("app.services.mq.aio_pika.connect_robust", AsyncMock(return_value=mock_connection)):
+        await publisher.publish(_event())
+    
+    mock_connection.channel.assert_called_once_with(publisher_confirms=True, on_return_raises=True)
+    exchange = publisher._exchanges[0]
+    exchange.publish.assert_called_once()
+    
+    # Extract the Message object from the call
+    call_args = exchange.publish.call_args
+    message = call_args[0][0]
+    routing_key = call_args[1]["routing_key"]
+    
+    # Verify message content
+    message_body = json.loads(message.body.decode())
+    assert message_body["id"] == 123
+    assert message_body["lat"] == 48.8566
+    assert message_body["lon"] == 2.3522
+    assert message_body["severity"] == 3
+    
+    # Verify regional routing key: incident.validated.<geohash4>.<severity>
+    assert routing_key == "incident.validated.u09t.3"
+    # Unroutable messages come back instead of being confirmed
+    assert call_args[1]["mandatory"] is True
+
+
+@pytest.mark.asyncio
+async def test_publisher_reuses_channels_and_topology():
+    """Repeated publishes share the pooled channels and declare the queue once."""
+    mock_connection = _mock_connection()
+    publisher = EventPublisher("amqp://test", pool_size=2)
+    connect = AsyncMock(return_value=mock_connection)
+    
+    with patch("app.services.mq.aio_pika.connect_robust", connect):
+        # Without a partition key, messages are spread round-robin
+        for _ in range(5):
+            await publisher.publish_body(encode_event(_event()), "incident.validated.u09t.3")
+    
+    connect.assert_called_once()
+    assert mock_connection.channel.call_count == 2
+    declares = sum(channel.declare_exchange.call_count for channel in publisher._channels)
+    assert declares == 1
+    publishes = [exchange.publish.call_count for exchange in publisher._exchanges]
+    assert publishes == [3, 2]
+
+
+@pytest.mark.asyncio
+async def test_publisher_replaces_closed_channel(no_backoff):
+    """A publish failing on a closed channel is retried on a fresh one."""
+    mock_connection = _mock_connection()
+    publisher = EventPublisher("amqp://test", pool_size=1)
+    
+    with patch("app.services.mq.aio_pika.connect_robust", AsyncMock(return_value=mock_connection)):
+        await publisher.connect()
+        broken = publisher._channels[0]
         
-        # Extract the Message object from the call
-        call_args = mock_exchange.publish.call_args
-        message = call_args[0][0]
-        routing_key = call_args[1]["routing_key"]
+        def close(*args, **kwargs):
+            broken.is_closed = True
+            raise ChannelInvalidStateError("closed")
         
-        # Verify message content
-        message_body = json.loads(message.body.decode())
-        assert message_body["id"] == 123
-        assert message_body["lat"] == 48.8566
-        assert message_body["lon"] == 2.3522
-        assert message_body["severity"] == 3
+        publisher._exchanges[0].publish.side_effect = close
+        await publisher.publish(_event())
+    
+    assert mock_connection.channel.call_count == 2
+    assert publisher._channels[0] is not broken
+    publisher._exchanges[0].publish.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_publisher_retries_nacked_message(no_backoff):
+    """A nacked message is published again until the broker acks it."""
+    mock_connection = _mock_connection()
+    publisher = EventPublisher("amqp://test", pool_size=1, max_retries=2)
+    
+    with patch("app.services.mq.aio_pika.connect_robust", AsyncMock(return_value=mock_connection)):
+        await publisher.connect()
+        publish = publisher._exchanges[0].publish
+        publish.side_effect = [DeliveryError(None, None), None]
+        await publisher.publish(_event())
+    
+    assert publish.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_unroutable_message_fails_without_retry(no_backoff):
+    """A message returned by the broker (no queue bound) is reported as failed."""
+    mock_connection = _mock_connection()
+    publisher = EventPublisher("amqp://test", pool_size=1, max_retries=2)
+    
+    with patch("app.services.mq.aio_pika.connect_robust", AsyncMock(return_value=mock_connection)):
+        await publisher.connect()
+        publish = publisher._exchanges[0].publish
+        # Returned message (PublishError wraps the Basic.Return frame)
+        publish.side_effect = PublishError.__new__(PublishError)
+        results = await publisher.publish_many([(encode_event(_event()), "incident.validated.u09t.3", "123")])
+    
+    assert isinstance(results[0], PublishError)
+    assert publish.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_publish_many_pipelines_confirms(no_backoff):
+    """All messages of a batch wait for their confirm at the same time."""
+    mock_connection = _mock_connection()
+    publisher = EventPublisher("amqp://test", pool_size=1, max_retries=0)
+    release = asyncio.Event()
+    waiting = 0
+    
+    async def confirm_later(message, routing_key, mandatory, timeout):
+        nonlocal waiting
+        waiting += 1
+        await release.wait()
+        if json.loads(message.body)["id"] == 3:
+            raise DeliveryError(None, None)
+    
+    with patch("app.services.mq.aio_pika.connect_robust", AsyncMock(return_value=mock_connection)):
+        await publisher.connect()
+        publisher._exchanges[0].publish.side_effect = confirm_later
         
-        # Verify routing key
-        assert routing_key == "incident.validated"
+        messages = [
+            (encode_event(msgspec.structs.replace(_event(), id=i)), "incident.validated.u09t.3", str(i))
+            for i in range(5)
+        ]
+        batch = asyncio.create_task(publisher.publish_many(messages))
+        await asyncio.sleep(0.01)
+        # Every message was sent before any confirm arrived
+        assert waiting == 5
+        release.set()
+        results = await batch
+    
+    assert [result is None for result in results] == [True, True, True, False, True]
+    assert isinstance(results[3], DeliveryError)
+
+
+@pytest.mark.asyncio
+async def test_events_of_an_incident_share_a_channel():
+    """The partition key pins an incident to one channel and is sent as a header."""
+    mock_connection = _mock_connection()
+    publisher = EventPublisher("amqp://test", pool_size=4)
+    
+    with patch("app.services.mq.aio_pika.connect_robust", AsyncMock(return_value=mock_connection)):
+        await publisher.connect()
+        for _ in range(3):
+            await publisher.publish(_event())
+    
+    used = [exchange for exchange in publisher._exchanges if exchange.publish.call_count]
+    assert len(used) == 1
+    message = used[0].publish.call_args[0][0]
+    assert message.headers == {"x-incident-id": str(_event().id)}
+
+
+def test_incident_routing_key():
+    """Routing keys carry the 4-character geohash and the severity."""
+    assert geohash.encode(48.8566, 2.3522, 4) == "u09t"
+    assert geohash.encode(-33.8688, 151.2093, 6) == "r3gx2f"
+    assert incident_routing_key(_event()) == "incident.validated.u09t.3"
+    assert incident_routing_key(msgspec.structs.replace(_event(), severity=None)).endswith(".0")
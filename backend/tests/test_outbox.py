@@ -0,0 +1,216 @@
+"""
+Tests for the transactional event outbox and its relay.
+"""
+import json
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from aio_pika.exceptions import DeliveryError, PublishError
+from pamqp.commands import Basic
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.events import IncidentValidated
+from app.core.models import EventOutbox, EventOutboxDead
+from app.services.outbox import OutboxRelay, add_incident_validated
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    """In-memory SQLite database holding only the outbox tables."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(EventOutbox.__table__.create)
+        await conn.run_sync(EventOutboxDead.__table__.create)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def _stage(session_factory, *ids: int) -> None:
+    """Commit one IncidentValidated outbox row per id."""
+    async with session_factory() as db:
+        for incident_id in ids:
+            event = IncidentValidated(
+                id=incident_id, lat=48.8, lon=2.3, created_at=datetime(2025, 1, 1), severity=3
+            )
+            await add_incident_validated(db, event)
+        await db.commit()
+
+
+async def _rows(session_factory):
+    async with session_factory() as db:
+        return (await db.execute(select(EventOutbox).order_by(EventOutbox.id))).scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_transaction_leaves_no_event(session_factory):
+    """An event only exists if the transaction that staged it committed."""
+    async with session_factory() as db:
+        event = IncidentValidated(id=1, lat=48.8, lon=2.3, created_at=datetime(2025, 1, 1))
+        await add_incident_validated(db, event)
+        await db.rollback()
+
+    assert await _rows(session_factory) == []
+
+
+@pytest.mark.asyncio
+async def test_relay_publishes_batch_and_deletes_confirmed(session_factory):
+    """Confirmed events are removed; the payload is the serialized event."""
+    await _stage(session_factory, 1, 2, 3)
+    publisher = AsyncMock()
+    publisher.publish_many = AsyncMock(return_value=[None, None, None])
+    relay = OutboxRelay(publisher, session_factory=session_factory, batch_size=10)
+
+    assert await relay.drain_once() == 3
+
+    messages = list(publisher.publish_many.call_args[0][0])
+    assert [json.loads(body)["id"] for body, _, _ in messages] == [1, 2, 3]
+    assert {routing_key for _, routing_key, _ in messages} == {"incident.validated.u09t.3"}
+    # The incident id is the partition key
+    assert [partition_key for _, _, partition_key in messages] == ["1", "2", "3"]
+    assert await _rows(session_factory) == []
+
+
+@pytest.mark.asyncio
+async def test_relay_keeps_unconfirmed_events(session_factory):
+    """Nacked events stay in the outbox with their attempt count bumped."""
+    await _stage(session_factory, 1, 2)
+    publisher = AsyncMock()
+    publisher.publish_many = AsyncMock(return_value=[None, DeliveryError(None, None)])
+    relay = OutboxRelay(publisher, session_factory=session_factory, batch_size=10)
+
+    assert await relay.drain_once() == 1
+
+    rows = await _rows(session_factory)
+    assert [(row.payload["id"], row.attempts) for row in rows] == [(2, 1)]
+
+
+@pytest.mark.asyncio
+async def test_relay_respects_batch_size(session_factory):
+    """Each drain publishes at most batch_size events, oldest first."""
+    await _stage(session_factory, 1, 2, 3)
+    publisher = AsyncMock()
+    publisher.publish_many = AsyncMock(side_effect=lambda messages: [None for _ in messages])
+    relay = OutboxRelay(publisher, session_factory=session_factory, batch_size=2)
+
+    assert await relay.drain_once() == 2
+    assert [row.payload["id"] for row in await _rows(session_factory)] == [3]
+
+
+@pytest.mark.asyncio
+async def test_batch_is_claimed_before_publishing(session_factory):
+    """The batch is leased in its own transaction; other relays skip it while it is published."""
+    await _stage(session_factory, 1, 2)
+    other = OutboxRelay(AsyncMock(), session_factory=session_factory, batch_size=10)
+    seen_by_other = []
+
+    async def publish_many(messages):
+        messages = list(messages)
+        # Runs while the first relay is waiting for the broker
+        seen_by_other.append(await other.drain_once())
+        leases = [row.next_attempt_at for row in await _rows(session_factory)]
+        assert all(lease > datetime.utcnow() for lease in leases)
+        return [None for _ in messages]
+
+    publisher = AsyncMock()
+    publisher.publish_many = AsyncMock(side_effect=publish_many)
+    relay = OutboxRelay(publisher, session_factory=session_factory, batch_size=10, claim_timeout=60)
+
+    assert await relay.drain_once() == 2
+    assert seen_by_other == [0]
+    other.publisher.publish_many.assert_not_called()
+    assert await _rows(session_factory) == []
+
+
+@pytest.mark.asyncio
+async def test_expired_claim_is_published_again(session_factory):
+    """Rows claimed by a relay that died are picked up once the lease expires."""
+    await _stage(session_factory, 1)
+    async with session_factory() as db:
+        await db.execute(update(EventOutbox).values(next_attempt_at=datetime.utcnow() + timedelta(seconds=60)))
+        await db.commit()
+    publisher = AsyncMock()
+    publisher.publish_many = AsyncMock(side_effect=lambda messages: [None for _ in messages])
+    relay = OutboxRelay(publisher, session_factory=session_factory, batch_size=10)
+
+    assert await relay.drain_once() == 0
+
+    async with session_factory() as db:
+        await db.execute(update(EventOutbox).values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1)))
+        await db.commit()
+    assert await relay.drain_once() == 1
+
+
+def _unroutable() -> PublishError:
+    """Error raised for a mandatory message the broker returned."""
+    frame = Basic.Return(reply_code=312, reply_text="NO_ROUTE", exchange="incident.events")
+    return PublishError(MagicMock(delivery=frame), frame)
+
+
+def _publish_failing_for(*failing_ids: int, error=_unroutable):
+    """publish_many side effect failing the events of the given incidents."""
+    def publish_many(messages):
+        return [
+            error() if json.loads(body)["id"] in failing_ids else None
+            for body, _, _ in messages
+        ]
+    return publish_many
+
+
+@pytest.mark.asyncio
+async def test_failing_events_do_not_block_newer_ones(session_factory):
+    """Rows that keep failing back off, so the events behind them are still published."""
+    await _stage(session_factory, 1, 2, 3)
+    publisher = AsyncMock()
+    publisher.publish_many = AsyncMock(side_effect=_publish_failing_for(1, 2))
+    relay = OutboxRelay(publisher, session_factory=session_factory, batch_size=2, retry_backoff=60)
+
+    assert await relay.drain_once() == 0
+    assert await relay.drain_once() == 1
+
+    rows = await _rows(session_factory)
+    assert [(row.payload["id"], row.attempts) for row in rows] == [(1, 1), (2, 1)]
+    assert all(row.next_attempt_at > datetime.utcnow() + timedelta(seconds=50) for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_unroutable_event_is_parked_after_max_attempts(session_factory):
+    """An event still returned by the broker after the last attempt moves to event_outbox_dead."""
+    await _stage(session_factory, 1)
+    publisher = AsyncMock()
+    publisher.publish_many = AsyncMock(side_effect=_publish_failing_for(1))
+    relay = OutboxRelay(
+        publisher, session_factory=session_factory, batch_size=10, retry_backoff=0, max_attempts=2
+    )
+
+    assert await relay.drain_once() == 0
+    assert [row.attempts for row in await _rows(session_factory)] == [1]
+    assert await relay.drain_once() == 0
+
+    assert await _rows(session_factory) == []
+    async with session_factory() as db:
+        dead = (await db.execute(select(EventOutboxDead))).scalars().all()
+    assert [(row.payload["id"], row.attempts, row.routing_key) for row in dead] == [
+        (1, 2, "incident.validated.u09t.3")
+    ]
+    assert "NO_ROUTE" in dead[0].last_error
+
+
+@pytest.mark.asyncio
+async def test_broker_failures_are_retried_past_max_attempts(session_factory):
+    """Only unroutable events are parked; a nacked event stays in the outbox."""
+    await _stage(session_factory, 1)
+    publisher = AsyncMock()
+    publisher.publish_many = AsyncMock(
+        side_effect=_publish_failing_for(1, error=lambda: DeliveryError(None, None))
+    )
+    relay = OutboxRelay(
+        publisher, session_factory=session_factory, batch_size=10, retry_backoff=0, max_attempts=2
+    )
+
+    for _ in range(3):
+        await relay.drain_once()
+
+    assert [row.attempts for row in await _rows(session_factory)] == [3]
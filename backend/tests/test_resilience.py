@@ -0,0 +1,134 @@
+"""
+Tests for circuit breakers, request deadlines and the pending_retry outcome.
+"""
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.api.v1.endpoints import alerts
+from app.schemas.alert import AlertIn
+from app.services.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceeded,
+    DependencyUnavailable,
+    call_timeout,
+    deadline_scope,
+)
+from app.services.vision_client import FireDetection
+
+
+async def _fail() -> None:
+    raise RuntimeError("boom")
+
+
+async def _ok() -> str:
+    return "ok"
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_after_threshold():
+    """Consecutive failures open the circuit and later calls fail fast."""
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+
+    for _ in range(2):
+        with pytest.raises(DependencyUnavailable):
+            await breaker.call(_fail)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    func = AsyncMock()
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(func)
+    func.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_breaker_half_open_trial_closes_circuit():
+    """After the reset timeout a successful trial call closes the circuit."""
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+    with pytest.raises(DependencyUnavailable):
+        await breaker.call(_fail)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    assert await breaker.call(_ok) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_breaker_ignored_errors_do_not_count():
+    """Errors listed in `ignore` are re-raised untouched and not counted."""
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+
+    async def bad_answer() -> None:
+        raise ValueError("not json")
+
+    with pytest.raises(ValueError):
+        await breaker.call(bad_answer, ignore=(ValueError,))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_call_timeout():
+    """Per-call timeouts never exceed what is left of the request budget."""
+    assert call_timeout(10.0) == 10.0
+    with deadline_scope(0.5):
+        assert call_timeout(10.0) <= 0.5
+        assert call_timeout(0.1) == 0.1
+    with deadline_scope(0):
+        with pytest.raises(DeadlineExceeded):
+            call_timeout(10.0)
+
+
+@pytest.mark.asyncio
+async def test_slow_call_raises_deadline_exceeded():
+    """A call outliving the request deadline counts as a failure."""
+    breaker = CircuitBreaker("test", failure_threshold=5, reset_timeout=60)
+
+    async def slow() -> None:
+        await asyncio.sleep(1)
+
+    with deadline_scope(0.05):
+        with pytest.raises(DeadlineExceeded):
+            await breaker.call(slow, cap=10.0)
+    assert breaker.failures == 1
+
+
+@pytest.mark.asyncio
+async def test_validate_alert_pending_retry_when_llm_down(monkeypatch):
+    """An unavailable LLM leaves the incident pending_retry, keeping vision results."""
+    boxes = [{"class": 0, "confidence": 0.8, "x1": 1, "y1": 2, "x2": 3, "y2": 4}]
+    monkeypatch.setattr(
+        alerts, "analyze_image", AsyncMock(return_value=FireDetection(True, 0.8, boxes))
+    )
+    monkeypatch.setattr(
+        alerts, "verify_description", AsyncMock(side_effect=CircuitOpenError("llm"))
+    )
+    alert = AlertIn(type="fire", severity=4, description="Feu", lat=48.8, lon=2.3)
+
+    state, confidence, confidence_text, source, detected = await alerts._validate_alert(
+        alert, "http://minio/x.jpg"
+    )
+
+    assert state == "pending_retry"
+    assert confidence == 0.8
+    assert confidence_text is None
+    assert source is None
+    assert detected == boxes
+
+
+@pytest.mark.asyncio
+async def test_validate_alert_pending_retry_when_vision_down(monkeypatch):
+    """An unavailable vision service leaves the incident pending_retry."""
+    monkeypatch.setattr(
+        alerts, "analyze_image", AsyncMock(side_effect=DeadlineExceeded("vision"))
+    )
+    verify = AsyncMock()
+    monkeypatch.setattr(alerts, "verify_description", verify)
+    alert = AlertIn(type="fire", severity=4, description="Feu", lat=48.8, lon=2.3)
+
+    state, *_ = await alerts._validate_alert(alert, "http://minio/x.jpg")
+
+    assert state == "pending_retry"
+    verify.assert_not_called()
@@ -0,0 +1,78 @@
+"""
+Tests for the re-validation of pending_retry incidents.
+"""
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.api.v1.endpoints import alerts
+from app.services.revalidation import PendingRetryRevalidator
+
+
+def _incident(incident_id: int, attempts: int = 0) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=incident_id,
+        type="fire",
+        severity=4,
+        description="Feu",
+        image_url="http://minio/x.jpg",
+        validation_attempts=attempts,
+        get_lat_lon=lambda: (48.8, 2.3),
+    )
+
+
+def test_retry_delay_doubles_up_to_the_cap():
+    """Each attempt doubles the wait, within backoff_max."""
+    revalidator = PendingRetryRevalidator(AsyncMock(), backoff=60, backoff_max=300)
+
+    assert [revalidator._retry_delay(attempts) for attempts in range(1, 5)] == [60, 120, 240, 300]
+
+
+@pytest.mark.asyncio
+async def test_still_unavailable_incidents_are_rescheduled():
+    """Incidents still pending_retry (or failing) back off; resolved ones do not."""
+    incidents = [_incident(1), _incident(2), _incident(3)]
+    revalidate = AsyncMock(side_effect=["validated_fire", "pending_retry", RuntimeError("boom")])
+    revalidator = PendingRetryRevalidator(revalidate)
+    revalidator._claim = AsyncMock(return_value=incidents)
+    revalidator._reschedule = AsyncMock()
+
+    assert await revalidator.revalidate_once() == 3
+
+    assert [call.args[0].id for call in revalidator._reschedule.await_args_list] == [2, 3]
+
+
+@pytest.mark.asyncio
+async def test_revalidate_incident_records_the_new_outcome(monkeypatch):
+    """A resolved incident is updated only if it is still pending_retry, and its event relayed."""
+    validation = ("validated_fire", 0.9, 0.8, "llm", [])
+    monkeypatch.setattr(alerts, "_validate_alert", AsyncMock(return_value=validation))
+    record = AsyncMock(return_value=(MagicMock(), {}))
+    monkeypatch.setattr(alerts, "_record_validation", record)
+    db = AsyncMock()
+    session = MagicMock()
+    session.return_value.__aenter__ = AsyncMock(return_value=db)
+    session.return_value.__aexit__ = AsyncMock(return_value=False)
+    monkeypatch.setattr(alerts, "AsyncSessionLocal", session)
+    relay = MagicMock()
+    monkeypatch.setattr(alerts, "outbox_relay", relay)
+
+    assert await alerts.revalidate_incident(_incident(5)) == "validated_fire"
+
+    record.assert_awaited_once_with(db, 5, validation, from_state="pending_retry")
+    db.commit.assert_awaited_once()
+    relay.wake.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_revalidate_incident_leaves_pending_retry_untouched(monkeypatch):
+    """Nothing is written while a dependency is still unavailable."""
+    monkeypatch.setattr(
+        alerts, "_validate_alert", AsyncMock(return_value=("pending_retry", None, None, None, None))
+    )
+    record = AsyncMock()
+    monkeypatch.setattr(alerts, "_record_validation", record)
+
+    assert await alerts.revalidate_incident(_incident(5)) == "pending_retry"
+    record.assert_not_called()
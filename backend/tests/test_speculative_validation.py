@@ -0,0 +1,79 @@
+"""
+Tests for speculative (concurrent) vision and LLM validation.
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.api.v1.endpoints import alerts
+from app.schemas.alert import AlertIn
+from app.services.text_classifier import TextClassifier
+from app.services.vision_client import FireDetection
+
+
+def _alert(severity: int) -> AlertIn:
+    return AlertIn(type="fire", severity=severity, description="Feu", lat=48.8, lon=2.3)
+
+
+@pytest.fixture
+def slow_services(monkeypatch):
+    """Vision and LLM stubs that each take 0.1s and record what happened."""
+    calls = {"llm_started": 0, "llm_cancelled": 0, "is_fire": True}
+
+    async def analyze_image(image_url: str) -> FireDetection:
+        await asyncio.sleep(0.1)
+        if calls["is_fire"]:
+            return FireDetection(True, 0.9, [])
+        return FireDetection(False, 0.1, [])
+
+    async def verify_description(type_: str, description: str):
+        calls["llm_started"] += 1
+        try:
+            await asyncio.sleep(0.1)
+        except asyncio.CancelledError:
+            calls["llm_cancelled"] += 1
+            raise
+        return True, 0.8
+
+    monkeypatch.setattr(alerts, "analyze_image", analyze_image)
+    monkeypatch.setattr(alerts, "verify_description", verify_description)
+    # No local model: every description is escalated to the LLM
+    monkeypatch.setattr(alerts, "text_classifier", TextClassifier())
+    monkeypatch.setattr("app.config.settings.speculative_min_severity", 4)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_speculative_runs_checks_concurrently(slow_services):
+    """High-severity alerts pay max(vision, LLM) latency instead of the sum."""
+    started = time.monotonic()
+    state, confidence, confidence_text, source, _ = await alerts._validate_alert(_alert(5), "x.jpg")
+    elapsed = time.monotonic() - started
+
+    assert (state, confidence, confidence_text) == ("validated_fire", 0.9, 0.8)
+    assert source == "llm"
+    assert elapsed < 0.18
+
+
+@pytest.mark.asyncio
+async def test_speculative_cancels_llm_without_fire(slow_services):
+    """The speculative LLM call is cancelled when vision finds no fire."""
+    slow_services["is_fire"] = False
+
+    state, *_ = await alerts._validate_alert(_alert(4), "x.jpg")
+
+    assert state == "rejected_no_fire"
+    assert slow_services["llm_started"] == 1
+    assert slow_services["llm_cancelled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_low_severity_stays_sequential(slow_services):
+    """Below the threshold the LLM is never called when there is no fire."""
+    slow_services["is_fire"] = False
+
+    state, *_ = await alerts._validate_alert(_alert(2), "x.jpg")
+
+    assert state == "rejected_no_fire"
+    assert slow_services["llm_started"] == 0
@@ -0,0 +1,75 @@
+"""
+Tests for the local description pre-classifier.
+"""
+import time
+
+import pytest
+
+from app.services.text_classifier import TextClassifier, extract_features
+
+VALID = [
+    "incendie en forêt", "grosse fumée noire", "des flammes près de la route",
+    "feu de broussailles", "incendie qui se propage", "fumée et flammes visibles",
+    "feu de forêt important", "les flammes atteignent les arbres",
+]
+SPAM = [
+    "achetez maintenant promo", "gagnez un iphone gratuit", "cliquez sur ce lien",
+    "meilleur casino en ligne", "promo crypto gratuite", "test test test",
+    "abonnez vous à ma chaine", "lien gratuit cliquez ici",
+]
+
+
+@pytest.fixture(scope="module")
+def trained() -> TextClassifier:
+    """A classifier trained on a small labelled set."""
+    model = TextClassifier(low=0.2, high=0.8)
+    samples = [("fire", text, True) for text in VALID] + [("fire", text, False) for text in SPAM]
+    model.fit(samples, epochs=30, learning_rate=2.0)
+    return model
+
+
+def test_features_are_stable_and_normalised():
+    """Hashing is deterministic and the vector has unit norm."""
+    features = extract_features("fire", "Feu  de FORÊT")
+    assert features == extract_features("fire", "feu de forêt")
+    assert sum(v * v for v in features.values()) == pytest.approx(1.0)
+
+
+def test_confident_predictions_are_decided_locally(trained):
+    """Obvious valid and spam descriptions never reach the LLM."""
+    assert trained.classify("fire", "incendie avec des flammes")[0] is True
+    assert trained.classify("fire", "gagnez un casino gratuit")[0] is False
+
+
+def test_uncertain_predictions_are_escalated(trained):
+    """Scores inside the uncertainty band return None (escalate)."""
+    trained_band = TextClassifier(trained.weights, trained.bias, low=0.0, high=1.0)
+    assert trained_band.classify("fire", "incendie avec des flammes") is None
+
+
+def test_disabled_classifier_escalates_everything(tmp_path):
+    """Without a model file every description is escalated."""
+    model = TextClassifier()
+    assert model.load(str(tmp_path / "missing.json")) is False
+    assert model.classify("fire", "incendie") is None
+
+
+def test_save_and_load_round_trip(trained, tmp_path):
+    """A saved model predicts exactly like the original."""
+    path = str(tmp_path / "model.json")
+    trained.save(path)
+    
+    loaded = TextClassifier()
+    assert loaded.load(path) is True
+    assert loaded.predict_proba("fire", "fumée noire") == pytest.approx(
+        trained.predict_proba("fire", "fumée noire")
+    )
+
+
+def test_prediction_is_fast(trained):
+    """Scoring a typical description stays well under a millisecond."""
+    description = "Je vois une grosse fumée et des flammes derrière la colline"
+    started = time.perf_counter()
+    for _ in range(1000):
+        trained.predict_proba("fire", description)
+    assert (time.perf_counter() - started) / 1000 < 0.001
@@ -0,0 +1,115 @@
+"""
+Tests for the two-tier LLM verdict cache.
+"""
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.models import LLMVerdict
+from app.services import llm_client
+from app.services.resilience import CircuitBreaker, DependencyUnavailable
+from app.services.verdict_cache import VerdictCache, cache_key, normalize
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    """In-memory SQLite database holding only the llm_verdicts table."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(LLMVerdict.__table__.create)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+def test_normalize_collapses_trivial_variations():
+    """Case, surrounding and repeated whitespace do not change the key."""
+    assert normalize("  Feu   de\tFORÊT ") == "feu de forêt"
+    assert normalize(None) == normalize("") == ""
+    assert cache_key("fire", "Feu de forêt", "gpt-4o-mini", "1") == cache_key(
+        "FIRE", " feu  de forêt", "gpt-4o-mini", "1"
+    )
+
+
+def test_cache_key_includes_model_and_prompt_version():
+    """A new model or prompt version never reuses an old verdict."""
+    key = cache_key("fire", "Feu", "gpt-4o-mini", "1")
+    assert key != cache_key("fire", "Feu", "gpt-4o", "1")
+    assert key != cache_key("fire", "Feu", "gpt-4o-mini", "2")
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_evicts_least_recently_used(session_factory):
+    """The in-process tier is bounded and evicts the oldest entry."""
+    cache = VerdictCache(max_size=2, ttl=60, session_factory=session_factory)
+    await cache.set("a", (True, 0.9))
+    await cache.set("b", (True, 0.8))
+    assert cache._get_memory("a") == (True, 0.9)  # "a" becomes most recent
+    await cache.set("c", (False, 0.1))
+    
+    assert cache._get_memory("b") is None
+    assert cache._get_memory("a") == (True, 0.9)
+    assert cache._get_memory("c") == (False, 0.1)
+
+
+@pytest.mark.asyncio
+async def test_database_tier_survives_memory_loss(session_factory):
+    """A verdict written to the database is found after the LRU is cleared."""
+    cache = VerdictCache(max_size=10, ttl=60, session_factory=session_factory)
+    await cache.set("key", (True, 0.75))
+    cache.clear()
+    
+    assert await cache.get("key") == (True, 0.75)
+    # Promoted back to memory
+    assert cache._get_memory("key") == (True, 0.75)
+
+
+@pytest.mark.asyncio
+async def test_database_tier_ignores_and_purges_expired(session_factory):
+    """Expired rows are treated as misses and removed by purge_expired."""
+    async with session_factory() as session:
+        session.add(
+            LLMVerdict(
+                key="old",
+                valid=True,
+                score=0.5,
+                expires_at=datetime.utcnow() - timedelta(seconds=1),
+            )
+        )
+        await session.commit()
+    
+    cache = VerdictCache(max_size=10, ttl=60, session_factory=session_factory)
+    assert await cache.get("old") is None
+    assert await cache.purge_expired() == 1
+
+
+@pytest.mark.asyncio
+async def test_verify_description_uses_cache(session_factory, monkeypatch):
+    """Repeated descriptions are answered from the cache without calling the LLM."""
+    cache = VerdictCache(max_size=10, ttl=60, session_factory=session_factory)
+    monkeypatch.setattr(llm_client, "verdict_cache", cache)
+    client = AsyncMock()
+    client.complete.return_value = '{"valid": true, "score": 0.9}'
+    monkeypatch.setattr(llm_client, "get_llm_client", lambda: client)
+    
+    assert await llm_client.verify_description("fire", "Feu de forêt") == (True, 0.9)
+    assert await llm_client.verify_description("fire", "feu de  forêt") == (True, 0.9)
+    assert client.complete.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_verify_description_does_not_cache_failures(session_factory, monkeypatch):
+    """Errors are not cached, so the next call reaches the LLM again."""
+    cache = VerdictCache(max_size=10, ttl=60, session_factory=session_factory)
+    monkeypatch.setattr(llm_client, "verdict_cache", cache)
+    client = AsyncMock()
+    client.complete.side_effect = [RuntimeError("429"), '{"valid": true, "score": 0.6}']
+    monkeypatch.setattr(llm_client, "get_llm_client", lambda: client)
+    
+    monkeypatch.setattr(llm_client, "llm_breaker", CircuitBreaker("llm", 5, 30))
+    
+    with pytest.raises(DependencyUnavailable):
+        await llm_client.verify_description("fire", "Fumée")
+    assert await llm_client.verify_description("fire", "Fumée") == (True, 0.6)
@@ -2,6 +2,7 @@ import json
 from io import BytesIO
 from pathlib import Path
 from typing import Any, Dict
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 import respx
@@ -9,6 +10,8 @@ from fastapi import status
 from httpx import AsyncClient
 
 from app.config import settings
+from app.services.resilience import CircuitBreaker, DependencyUnavailable
+from app.services.vision_client import analyze_image
 
 
 @pytest.mark.asyncio
@@ -188,3 +191,60 @@ async def test_alert_with_vision_service_failure(client: AsyncClient, monkeypatc
         data = response.json()
         assert data["state"] == "rejected"
         assert data["confidence"] == 0.0
+
+
+def _mock_vision_session(status_code: int, payload: Dict[str, Any]) -> MagicMock:
+    """Build a mock aiohttp.ClientSession returning the given response."""
+    response = MagicMock()
+    response.status = status_code
+    response.json = AsyncMock(return_value=payload)
+    response.text = AsyncMock(return_value=json.dumps(payload))
+    
+    post_context = MagicMock()
+    post_context.__aenter__ = AsyncMock(return_value=response)
+    post_context.__aexit__ = AsyncMock(return_value=None)
+    
+    session = MagicMock()
+    session.post.return_value = post_context
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=None)
+    return session
+
+
+@pytest.mark.asyncio
+async def test_analyze_image_keeps_boxes():
+    """Test that analyze_image returns the detection boxes from the vision service."""
+    payload = {
+        "is_fire": True,
+        "confidence": 0.91,
+        "boxes": [
+            {"class": 0, "confidence": 0.91, "x1": 10, "y1": 20, "x2": 30, "y2": 40, "extra": "x"}
+        ],
+    }
+    
+    with patch(
+        "app.services.vision_client.aiohttp.ClientSession",
+        return_value=_mock_vision_session(200, payload),
+    ):
+        detection = await analyze_image("http://minio:9000/citizen-reports/test.jpg")
+    
+    assert detection.is_fire is True
+    assert detection.confidence == 0.91
+    # Unknown keys are dropped before persisting
+    assert detection.boxes == [
+        {"class": 0, "confidence": 0.91, "x1": 10, "y1": 20, "x2": 30, "y2": 40}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_analyze_image_error_raises_unavailable(monkeypatch):
+    """Test that a vision service error is reported instead of a silent rejection."""
+    monkeypatch.setattr(
+        "app.services.vision_client.vision_breaker", CircuitBreaker("vision", 5, 30)
+    )
+    with patch(
+        "app.services.vision_client.aiohttp.ClientSession",
+        return_value=_mock_vision_session(500, {"error": "boom"}),
+    ):
+        with pytest.raises(DependencyUnavailable):
+            await analyze_image("http://minio:9000/citizen-reports/test.jpg")
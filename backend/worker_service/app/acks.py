@@ -0,0 +1,155 @@
+"""
+Ordered, batched acknowledgements for concurrently processed deliveries.
+
+Messages finish out of order when several are processed at once, but a
+multiple-ack (basic.ack with multiple=True) covers every earlier delivery
+tag on the channel. The tracker therefore only acknowledges the contiguous
+prefix of finished deliveries, once per batch, and rejects failed ones
+individually before acknowledging past them.
+"""
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from aio_pika.abc import AbstractIncomingMessage
+from structlog import get_logger
+
+logger = get_logger("acks")
+
+_PENDING = 0
+_ACK = 1
+_REJECT = 2
+
+
+class _ChannelState:
+    """Deliveries of one channel, in delivery-tag order."""
+
+    def __init__(self) -> None:
+        self.outcomes: "OrderedDict[int, int]" = OrderedDict()
+        self.messages: Dict[int, AbstractIncomingMessage] = {}
+        # Last finished delivery not acknowledged yet, and how many it covers
+        self.ready: Optional[AbstractIncomingMessage] = None
+        self.ready_count = 0
+
+
+class AckTracker:
+    """Acknowledges deliveries in order, batching consecutive acks."""
+
+    def __init__(self, batch_size: int = 1, flush_interval: float = 0.05) -> None:
+        """
+        Initialize the tracker.
+
+        Args:
+            batch_size: Finished deliveries covered by one multiple-ack
+                (1 acknowledges as soon as every earlier delivery is done)
+            flush_interval: Maximum seconds a finished delivery waits for
+                its batch to fill up
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._channels: Dict[int, _ChannelState] = {}
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    def track(self, message: AbstractIncomingMessage) -> None:
+        """
+        Register a delivery as soon as it is received.
+
+        Args:
+            message: The delivered message
+        """
+        state = self._channels.setdefault(id(message.channel), _ChannelState())
+        state.outcomes[message.delivery_tag] = _PENDING
+        state.messages[message.delivery_tag] = message
+
+    @property
+    def pending(self) -> int:
+        """Deliveries received but not acknowledged or rejected yet."""
+        return sum(
+            len(state.outcomes) + state.ready_count for state in self._channels.values()
+        )
+
+    async def ack(self, message: AbstractIncomingMessage) -> None:
+        """
+        Mark a delivery as successfully handled.
+
+        Args:
+            message: The delivered message
+        """
+        await self._complete(message, _ACK)
+
+    async def reject(self, message: AbstractIncomingMessage) -> None:
+        """
+        Mark a delivery as failed; it is rejected without requeue.
+
+        Args:
+            message: The delivered message
+        """
+        await self._complete(message, _REJECT)
+
+    async def flush(self) -> None:
+        """Acknowledge every finished delivery now."""
+        async with self._lock:
+            for key in list(self._channels):
+                await self._send_ack(key)
+
+    async def _complete(self, message: AbstractIncomingMessage, outcome: int) -> None:
+        """Record an outcome and send whatever acks it unblocks."""
+        key = id(message.channel)
+        async with self._lock:
+            state = self._channels.get(key)
+            if state is None or message.delivery_tag not in state.outcomes:
+                return
+            state.outcomes[message.delivery_tag] = outcome
+
+            # Walk the contiguous prefix of finished deliveries
+            while state.outcomes:
+                tag, first = next(iter(state.outcomes.items()))
+                if first == _PENDING:
+                    break
+                state.outcomes.popitem(last=False)
+                finished = state.messages.pop(tag)
+                if first == _ACK:
+                    state.ready = finished
+                    state.ready_count += 1
+                else:
+                    # Acknowledge everything before it, then reject it alone
+                    await self._send_ack(key)
+                    await self._send(finished.reject(requeue=False), key)
+
+            if state.ready_count >= self.batch_size:
+                await self._send_ack(key)
+            elif state.ready is not None:
+                self._schedule_flush()
+
+    async def _send_ack(self, key: int) -> None:
+        """Multiple-ack the last finished delivery of a channel."""
+        state = self._channels.get(key)
+        if state is None or state.ready is None:
+            return
+        message, state.ready, state.ready_count = state.ready, None, 0
+        await self._send(message.ack(multiple=True), key)
+
+    async def _send(self, operation, key: int) -> None:
+        """Run an ack/reject, forgetting the channel if it is gone."""
+        try:
+            await operation
+        except Exception as e:
+            # The channel was closed; the broker redelivers unacked messages
+            logger.warning("Could not acknowledge deliveries", error=str(e))
+            self._channels.pop(key, None)
+
+    def _schedule_flush(self) -> None:
+        """Flush pending acks after flush_interval, once."""
+        if self._timer is not None:
+            return
+
+        def run() -> None:
+            self._timer = None
+            task = asyncio.create_task(self.flush())
+            # Keep a reference so the task is not garbage collected
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        self._timer = asyncio.get_running_loop().call_later(self.flush_interval, run)
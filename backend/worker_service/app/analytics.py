@@ -0,0 +1,254 @@
+"""
+Buffered sink for incident response-time analytics.
+
+Each processed incident produces one row in the incident_response_times
+table: how long the incident took from creation to validation and from
+creation to notification. Rows are buffered in memory and written with one
+multi-row INSERT per batch, every ANALYTICS_BATCH_SIZE rows or
+ANALYTICS_FLUSH_INTERVAL_MS, whichever comes first.
+
+A writer waits until the batch holding its row is committed, so a failed
+flush fails the analytics step and the message is retried. Rows are unique
+per incident and inserted with ON CONFLICT DO NOTHING: a row written after
+its step timed out is not duplicated by the retry. When
+ANALYTICS_MAX_BUFFER rows are waiting, new writers block until a flush frees
+room (backpressure instead of unbounded memory).
+"""
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import BigInteger, Column, DateTime, Float, Integer, MetaData, Table
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from structlog import get_logger
+
+from app.config import settings
+
+logger = get_logger("analytics")
+
+metadata = MetaData()
+
+# Created by the backend migrations (20251022_0900_add_incident_response_times)
+incident_response_times = Table(
+    "incident_response_times",
+    metadata,
+    Column("id", BigInteger().with_variant(Integer, "sqlite"), primary_key=True),
+    Column("incident_id", Integer, nullable=False, unique=True),
+    Column("severity", Integer),
+    Column("lat", Float, nullable=False),
+    Column("lon", Float, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("validated_at", DateTime),
+    Column("notified_at", DateTime, nullable=False),
+    Column("validation_seconds", Float),
+    Column("notification_seconds", Float, nullable=False),
+)
+
+ANALYTICS_ROWS = Counter(
+    "worker_analytics_rows_written_total",
+    "Analytics rows committed to the database",
+)
+ANALYTICS_FLUSH_FAILURES = Counter(
+    "worker_analytics_flush_failures_total",
+    "Analytics batches that could not be written",
+)
+ANALYTICS_BATCH_SIZE = Histogram(
+    "worker_analytics_batch_size",
+    "Rows written by one analytics flush",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+ANALYTICS_FLUSH_DURATION = Histogram(
+    "worker_analytics_flush_duration_seconds",
+    "Duration of one analytics multi-row insert",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+ANALYTICS_BUFFERED = Gauge(
+    "worker_analytics_buffered_rows",
+    "Analytics rows waiting to be written",
+    multiprocess_mode="livesum",
+)
+
+
+class AnalyticsSink(ABC):
+    """Destination of analytics rows."""
+
+    @abstractmethod
+    async def write(self, row: Dict[str, Any]) -> None:
+        """
+        Record one analytics row.
+
+        Args:
+            row: Column values of incident_response_times
+        """
+
+    async def close(self) -> None:
+        """Write whatever is pending and release resources."""
+
+
+class LogAnalyticsSink(AnalyticsSink):
+    """Logs rows instead of storing them (local runs, tests)."""
+
+    async def write(self, row: Dict[str, Any]) -> None:
+        logger.info("Analytics row", **row)
+
+
+class NullAnalyticsSink(AnalyticsSink):
+    """Discards rows (load tests, where logging every row would skew results)."""
+
+    async def write(self, row: Dict[str, Any]) -> None:
+        pass
+
+
+class BufferedAnalyticsSink(AnalyticsSink):
+    """Batches rows into multi-row inserts."""
+
+    def __init__(
+        self,
+        database_url: str,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        max_buffer: int = 5000,
+    ) -> None:
+        """
+        Initialize the sink; the engine and the flush task start on first write.
+
+        Args:
+            database_url: SQLAlchemy async database URL
+            batch_size: Rows per insert (a full batch is flushed at once)
+            flush_interval: Maximum seconds a row waits for its batch
+            max_buffer: Rows buffered before writers are blocked
+        """
+        self.database_url = database_url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._engine: Optional[AsyncEngine] = None
+        self._rows: List[Dict[str, Any]] = []
+        self._waiters: List[asyncio.Future] = []
+        self._space = asyncio.Semaphore(max_buffer)
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self._engine = create_async_engine(self.database_url, pool_pre_ping=True)
+        return self._engine
+
+    async def write(self, row: Dict[str, Any]) -> None:
+        """
+        Buffer a row and wait until its batch is committed.
+
+        Args:
+            row: Column values of incident_response_times
+
+        Raises:
+            Exception: Whatever made the batch insert fail
+        """
+        # Backpressure: wait for room when the buffer is full
+        await self._space.acquire()
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self._rows.append(row)
+        self._waiters.append(future)
+        ANALYTICS_BUFFERED.inc()
+        if len(self._rows) >= self.batch_size:
+            self._full.set()
+
+        # A cancelled writer (step timeout) leaves its row in the batch
+        await asyncio.shield(future)
+
+    async def flush(self) -> None:
+        """Write every buffered row, one insert per batch."""
+        async with self._flush_lock:
+            while self._rows:
+                rows, self._rows = self._rows[:self.batch_size], self._rows[self.batch_size:]
+                waiters, self._waiters = (
+                    self._waiters[:self.batch_size],
+                    self._waiters[self.batch_size:],
+                )
+                await self._insert(rows, waiters)
+
+    async def _insert(self, rows: List[Dict[str, Any]], waiters: List[asyncio.Future]) -> None:
+        """Insert one batch and resolve the writers waiting on it."""
+        started = time.perf_counter()
+        try:
+            # A retried incident whose row was already written is skipped
+            dialect = postgresql if self.engine.dialect.name == "postgresql" else sqlite
+            statement = dialect.insert(incident_response_times).on_conflict_do_nothing(
+                index_elements=[incident_response_times.c.incident_id]
+            )
+            async with self.engine.begin() as conn:
+                # executemany: SQLAlchemy sends one multi-row INSERT per batch
+                await conn.execute(statement, rows)
+        except BaseException as e:
+            # Also on cancellation, so no writer waits forever
+            ANALYTICS_FLUSH_FAILURES.inc()
+            logger.error("Analytics flush failed", rows=len(rows), error=repr(e))
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(e if isinstance(e, Exception) else RuntimeError("flush cancelled"))
+                    # Retrieved by the writer, unless it already gave up
+                    waiter.exception()
+            if not isinstance(e, Exception):
+                raise
+        else:
+            ANALYTICS_ROWS.inc(len(rows))
+            ANALYTICS_BATCH_SIZE.observe(len(rows))
+            ANALYTICS_FLUSH_DURATION.observe(time.perf_counter() - started)
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+        finally:
+            ANALYTICS_BUFFERED.dec(len(rows))
+            for _ in rows:
+                self._space.release()
+
+    async def _run(self) -> None:
+        """Flush on a full batch or every flush_interval, until cancelled."""
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            await self.flush()
+
+    async def close(self) -> None:
+        """Stop the flush task, write the remaining rows and dispose the engine."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+
+
+def create_analytics_sink() -> AnalyticsSink:
+    """
+    Build the sink selected by the ANALYTICS_SINK setting.
+
+    Returns:
+        AnalyticsSink: The configured sink
+    """
+    if settings.analytics_sink == "log":
+        return LogAnalyticsSink()
+    if settings.analytics_sink == "none":
+        return NullAnalyticsSink()
+    return BufferedAnalyticsSink(
+        settings.database_url,
+        batch_size=settings.analytics_batch_size,
+        flush_interval=settings.analytics_flush_interval_ms / 1000,
+        max_buffer=settings.analytics_max_buffer,
+    )
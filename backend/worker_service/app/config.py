@@ -15,6 +15,30 @@ class Settings(BaseSettings):
         description="RabbitMQ connection URL"
     )
     
+    # Event routing: queue consumed by this worker and its topic bindings
+    queue_name: str = Field(
+        "incident.validated",
+        env="QUEUE_NAME",
+        description="Queue consumed by this worker (retry and DLQ queues derive their names from it)"
+    )
+    binding_keys: str = Field(
+        "incident.validated.#",
+        env="BINDING_KEYS",
+        description="Comma-separated binding patterns on the incident.events topic exchange"
+    )
+    
+    # Partitioned consumers (per-incident ordering)
+    shard_count: int = Field(
+        0,
+        env="SHARD_COUNT",
+        description="Number of incident.events.<n> shard queues (0 = no sharding, consume QUEUE_NAME)"
+    )
+    shards: str = Field(
+        "",
+        env="SHARDS",
+        description="Comma-separated shards consumed by this worker (empty = all)"
+    )
+    
     # Database
     database_url: str = Field(
         "postgresql+asyncpg://gs_user:gs_pass@db:5432/greensentinel",
@@ -22,6 +46,52 @@ class Settings(BaseSettings):
         description="PostgreSQL connection URL"
     )
     
+    # Step ledger
+    step_ledger: str = Field(
+        "postgres",
+        env="STEP_LEDGER",
+        description="Store of completed side effects per incident: postgres (shared) or memory (local runs)"
+    )
+    
+    # Idempotent consumption
+    dedup_store: str = Field(
+        "postgres",
+        env="DEDUP_STORE",
+        description="Store of processed event keys: postgres (shared) or memory (local runs)"
+    )
+    dedup_cache_size: int = Field(
+        10000,
+        env="DEDUP_CACHE_SIZE",
+        description="Processed event keys kept in the in-process LRU"
+    )
+    dedup_ttl_seconds: float = Field(
+        86400.0,
+        env="DEDUP_TTL_SECONDS",
+        description="Seconds a processed event is remembered before a new delivery is processed again"
+    )
+    
+    # Analytics sink
+    analytics_sink: str = Field(
+        "postgres",
+        env="ANALYTICS_SINK",
+        description="Where response-time analytics go: postgres (batched inserts), log or none"
+    )
+    analytics_batch_size: int = Field(
+        500,
+        env="ANALYTICS_BATCH_SIZE",
+        description="Rows written by one multi-row insert"
+    )
+    analytics_flush_interval_ms: int = Field(
+        200,
+        env="ANALYTICS_FLUSH_INTERVAL_MS",
+        description="Maximum delay before a partial analytics batch is written"
+    )
+    analytics_max_buffer: int = Field(
+        5000,
+        env="ANALYTICS_MAX_BUFFER",
+        description="Buffered analytics rows before writers are blocked (backpressure)"
+    )
+    
     # Worker settings
     worker_name: str = Field(
         "greensentinel-worker",
@@ -29,16 +99,133 @@ class Settings(BaseSettings):
         description="Worker name for identification in logs"
     )
     
+    # Process model
+    worker_processes: int = Field(
+        0,
+        env="WORKER_PROCESSES",
+        description="Consumer processes run by the supervisor (0 = one per CPU core)"
+    )
+    consumers_per_process: int = Field(
+        1,
+        env="CONSUMERS_PER_PROCESS",
+        description="Consumer tasks (each with its own connection) per process"
+    )
+    drain_timeout: float = Field(
+        30.0,
+        env="DRAIN_TIMEOUT",
+        description="Seconds a stopping consumer waits for in-flight messages to be acknowledged"
+    )
+    restart_delay: float = Field(
+        1.0,
+        env="RESTART_DELAY",
+        description="Seconds before a crashed consumer process is restarted"
+    )
+    
+    # Observability
+    metrics_port: int = Field(
+        9100,
+        env="METRICS_PORT",
+        description="Port of the Prometheus /metrics endpoint served by the supervisor (0 disables it)"
+    )
+    queue_depth_interval: float = Field(
+        15.0,
+        env="QUEUE_DEPTH_INTERVAL",
+        description="Seconds between two reads of the queue depths reported in metrics"
+    )
+    
+    # Concurrency settings
+    prefetch_count: int = Field(
+        32,
+        env="PREFETCH_COUNT",
+        description="Unacknowledged deliveries the broker may push to this consumer"
+    )
+    max_concurrency: int = Field(
+        16,
+        env="MAX_CONCURRENCY",
+        description="Messages processed concurrently by one consumer"
+    )
+    ack_batch_size: int = Field(
+        1,
+        env="ACK_BATCH_SIZE",
+        description="Finished deliveries acknowledged by one multiple-ack (1 = ack in order as soon as possible)"
+    )
+    ack_flush_interval_ms: int = Field(
+        50,
+        env="ACK_FLUSH_INTERVAL_MS",
+        description="Maximum delay before a partial ack batch is sent, in milliseconds"
+    )
+    
+    # Firefighter pushes (FCM)
+    push_batch_window_ms: int = Field(
+        250,
+        env="PUSH_BATCH_WINDOW_MS",
+        description="Time notifications are buffered after the first one before an FCM batch is sent"
+    )
+    push_max_batch: int = Field(
+        500,
+        env="PUSH_MAX_BATCH",
+        description="FCM messages per send_each call (at most 500; a full batch is sent at once)"
+    )
+    push_coalesce: bool = Field(
+        False,
+        env="PUSH_COALESCE",
+        description="Merge the notifications of a window for the same topic into one digest"
+    )
+    
+    # Side effect stubs (offline and load-test runs)
+    push_simulation_delay: float = Field(
+        0.5,
+        env="PUSH_SIMULATION_DELAY",
+        description="Seconds spent by the simulated resident push notification"
+    )
+    fcm_enabled: bool = Field(
+        True,
+        env="FCM_ENABLED",
+        description="Send firefighter pushes through FCM (false skips the call)"
+    )
+    completion_exchange: str = Field(
+        "",
+        env="COMPLETION_EXCHANGE",
+        description="Fanout exchange receiving a completion report per delivery (empty = off; see app.loadtest)"
+    )
+    
+    # Side effect deadlines, in seconds
+    push_simulation_timeout: float = Field(
+        2.0,
+        env="PUSH_SIMULATION_TIMEOUT",
+        description="Deadline of the simulated resident push notification"
+    )
+    analytics_timeout: float = Field(
+        2.0,
+        env="ANALYTICS_TIMEOUT",
+        description="Deadline of the analytics update"
+    )
+    broadcast_timeout: float = Field(
+        2.0,
+        env="BROADCAST_TIMEOUT",
+        description="Deadline of the WebSocket broadcast"
+    )
+    fcm_timeout: float = Field(
+        10.0,
+        env="FCM_TIMEOUT",
+        description="Deadline of the FCM push to firefighters"
+    )
+    
     # Retry settings
     max_retries: int = Field(
-        3, 
+        4, 
         env="MAX_RETRIES",
         description="Maximum number of retry attempts for failed message processing"
     )
-    retry_delay: int = Field(
-        5000, 
-        env="RETRY_DELAY_MS",
-        description="Delay between retry attempts in milliseconds"
+    retry_tiers_ms: str = Field(
+        "1000,10000,60000,600000",
+        env="RETRY_TIERS_MS",
+        description="Comma-separated back-off delays in milliseconds, one per retry attempt (the last is reused)"
+    )
+    retry_jitter: float = Field(
+        0.2,
+        env="RETRY_JITTER",
+        description="Random spread applied to each retry delay, as a fraction (0.2 = +/-20%)"
     )
     
     class Config:
@@ -1,33 +1,203 @@
 """
 Message consumers for processing RabbitMQ messages.
+
+Incident events are published to the "incident.events" topic exchange with
+routing keys "incident.validated.<geohash4>.<severity>". Each consumer binds
+its queue with the patterns it serves, e.g. "incident.validated.#" for
+everything, "incident.validated.u09t.*" for one region or
+"incident.validated.*.5" for the most severe incidents only.
+
+Partitioned mode (SHARD_COUNT > 0) keeps the events of each incident in
+order: a consistent-hash exchange bound to the topic exchange hashes the
+x-incident-id header into the shard queues "incident.events.<n>", and each
+shard is consumed by one serial consumer (single active consumer across
+every worker replica).
 """
 import asyncio
-import json
-import sys
-from datetime import datetime
-from typing import Any, Dict
+import math
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
 
 import aio_pika
 import msgspec
 from aio_pika.abc import AbstractIncomingMessage
+from prometheus_client import Counter, Gauge, Histogram
 from structlog import get_logger
 
 # Import push notification module
 from app import push
-
-# Import WebSocket manager for real-time broadcasting
-# Add this in a try-except block to handle import errors gracefully
-try:
-    from app.services.ws_manager import broadcast_incident
-    websocket_available = True
-except ImportError:
-    websocket_available = False
-    print("WebSocket manager not available, broadcasting disabled", file=sys.stderr)
+from app.acks import AckTracker
+from app.analytics import AnalyticsSink, create_analytics_sink
+from app.dedup import ProcessedEvents, create_processed_events
+from app.ledger import StepLedger, create_step_ledger
 
 from app.config import settings
+from app.events import IncidentValidated, encoder, incident_validated_decoder
 
 logger = get_logger("consumers")
 
+# Topic exchange receiving every incident event
+EVENTS_EXCHANGE = "incident.events"
+
+# Consistent-hash exchange spreading incident events over the shard queues
+SHARDED_EXCHANGE = "incident.events.sharded"
+
+# Header holding the incident id, hashed to pick the shard
+PARTITION_HEADER = "x-incident-id"
+
+# Fanout exchange consumed by every API replica, which relays events to its
+# own WebSocket clients (the worker has none)
+BROADCAST_EXCHANGE = "incident.broadcast"
+
+# Header recording why a message was dead-lettered (truncated)
+DLQ_ERROR_HEADER = "x-error"
+MAX_ERROR_LENGTH = 1000
+
+STEP_RESULTS = Counter(
+    "worker_step_results_total",
+    "Outcome of each side effect of an incident event",
+    ["step", "outcome"],  # success, failure, timeout
+)
+STEP_DURATION = Histogram(
+    "worker_step_duration_seconds",
+    "Duration of each side effect of an incident event",
+    ["step"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+RETRIES = Counter(
+    "worker_retries_total",
+    "Messages sent to a retry queue, by back-off tier",
+    ["tier"],
+)
+DRAIN_DURATION = Histogram(
+    "worker_drain_duration_seconds",
+    "Time spent waiting for in-flight messages on shutdown",
+    buckets=(0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+DRAIN_ABANDONED = Counter(
+    "worker_drain_abandoned_total",
+    "Messages still in flight when the drain timed out (redelivered by the broker)",
+)
+MESSAGE_DURATION = Histogram(
+    "worker_message_processing_seconds",
+    "Time to process one delivery, by outcome (success, duplicate, retry, dlq)",
+    ["outcome"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+MESSAGE_AGE = Histogram(
+    "worker_message_age_seconds",
+    "Time from validation (or creation) of an incident to its consumption",
+    buckets=(0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 600, 1800, 3600),
+)
+DLQ_MESSAGES = Counter(
+    "worker_dlq_messages_total",
+    "Messages moved to the dead-letter queue",
+)
+IN_FLIGHT = Gauge(
+    "worker_messages_in_flight",
+    "Deliveries being processed",
+    multiprocess_mode="livesum",
+)
+QUEUE_DEPTH = Gauge(
+    "worker_queue_depth",
+    "Messages ready in a queue, as last reported by the broker",
+    ["queue"],
+    multiprocess_mode="livemax",
+)
+STEPS_SKIPPED = Counter(
+    "worker_steps_skipped_total",
+    "Side effects skipped because the step ledger shows them completed",
+)
+
+
+class StepFailed(Exception):
+    """A required side effect of an event failed or timed out."""
+
+
+def _utc_naive(value: datetime) -> datetime:
+    """Convert an aware datetime to naive UTC (the database stores naive UTC)."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def event_key(event: IncidentValidated) -> str:
+    """
+    Idempotency key of an event.
+    
+    The backend publishes one IncidentValidated per incident (the outbox may
+    re-publish it, and a retry copy has a new delivery), so the incident id
+    identifies the event, as it does for the step ledger.
+    """
+    return f"incident.validated:{event.id}"
+
+
+def _message_age(event: IncidentValidated) -> float:
+    """Seconds since the event was validated (or created, for older events)."""
+    published = event.validated_at or event.created_at
+    return (datetime.utcnow() - _utc_naive(published)).total_seconds()
+
+
+def parse_binding_keys(value: str) -> List[str]:
+    """
+    Split a comma-separated list of binding patterns.
+    
+    Args:
+        value: Patterns such as "incident.validated.u09t.*,incident.validated.*.5"
+        
+    Returns:
+        List of non-empty patterns
+    """
+    return [key.strip() for key in value.split(",") if key.strip()]
+
+
+def shard_queue_name(shard: int) -> str:
+    """Name of the queue of one shard."""
+    return f"{EVENTS_EXCHANGE}.{shard}"
+
+
+def assigned_shards(shard_count: int, shards: str, index: int = 0, processes: int = 1) -> List[int]:
+    """
+    Shards consumed by one worker process.
+    
+    Args:
+        shard_count: Total number of shards
+        shards: Comma-separated shards served by this worker ("" for all)
+        index: Index of this process under the supervisor
+        processes: Number of processes under the supervisor
+        
+    Returns:
+        The shards of this worker dealt round-robin to its processes
+        
+    Raises:
+        ValueError: If a shard is outside 0..shard_count-1
+    """
+    served = [int(shard) for shard in shards.split(",") if shard.strip()] or list(range(shard_count))
+    if any(not 0 <= shard < shard_count for shard in served):
+        raise ValueError(f"Invalid shards {shards!r} for SHARD_COUNT={shard_count}")
+    return served[index::processes]
+
+
+def parse_retry_tiers(value: str) -> List[int]:
+    """
+    Parse the comma-separated retry back-off tiers.
+    
+    Args:
+        value: Delays in milliseconds, e.g. "1000,10000,60000,600000"
+        
+    Returns:
+        List of delays, in the order retries use them
+        
+    Raises:
+        ValueError: If no tier is given or a delay is not a positive integer
+    """
+    tiers = [int(delay) for delay in value.split(",") if delay.strip()]
+    if not tiers or any(delay <= 0 for delay in tiers):
+        raise ValueError(f"Invalid retry tiers: {value!r}")
+    return tiers
+
 
 class IncidentConsumer:
     """
@@ -35,19 +205,78 @@ class IncidentConsumer:
     Processes incident validation events and performs downstream actions.
     """
     
-    def __init__(self, connection_url: str) -> None:
+    def __init__(
+        self,
+        connection_url: str,
+        queue_name: Optional[str] = None,
+        binding_keys: Optional[List[str]] = None,
+        ledger: Optional[StepLedger] = None,
+        shard: Optional[int] = None,
+        analytics: Optional[AnalyticsSink] = None,
+        processed: Optional[ProcessedEvents] = None,
+        push_dispatcher: Optional[push.PushDispatcher] = None,
+    ) -> None:
         """
         Initialize the incident consumer.
         
         Args:
             connection_url: RabbitMQ connection URL
+            queue_name: Queue to consume (defaults to QUEUE_NAME)
+            binding_keys: Topic patterns bound to the queue (defaults to BINDING_KEYS)
+            ledger: Store of completed side effects (defaults to STEP_LEDGER)
+            shard: Shard consumed serially, in partitioned mode
+            analytics: Sink of response-time analytics (defaults to ANALYTICS_SINK)
+            processed: Index of processed events (defaults to DEDUP_STORE)
+            push_dispatcher: Batching sender of firefighter pushes (defaults to PUSH_*)
         """
         self.connection_url = connection_url
+        self.shard = shard
+        if shard is not None:
+            queue_name = queue_name or shard_queue_name(shard)
+        self.queue_name = queue_name or settings.queue_name
+        self.binding_keys = binding_keys or parse_binding_keys(settings.binding_keys)
         self.connection: aio_pika.RobustConnection = None
         self.channel: aio_pika.RobustChannel = None
         self.queue: aio_pika.Queue = None
         self.retry_exchange: aio_pika.RobustExchange = None
+        self.broadcast_exchange: Optional[aio_pika.abc.AbstractExchange] = None
+        self.completion_exchange: Optional[aio_pika.abc.AbstractExchange] = None
+        self.consumer_tag: Optional[str] = None
         self.should_stop = False
+        self._stopped = asyncio.Event()
+        
+        # Bounded concurrency and in-order (batched) acknowledgements
+        # (a shard is processed one message at a time to keep incidents in order)
+        self.slots = asyncio.Semaphore(1 if shard is not None else settings.max_concurrency)
+        self.acks = AckTracker(
+            batch_size=settings.ack_batch_size,
+            flush_interval=settings.ack_flush_interval_ms / 1000,
+        )
+        
+        # Back-off tiers (ms) used by successive retries
+        self.retry_tiers = parse_retry_tiers(settings.retry_tiers_ms)
+        
+        # Completed side effects per incident, so retries only redo failed steps
+        self.ledger = ledger or create_step_ledger()
+        self.analytics = analytics or create_analytics_sink()
+        
+        # Fully processed events, so duplicate deliveries are acked untouched
+        self.processed = processed or create_processed_events()
+        self.push_dispatcher = push_dispatcher or push.create_push_dispatcher()
+        
+        # Resources passed in may be shared with other consumers and are
+        # closed by their owner; only those created here are closed on stop
+        # (pushes and analytics first: their last flushes use no other resource)
+        self._owned_resources = [
+            resource
+            for resource, given in (
+                (self.push_dispatcher, push_dispatcher),
+                (self.analytics, analytics),
+                (self.ledger, ledger),
+                (self.processed, processed),
+            )
+            if given is None
+        ]
         
     async def setup(self) -> None:
         """Set up RabbitMQ connection, channel, and queues."""
@@ -56,14 +285,39 @@ class IncidentConsumer:
         
         # Create channel
         self.channel = await self.connection.channel()
-        await self.channel.set_qos(prefetch_count=1)  # Process one message at a time
+        # Deliveries buffered ahead of processing (should be >= MAX_CONCURRENCY)
+        await self.channel.set_qos(prefetch_count=settings.prefetch_count)
         
-        # Declare primary queue
-        self.queue = await self.channel.declare_queue(
-            "incident.validated",
+        # Declare the events topic exchange and bind the primary queue to it
+        self.events_exchange = await self.channel.declare_exchange(
+            EVENTS_EXCHANGE,
+            type=aio_pika.ExchangeType.TOPIC,
+            durable=True
+        )
+        if self.shard is None:
+            self.queue = await self.channel.declare_queue(
+                self.queue_name,
+                durable=True
+            )
+            for binding_key in self.binding_keys:
+                await self.queue.bind(self.events_exchange, routing_key=binding_key)
+        else:
+            await self._setup_shard()
+        
+        # Declare the broadcast fanout exchange (API replicas bind their own queues)
+        self.broadcast_exchange = await self.channel.declare_exchange(
+            BROADCAST_EXCHANGE,
+            type=aio_pika.ExchangeType.FANOUT,
             durable=True
         )
         
+        # Completion reports, read by the load generator (app.loadtest)
+        if settings.completion_exchange:
+            self.completion_exchange = await self.channel.declare_exchange(
+                settings.completion_exchange,
+                type=aio_pika.ExchangeType.FANOUT
+            )
+        
         # Declare retry exchange
         self.retry_exchange = await self.channel.declare_exchange(
             "incident.retry",
@@ -73,25 +327,51 @@ class IncidentConsumer:
         
         # Declare dead-letter queue
         self.dlq = await self.channel.declare_queue(
-            "incident.validated.dlq",
+            f"{self.queue_name}.dlq",
             durable=True
         )
         
-        # Create retry queue with TTL
-        retry_queue = await self.channel.declare_queue(
-            "incident.validated.retry",
-            arguments={
-                "x-dead-letter-exchange": "",  # Default exchange
-                "x-dead-letter-routing-key": "incident.validated",
-                "x-message-ttl": settings.retry_delay,  # TTL in ms
-            },
-            durable=True
-        )
+        # One retry queue per back-off tier, each dead-lettering back to the
+        # primary queue once its messages expire
+        for delay in self.retry_tiers:
+            name = self._retry_queue_name(delay)
+            retry_queue = await self.channel.declare_queue(
+                name,
+                arguments={
+                    "x-dead-letter-exchange": "",  # Default exchange
+                    "x-dead-letter-routing-key": self.queue_name,
+                    # Upper bound; each message carries its own jittered expiration
+                    "x-message-ttl": math.ceil(delay * (1 + settings.retry_jitter)),
+                },
+                durable=True
+            )
+            await retry_queue.bind(self.retry_exchange, routing_key=name)
         
-        # Bind retry queue to retry exchange
-        await retry_queue.bind(self.retry_exchange, routing_key="incident.validated")
+        logger.info(
+            "Consumer setup complete",
+            queue=self.queue_name,
+            binding_keys=self.binding_keys
+        )
+    
+    async def _setup_shard(self) -> None:
+        """Declare the consistent-hash exchange and bind this shard's queue to it."""
+        sharded_exchange = await self.channel.declare_exchange(
+            SHARDED_EXCHANGE,
+            type="x-consistent-hash",
+            durable=True,
+            arguments={"hash-header": PARTITION_HEADER},
+        )
+        for binding_key in self.binding_keys:
+            await sharded_exchange.bind(self.events_exchange, routing_key=binding_key)
         
-        logger.info("Consumer setup complete", queue="incident.validated")
+        self.queue = await self.channel.declare_queue(
+            self.queue_name,
+            durable=True,
+            # Replicas consuming the same shard stand by instead of sharing it
+            arguments={"x-single-active-consumer": True},
+        )
+        # The routing key is the shard's weight on the hash ring
+        await self.queue.bind(sharded_exchange, routing_key="1")
     
     async def start_consuming(self) -> None:
         """
@@ -100,111 +380,295 @@ class IncidentConsumer:
         """
         await self.setup()
         
-        logger.info("Starting to consume messages", queue="incident.validated")
-        await self.queue.consume(self.process_message)
+        logger.info("Starting to consume messages", queue=self.queue_name)
+        self.consumer_tag = await self.queue.consume(self.process_message)
+        depth_task = asyncio.create_task(self._monitor_queue_depth())
         
-        # Keep the consumer running until should_stop is set to True
-        while not self.should_stop:
-            await asyncio.sleep(1)
+        # Keep the consumer running until stop_consuming() is called
+        try:
+            await self._stopped.wait()
+        finally:
+            depth_task.cancel()
+    
+    async def _monitor_queue_depth(self) -> None:
+        """Report the depth of the consumed queue and its DLQ until cancelled."""
+        while True:
+            try:
+                await self.update_queue_depth()
+            except Exception as e:
+                logger.warning("Could not read queue depth", queue=self.queue_name, error=str(e))
+            await asyncio.sleep(settings.queue_depth_interval)
+    
+    async def update_queue_depth(self) -> None:
+        """Read the ready message counts from the broker (passive declares)."""
+        for name in (self.queue_name, f"{self.queue_name}.dlq"):
+            queue = await self.channel.declare_queue(name, passive=True)
+            QUEUE_DEPTH.labels(queue=name).set(queue.declaration_result.message_count)
     
     async def stop_consuming(self) -> None:
-        """Stop consuming messages and close connections."""
+        """
+        Stop consuming, drain in-flight messages, then close connections.
+        
+        New deliveries stop first; messages already received get up to
+        DRAIN_TIMEOUT seconds to finish and be acknowledged. Whatever is
+        still unacknowledged afterwards is redelivered by the broker when
+        the connection closes. Resources passed in by the caller (shared
+        with other consumers) are left open.
+        """
         self.should_stop = True
+        self._stopped.set()
+        
+        if self.queue is not None and self.consumer_tag is not None:
+            try:
+                await self.queue.cancel(self.consumer_tag)
+            except Exception as e:
+                logger.warning("Could not cancel consumer", queue=self.queue_name, error=str(e))
+        
+        await self.drain(settings.drain_timeout)
         
         if self.connection and not self.connection.is_closed:
             await self.connection.close()
-            logger.info("Consumer stopped", queue="incident.validated")
+            logger.info("Consumer stopped", queue=self.queue_name)
+        
+        for resource in self._owned_resources:
+            await resource.close()
+    
+    async def drain(self, timeout: float) -> bool:
+        """
+        Wait for in-flight messages to finish and their acks to be sent.
+        
+        Args:
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            bool: True if every received message was acknowledged or rejected
+        """
+        started = time.perf_counter()
+        deadline = started + timeout
+        while self.acks.pending and time.perf_counter() < deadline:
+            await self.acks.flush()
+            await asyncio.sleep(0.05)
+        await self.acks.flush()
+        
+        elapsed = time.perf_counter() - started
+        DRAIN_DURATION.observe(elapsed)
+        left = self.acks.pending
+        if left:
+            DRAIN_ABANDONED.inc(left)
+            logger.warning("Drain timed out", queue=self.queue_name, in_flight=left)
+        else:
+            logger.info("Drained in-flight messages", queue=self.queue_name, seconds=round(elapsed, 3))
+        return not left
     
     async def process_message(self, message: AbstractIncomingMessage) -> None:
         """
         Process an incoming message from the queue.
         
+        aio_pika runs this callback in its own task for every delivery, so up
+        to PREFETCH_COUNT messages are in flight; MAX_CONCURRENCY bounds how
+        many are processed at once. Acks are sent in delivery order, batched
+        by the ack tracker.
+        
         Args:
             message: The incoming message to process
         """
-        async with message.process(requeue=False):  # Don't auto-requeue if processing fails
+        self.acks.track(message)
+        
+        async with self.slots:
+            IN_FLIGHT.inc()
             try:
-                # Parse message body
-                body = json.loads(message.body.decode())
-                logger.info(
-                    "Received incident validation", 
-                    incident_id=body.get("id"), 
-                    retry_count=message.headers.get("x-retry-count", 0) if message.headers else 0
+                await self._process_delivery(message)
+            except Exception as e:
+                # Not even re-routable: drop it (never requeue a poison message)
+                logger.error("Failed to re-route message", error=str(e))
+                await self.acks.reject(message)
+                return
+            finally:
+                IN_FLIGHT.dec()
+        
+        await self.acks.ack(message)
+    
+    async def _process_delivery(self, message: AbstractIncomingMessage) -> None:
+        """
+        Handle one delivery, routing failures to the retry queue or the DLQ.
+        
+        Args:
+            message: The incoming message to process
+        """
+        started = time.perf_counter()
+        outcome = "success"
+        incident_id: Optional[int] = None
+        try:
+            # Decode straight into the typed event (no intermediate dict)
+            event = incident_validated_decoder.decode(message.body)
+            incident_id = event.id
+            key = event_key(event)
+            if await self._already_processed(key):
+                outcome = "duplicate"
+                logger.info("Skipping duplicate delivery", incident_id=event.id)
+                return
+            MESSAGE_AGE.observe(_message_age(event))
+            logger.info(
+                "Received incident validation", 
+                incident_id=event.id, 
+                retry_count=message.headers.get("x-retry-count", 0) if message.headers else 0
+            )
+            
+            # Process the message
+            await self._handle_incident_validated(event)
+            await self._mark_processed(key)
+            
+            logger.info(
+                "Successfully processed incident", 
+                incident_id=event.id
+            )
+            
+        except Exception as e:
+            retry_count = (message.headers or {}).get("x-retry-count", 0)
+            
+            if retry_count < settings.max_retries:
+                # Send to retry queue with incremented retry count
+                outcome = "retry"
+                await self._send_to_retry(message.body, retry_count + 1)
+                logger.warning(
+                    "Failed to process message, retrying", 
+                    error=str(e), 
+                    retry_count=retry_count + 1
                 )
-                
-                # Process the message
-                await self._handle_incident_validated(body)
-                
-                logger.info(
-                    "Successfully processed incident", 
-                    incident_id=body.get("id")
+            else:
+                # Send to dead-letter queue
+                outcome = "dlq"
+                await self._send_to_dlq(message.body, error=str(e), retry_count=retry_count)
+                DLQ_MESSAGES.inc()
+                logger.error(
+                    "Failed to process message after max retries", 
+                    error=str(e), 
+                    retry_count=retry_count
                 )
+        finally:
+            MESSAGE_DURATION.labels(outcome=outcome).observe(time.perf_counter() - started)
+            if self.completion_exchange is not None and incident_id is not None:
+                await self._report_completion(incident_id, outcome)
+    
+    async def _report_completion(self, incident_id: int, outcome: str) -> None:
+        """
+        Publish when and how a delivery finished, logging (not raising) errors.
+        
+        Args:
+            incident_id: The incident ID
+            outcome: success, duplicate, retry or dlq
+        """
+        try:
+            await self.completion_exchange.publish(
+                aio_pika.Message(
+                    body=encoder.encode(
+                        {"id": incident_id, "outcome": outcome, "finished_at": time.time()}
+                    ),
+                    delivery_mode=aio_pika.DeliveryMode.NOT_PERSISTENT,
+                ),
+                routing_key=""
+            )
+        except Exception as e:
+            logger.warning("Could not report completion", incident_id=incident_id, error=str(e))
                 
-            except Exception as e:
-                retry_count = (message.headers or {}).get("x-retry-count", 0)
-                
-                if retry_count < settings.max_retries:
-                    # Send to retry queue with incremented retry count
-                    await self._send_to_retry(message.body, retry_count + 1)
-                    logger.warning(
-                        "Failed to process message, retrying", 
-                        error=str(e), 
-                        retry_count=retry_count + 1
-                    )
-                else:
-                    # Send to dead-letter queue
-                    await self._send_to_dlq(message.body)
-                    logger.error(
-                        "Failed to process message after max retries", 
-                        error=str(e), 
-                        retry_count=retry_count
-                    )
-                    
+    async def _already_processed(self, key: str) -> bool:
+        """
+        Look an event up in the dedup index, treating it as new when unavailable.
+        
+        The step ledger still prevents repeated side effects in that case.
+        """
+        try:
+            return await self.processed.seen(key)
+        except Exception as e:
+            logger.warning("Dedup index unavailable", key=key, error=str(e))
+            return False
+    
+    async def _mark_processed(self, key: str) -> None:
+        """Record a processed event, logging (not raising) store errors."""
+        try:
+            await self.processed.mark(key)
+        except Exception as e:
+            logger.warning("Could not record processed event", key=key, error=str(e))
+    
+    def _retry_queue_name(self, delay: int) -> str:
+        """Name of the retry queue of a back-off tier (delay in ms)."""
+        return f"{self.queue_name}.retry.{delay}ms"
+    
+    def _retry_tier(self, retry_count: int) -> int:
+        """
+        Pick the back-off tier of a retry attempt.
+        
+        Args:
+            retry_count: Attempt number, starting at 1
+            
+        Returns:
+            Tier delay in milliseconds (the last tier is reused past the end)
+        """
+        return self.retry_tiers[min(retry_count, len(self.retry_tiers)) - 1]
+    
     async def _send_to_retry(self, body: bytes, retry_count: int) -> None:
         """
-        Send a message to the retry queue.
+        Send a message to the retry queue of its back-off tier.
+        
+        The delay is jittered by +/- RETRY_JITTER so messages that failed
+        together are not all redelivered at the same instant.
         
         Args:
             body: Original message body
             retry_count: Current retry count
         """
+        tier = self._retry_tier(retry_count)
+        delay = round(tier * random.uniform(1 - settings.retry_jitter, 1 + settings.retry_jitter))
         await self.retry_exchange.publish(
             aio_pika.Message(
                 body=body,
                 delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
-                headers={"x-retry-count": retry_count}
+                headers={"x-retry-count": retry_count},
+                expiration=delay / 1000,
             ),
-            routing_key="incident.validated"
+            routing_key=self._retry_queue_name(tier)
         )
+        RETRIES.labels(tier=f"{tier}ms").inc()
     
-    async def _send_to_dlq(self, body: bytes) -> None:
+    async def _send_to_dlq(self, body: bytes, error: str = "", retry_count: int = 0) -> None:
         """
         Send a message to the dead-letter queue.
         
+        The error, the attempts made and the time are kept with the message
+        so the DLQ tool (app/dlq.py) can filter on them.
+        
         Args:
             body: Original message body
+            error: Error of the last attempt
+            retry_count: Retries made before giving up
         """
         await self.dlq.channel.default_exchange.publish(
             aio_pika.Message(
                 body=body,
                 delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                headers={
+                    DLQ_ERROR_HEADER: error[:MAX_ERROR_LENGTH],
+                    "x-retry-count": retry_count,
+                    "x-original-queue": self.queue_name,
+                },
+                timestamp=datetime.now(timezone.utc),
             ),
             routing_key=self.dlq.name
         )
     
-    async def _handle_incident_validated(self, data: Dict[str, Any]) -> None:
+    async def _handle_incident_validated(self, event: IncidentValidated) -> None:
         """
         Handle an incident.validated event.
         This method simulates sending notifications, logging, and other operations.
         
         Args:
-            data: The parsed message data
+            event: The decoded event
         """
-        incident_id = data.get("id")
-        lat = data.get("lat")
-        lon = data.get("lon")
-        created_at = data.get("created_at")
-        severity = data.get("severity", 0)
+        incident_id = event.id
+        lat = event.lat
+        lon = event.lon
+        created_at = event.created_at.isoformat()
+        severity = event.severity or 0
         
         # Log the incident for analytics
         logger.info(
@@ -215,34 +679,166 @@ class IncidentConsumer:
             severity=severity
         )
         
-        # Simulate push notification to nearby residents
-        await self._simulate_push_notification(incident_id, lat, lon, severity)
+        # Independent side effects run concurrently, each with its own deadline,
+        # so latency is the slowest step rather than the sum of all steps.
+        # Required steps fail the message (it is retried); best-effort ones are only logged.
+        steps: List[Tuple[str, Callable[[], Awaitable[Any]], float, bool]] = [
+            (
+                "push_simulation",
+                lambda: self._simulate_push_notification(incident_id, lat, lon, severity),
+                settings.push_simulation_timeout,
+                True,
+            ),
+            (
+                "analytics",
+                lambda: self._update_analytics(event),
+                settings.analytics_timeout,
+                True,
+            ),
+            ("fcm", lambda: self._send_fcm(incident_id, lat, lon, severity), settings.fcm_timeout, False),
+            ("broadcast", lambda: self._broadcast(event), settings.broadcast_timeout, False),
+        ]
         
-        # Simulate updating analytics metrics
-        await self._update_analytics(incident_id, created_at, lat, lon, severity)
+        # Skip the steps a previous delivery of this incident already completed
+        done = await self._completed_steps(incident_id)
+        pending = [step for step in steps if step[0] not in done]
+        if not pending:
+            logger.info("Incident already processed, skipping", incident_id=incident_id)
+            return
+        if done:
+            STEPS_SKIPPED.inc(len(steps) - len(pending))
+            logger.info("Resuming incident", incident_id=incident_id, completed=sorted(done))
         
-        # Broadcast to WebSocket clients if available
-        if websocket_available:
-            try:
-                # Use the original message body as it already contains all fields in JSON format
-                # The message body is passed to process_message() as bytes and decoded there
-                message_str = json.dumps(data)
-                logger.info("Broadcasting incident to WebSocket clients", incident_id=incident_id)
-                await broadcast_incident(message_str)
-            except Exception as e:
+        results = await asyncio.gather(
+            *(self._run_step(name, start(), timeout) for name, start, timeout, _ in pending),
+            return_exceptions=True,
+        )
+        
+        succeeded = []
+        failed = []
+        for (name, _, _, required), result in zip(pending, results):
+            if not isinstance(result, BaseException):
+                succeeded.append(name)
+            elif required:
+                failed.append(name)
+            else:
                 # Log the error but don't fail the message processing
-                logger.error("Failed to broadcast to WebSocket", error=str(e))
-                
-        # Send push notification to firefighters via FCM
+                logger.error("Best-effort step failed", step=name, error=repr(result))
+        
+        # Checkpoint before retrying, so the retry only redoes the failed steps
+        await self._record_steps(incident_id, succeeded)
+        
+        if failed:
+            raise StepFailed(f"Side effects failed: {', '.join(failed)}")
+    
+    async def _completed_steps(self, incident_id: int) -> Set[str]:
+        """
+        Read the ledger, treating it as empty when it is unavailable.
+        
+        Args:
+            incident_id: The incident ID
+            
+        Returns:
+            Names of the steps already completed
+        """
         try:
-            await push.send_push(
-                title="🔥 Incendie détecté",
-                body=f"Niv. {severity} – {lat:.3f},{lon:.3f}",
-                data={"incident_id": str(incident_id)},
-            )
+            return await self.ledger.completed(incident_id)
+        except Exception as e:
+            # At-least-once: redo every step rather than fail the message
+            logger.warning("Step ledger unavailable", incident_id=incident_id, error=str(e))
+            return set()
+    
+    async def _record_steps(self, incident_id: int, steps: List[str]) -> None:
+        """
+        Checkpoint completed steps, logging (not raising) ledger errors.
+        
+        Args:
+            incident_id: The incident ID
+            steps: Names of the steps that succeeded
+        """
+        if not steps:
+            return
+        try:
+            await self.ledger.record(incident_id, steps)
         except Exception as e:
-            # Log the error but don't fail the message processing
-            logger.error("Failed to send push notification", error=str(e))
+            logger.warning("Could not record completed steps", incident_id=incident_id, error=str(e))
+    
+    async def _run_step(self, name: str, step: Awaitable[Any], timeout: float) -> Any:
+        """
+        Await one side effect under its deadline and record its outcome.
+        
+        Args:
+            name: Step name, used as the metric label
+            step: The side effect coroutine
+            timeout: Deadline in seconds
+            
+        Returns:
+            Whatever the step returned
+            
+        Raises:
+            asyncio.TimeoutError: If the step missed its deadline
+            Exception: Whatever the step raised
+        """
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(step, timeout=timeout)
+        except asyncio.TimeoutError:
+            STEP_RESULTS.labels(step=name, outcome="timeout").inc()
+            logger.warning("Side effect timed out", step=name, timeout=timeout)
+            raise
+        except Exception:
+            STEP_RESULTS.labels(step=name, outcome="failure").inc()
+            raise
+        finally:
+            STEP_DURATION.labels(step=name).observe(time.perf_counter() - started)
+        
+        STEP_RESULTS.labels(step=name, outcome="success").inc()
+        return result
+    
+    async def _broadcast(self, event: IncidentValidated) -> None:
+        """
+        Fan the incident out to every API replica for its WebSocket clients.
+        
+        Real-time updates are only useful while fresh: the message is
+        transient and each replica's queue drops it after a short TTL.
+        
+        Args:
+            event: The decoded event
+        """
+        if self.broadcast_exchange is None:
+            raise RuntimeError("Broadcast exchange not declared")
+        
+        logger.info("Broadcasting incident to API replicas", incident_id=event.id)
+        await self.broadcast_exchange.publish(
+            aio_pika.Message(
+                body=encoder.encode(event),
+                delivery_mode=aio_pika.DeliveryMode.NOT_PERSISTENT,
+            ),
+            routing_key=""
+        )
+    
+    async def _send_fcm(self, incident_id: int, lat: float, lon: float, severity: int) -> None:
+        """
+        Send a push notification to firefighters via FCM.
+        
+        The notification goes out with the next FCM batch of the dispatcher
+        (possibly merged into a digest, with PUSH_COALESCE).
+        
+        Args:
+            incident_id: The incident ID
+            lat: Latitude coordinate
+            lon: Longitude coordinate
+            severity: Severity level (1-5)
+        """
+        if not settings.fcm_enabled:
+            logger.info("FCM disabled, push skipped", incident_id=incident_id)
+            return
+        
+        await self.push_dispatcher.send(
+            title="🔥 Incendie détecté",
+            body=f"Niv. {severity} – {lat:.3f},{lon:.3f}",
+            data={"incident_id": str(incident_id)},
+        )
     
     async def _simulate_push_notification(
         self, incident_id: int, lat: float, lon: float, severity: int
@@ -260,7 +856,7 @@ class IncidentConsumer:
             severity: Severity level (1-5)
         """
         # Simulate processing time for FCM API call
-        await asyncio.sleep(0.5)
+        await asyncio.sleep(settings.push_simulation_delay)
         
         # Log the notification
         logger.info(
@@ -272,35 +868,30 @@ class IncidentConsumer:
             notification_body=f"A level {severity} fire has been detected near you."
         )
     
-    async def _update_analytics(
-        self, incident_id: int, created_at: str, lat: float, lon: float, severity: int
-    ) -> None:
+    async def _update_analytics(self, event: IncidentValidated) -> None:
         """
-        Simulate updating analytics metrics.
+        Record the response times of an incident in the analytics sink.
         
-        In a production environment, this would update a database or
-        send events to an analytics service.
+        Returns once the row is committed (rows are batched with those of
+        other incidents processed at the same time).
         
         Args:
-            incident_id: The incident ID
-            created_at: Timestamp of incident creation
-            lat: Latitude coordinate
-            lon: Longitude coordinate
-            severity: Severity level (1-5)
+            event: The decoded event
         """
-        # Simulate processing time
-        await asyncio.sleep(0.2)
-        
-        # Create metrics data
-        metrics = {
-            "incident_id": incident_id,
-            "timestamp": created_at,
-            "location": {"lat": lat, "lon": lon},
-            "severity": severity,
-            "response_time_seconds": 0,  # Would be calculated in production
-        }
+        notified_at = datetime.utcnow()
+        created_at = _utc_naive(event.created_at)
+        validated_at = _utc_naive(event.validated_at) if event.validated_at else None
         
-        logger.info(
-            "Analytics metrics updated (simulated)",
-            **metrics
-        )
+        await self.analytics.write({
+            "incident_id": event.id,
+            "severity": event.severity,
+            "lat": event.lat,
+            "lon": event.lon,
+            "created_at": created_at,
+            "validated_at": validated_at,
+            "notified_at": notified_at,
+            "validation_seconds": (
+                (validated_at - created_at).total_seconds() if validated_at else None
+            ),
+            "notification_seconds": (notified_at - created_at).total_seconds(),
+        })
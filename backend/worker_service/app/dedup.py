@@ -0,0 +1,233 @@
+"""
+Index of events already processed, for idempotent consumption.
+
+Broker redeliveries, outbox re-publishes and retry copies can all deliver an
+event that was already fully processed. The consumer checks every delivery
+against this index first and acknowledges known events without running any
+side effect.
+
+Lookups hit a bounded in-process LRU first, so a hot duplicate is answered
+without I/O, then the shared processed_events table (PostgreSQL), whose rows
+expire after DEDUP_TTL_SECONDS and are purged periodically. A local run or a
+test keeps the index in memory only (DEDUP_STORE=memory).
+"""
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from prometheus_client import Counter
+from sqlalchemy import Column, DateTime, MetaData, String, Table, delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.config import settings
+
+metadata = MetaData()
+
+# Created by the backend migrations (20251023_0900_add_processed_events)
+processed_events = Table(
+    "processed_events",
+    metadata,
+    Column("event_key", String(100), primary_key=True),
+    Column("processed_at", DateTime, nullable=False),
+    Column("expires_at", DateTime, nullable=False, index=True),
+)
+
+DEDUP_LOOKUPS = Counter(
+    "worker_dedup_lookups_total",
+    "Idempotency lookups by where they were answered (cache, store or miss)",
+    ["result"],
+)
+DEDUP_PURGED = Counter(
+    "worker_dedup_purged_total",
+    "Expired entries removed from the processed_events table",
+)
+
+
+class EventStore(ABC):
+    """Durable record of processed event keys."""
+
+    @abstractmethod
+    async def contains(self, key: str) -> bool:
+        """
+        Check whether an event was processed and has not expired yet.
+
+        Args:
+            key: Idempotency key of the event
+
+        Returns:
+            bool: True if the event was processed
+        """
+
+    @abstractmethod
+    async def add(self, key: str, ttl: float) -> None:
+        """
+        Record an event as processed.
+
+        Args:
+            key: Idempotency key of the event
+            ttl: Seconds the record is kept
+        """
+
+    async def close(self) -> None:
+        """Release the resources held by the store."""
+
+
+class MemoryEventStore(EventStore):
+    """Store kept in process memory (lost on restart, not shared)."""
+
+    def __init__(self) -> None:
+        self._expiry: Dict[str, float] = {}
+
+    async def contains(self, key: str) -> bool:
+        expires = self._expiry.get(key)
+        if expires is None:
+            return False
+        if expires <= time.monotonic():
+            del self._expiry[key]
+            return False
+        return True
+
+    async def add(self, key: str, ttl: float) -> None:
+        self._expiry[key] = time.monotonic() + ttl
+
+
+class SqlEventStore(EventStore):
+    """Store backed by the processed_events table."""
+
+    def __init__(self, database_url: str, purge_interval: float = 300.0) -> None:
+        """
+        Initialize the store; the engine is created on first use.
+
+        Args:
+            database_url: SQLAlchemy async database URL
+            purge_interval: Minimum seconds between two purges of expired rows
+        """
+        self.database_url = database_url
+        self.purge_interval = purge_interval
+        self._engine: Optional[AsyncEngine] = None
+        self._last_purge = time.monotonic()
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self._engine = create_async_engine(self.database_url, pool_pre_ping=True)
+        return self._engine
+
+    async def contains(self, key: str) -> bool:
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                select(processed_events.c.event_key).where(
+                    processed_events.c.event_key == key,
+                    processed_events.c.expires_at > datetime.utcnow(),
+                )
+            )
+            return result.first() is not None
+
+    async def add(self, key: str, ttl: float) -> None:
+        now = datetime.utcnow()
+        row = {"event_key": key, "processed_at": now, "expires_at": now + timedelta(seconds=ttl)}
+
+        # An expired row for the same key is refreshed rather than duplicated
+        dialect = postgresql if self.engine.dialect.name == "postgresql" else sqlite
+        statement = dialect.insert(processed_events).values(row)
+        statement = statement.on_conflict_do_update(
+            index_elements=[processed_events.c.event_key],
+            set_={"processed_at": now, "expires_at": row["expires_at"]},
+        )
+        async with self.engine.begin() as conn:
+            await conn.execute(statement)
+            if time.monotonic() - self._last_purge >= self.purge_interval:
+                self._last_purge = time.monotonic()
+                result = await conn.execute(
+                    delete(processed_events).where(processed_events.c.expires_at <= now)
+                )
+                DEDUP_PURGED.inc(max(result.rowcount or 0, 0))
+
+    async def close(self) -> None:
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+
+
+class ProcessedEvents:
+    """Bounded LRU of processed events in front of a durable store."""
+
+    def __init__(self, store: EventStore, cache_size: int = 10000, ttl: float = 86400.0) -> None:
+        """
+        Initialize the index.
+
+        Args:
+            store: Durable store shared by the worker replicas
+            cache_size: Keys kept in the in-process LRU
+            ttl: Seconds an event is remembered
+        """
+        self.store = store
+        self.cache_size = cache_size
+        self.ttl = ttl
+        # Key -> monotonic expiry, least recently used first
+        self._cache: "OrderedDict[str, float]" = OrderedDict()
+
+    def _remember(self, key: str, expires: float) -> None:
+        self._cache[key] = expires
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def seen(self, key: str) -> bool:
+        """
+        Check whether an event was already processed.
+
+        Args:
+            key: Idempotency key of the event
+
+        Returns:
+            bool: True if the event was processed
+        """
+        expires = self._cache.get(key)
+        if expires is not None:
+            if expires > time.monotonic():
+                self._cache.move_to_end(key)
+                DEDUP_LOOKUPS.labels(result="cache").inc()
+                return True
+            del self._cache[key]
+
+        if await self.store.contains(key):
+            # The remaining lifetime is unknown; outliving the row locally only
+            # suppresses duplicates of a processed event for longer
+            self._remember(key, time.monotonic() + self.ttl)
+            DEDUP_LOOKUPS.labels(result="store").inc()
+            return True
+
+        DEDUP_LOOKUPS.labels(result="miss").inc()
+        return False
+
+    async def mark(self, key: str) -> None:
+        """
+        Record an event as processed, locally and in the store.
+
+        Args:
+            key: Idempotency key of the event
+        """
+        self._remember(key, time.monotonic() + self.ttl)
+        await self.store.add(key, self.ttl)
+
+    async def close(self) -> None:
+        """Close the durable store."""
+        await self.store.close()
+
+
+def create_processed_events() -> ProcessedEvents:
+    """
+    Build the index selected by the DEDUP_* settings.
+
+    Returns:
+        ProcessedEvents: The configured index
+    """
+    if settings.dedup_store == "memory":
+        store: EventStore = MemoryEventStore()
+    else:
+        store = SqlEventStore(settings.database_url)
+    return ProcessedEvents(store, settings.dedup_cache_size, settings.dedup_ttl_seconds)
@@ -0,0 +1,405 @@
+"""
+Dead-letter queue inspection and replay tool.
+
+Usage:
+    python -m app.dlq list   [--queue incident.validated] [filters] [--limit N]
+    python -m app.dlq replay [--queue incident.validated] [filters] [--limit N]
+                             [--rate 50] [--batch-size 100] [--dry-run]
+
+Filters:
+    --incident-id ID   (repeatable) only messages of these incidents
+    --error REGEX      only messages whose last error matches
+    --older-than SEC   only messages dead-lettered at least SEC seconds ago
+    --newer-than SEC   only messages dead-lettered at most SEC seconds ago
+
+Messages are fetched one by one with basic.get, up to the number the DLQ
+held when the run started, so every message is seen once. Replayed messages
+are published to their original queue with a reset retry count, in batches
+of --batch-size paced to --rate messages per second, and removed from the
+DLQ only once the broker has confirmed the republish. Every other message
+(not matching, or whose republish failed) is settled as soon as it is seen:
+a copy with the same headers and timestamp is appended to the DLQ, then the
+original is acknowledged. At most one batch is unacknowledged at a time, so
+a slow replay never reaches the broker's consumer_timeout.
+
+list and --dry-run do not modify the DLQ: they hold the messages they read
+unacknowledged (they are not rate limited) and reject them with requeue at
+the end.
+"""
+import argparse
+import asyncio
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import aio_pika
+import msgspec
+from aio_pika.abc import AbstractChannel, AbstractIncomingMessage
+from structlog import get_logger
+
+from app.config import settings
+from app.consumers import DLQ_ERROR_HEADER
+from app.events import encoder
+from app.log_config import configure_logging
+
+logger = get_logger("dlq")
+
+DEFAULT_RATE = 50.0
+DEFAULT_BATCH_SIZE = 100
+
+
+def describe(message: AbstractIncomingMessage) -> Dict[str, Any]:
+    """
+    Summarize a dead-lettered message.
+
+    Args:
+        message: Message fetched from the DLQ
+
+    Returns:
+        Incident id, error, retry count, dead-letter time and age in seconds
+        (None for what the message does not carry)
+    """
+    headers = message.headers or {}
+    try:
+        incident_id = msgspec.json.decode(message.body).get("id")
+    except (msgspec.DecodeError, AttributeError):
+        incident_id = None
+
+    dead_lettered_at = message.timestamp
+    if dead_lettered_at is not None and dead_lettered_at.tzinfo is None:
+        dead_lettered_at = dead_lettered_at.replace(tzinfo=timezone.utc)
+    age = (
+        (datetime.now(timezone.utc) - dead_lettered_at).total_seconds()
+        if dead_lettered_at is not None else None
+    )
+
+    return {
+        "incident_id": incident_id,
+        "error": headers.get(DLQ_ERROR_HEADER),
+        "retry_count": headers.get("x-retry-count"),
+        "original_queue": headers.get("x-original-queue"),
+        "dead_lettered_at": dead_lettered_at.isoformat() if dead_lettered_at else None,
+        "age_seconds": round(age, 1) if age is not None else None,
+    }
+
+
+class DeadLetterFilter:
+    """Selects dead-lettered messages by incident, error and age."""
+
+    def __init__(
+        self,
+        incident_ids: Optional[Sequence[int]] = None,
+        error: Optional[str] = None,
+        older_than: Optional[float] = None,
+        newer_than: Optional[float] = None,
+    ) -> None:
+        """
+        Initialize the filter; criteria left to None match everything.
+
+        Args:
+            incident_ids: Incidents to keep
+            error: Regular expression searched in the last error
+            older_than: Minimum age in seconds
+            newer_than: Maximum age in seconds
+        """
+        self.incident_ids = set(incident_ids) if incident_ids else None
+        self.error = re.compile(error) if error else None
+        self.older_than = older_than
+        self.newer_than = newer_than
+
+    def matches(self, info: Dict[str, Any]) -> bool:
+        """
+        Check a message summary (see describe) against every criterion.
+
+        Args:
+            info: Message summary
+
+        Returns:
+            bool: True if the message is selected
+        """
+        if self.incident_ids is not None and info["incident_id"] not in self.incident_ids:
+            return False
+        if self.error is not None and not self.error.search(info["error"] or ""):
+            return False
+        age = info["age_seconds"]
+        if self.older_than is not None and (age is None or age < self.older_than):
+            return False
+        if self.newer_than is not None and (age is None or age > self.newer_than):
+            return False
+        return True
+
+
+class RateLimiter:
+    """Paces batches so that at most `rate` messages are sent per second."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+
+    async def wait(self, count: int) -> None:
+        """
+        Wait for the right to send `count` messages.
+
+        Args:
+            count: Size of the next batch
+        """
+        now = time.monotonic()
+        if self._next > now:
+            await asyncio.sleep(self._next - now)
+        self._next = max(self._next, now) + count * self.interval
+
+
+async def scan(
+    channel: AbstractChannel, dlq_name: str, limit: Optional[int] = None
+) -> AsyncIterator[AbstractIncomingMessage]:
+    """
+    Fetch the messages of a DLQ without acknowledging them.
+
+    Args:
+        channel: Channel to fetch on (messages stay unacked on it)
+        dlq_name: Dead-letter queue name
+        limit: Maximum number of messages to fetch
+
+    Yields:
+        Each message present when the scan started, once (messages moved to
+        the tail of the queue during the scan are not fetched again)
+    """
+    queue = await channel.declare_queue(dlq_name, passive=True)
+    total = queue.declaration_result.message_count
+    if limit is not None:
+        total = min(total, limit)
+    fetched = 0
+    while fetched < total:
+        message = await queue.get(no_ack=False, fail=False)
+        if message is None:
+            return
+        fetched += 1
+        yield message
+
+
+async def _return_to_dlq(
+    channel: AbstractChannel, message: AbstractIncomingMessage, dlq_name: str
+) -> None:
+    """
+    Move a message to the tail of the DLQ: publish a confirmed copy, then ack it.
+
+    A copy that cannot be published leaves the original in the DLQ (rejected
+    with requeue).
+    """
+    try:
+        await channel.default_exchange.publish(
+            aio_pika.Message(
+                body=message.body,
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                headers=dict(message.headers or {}),
+                # Keeps the dead-letter time used by the age filters
+                timestamp=message.timestamp,
+                content_type=message.content_type,
+                message_id=message.message_id,
+            ),
+            routing_key=dlq_name,
+            mandatory=True,
+        )
+    except Exception as e:
+        logger.error("Could not move message to the DLQ tail, requeued", error=str(e))
+        await message.reject(requeue=True)
+    else:
+        await message.ack()
+
+
+async def _republish(
+    channel: AbstractChannel, batch: List[AbstractIncomingMessage], default_queue: str
+) -> List[AbstractIncomingMessage]:
+    """
+    Republish a batch with confirms, then remove the confirmed messages from the DLQ.
+
+    Messages are published as mandatory: otherwise the broker confirms a
+    message whose queue no longer exists (removed regional queue, shard queue
+    after a SHARD_COUNT change) and the DLQ copy would be lost. Such a
+    message is returned and kept in the DLQ as a failed republish.
+
+    Returns:
+        The messages whose republish was not confirmed (still unacked)
+    """
+    async def republish(message: AbstractIncomingMessage) -> None:
+        headers = dict(message.headers or {})
+        target = headers.pop("x-original-queue", None) or default_queue
+        headers.pop(DLQ_ERROR_HEADER, None)
+        headers["x-retry-count"] = 0
+        headers["x-replayed-at"] = datetime.now(timezone.utc).isoformat()
+        await channel.default_exchange.publish(
+            aio_pika.Message(
+                body=message.body,
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                headers=headers,
+            ),
+            routing_key=target,
+            mandatory=True,
+        )
+
+    results = await asyncio.gather(*(republish(message) for message in batch), return_exceptions=True)
+    failed = []
+    for message, result in zip(batch, results):
+        if isinstance(result, BaseException):
+            logger.error("Republish not confirmed, kept in DLQ", error=str(result))
+            failed.append(message)
+        else:
+            await message.ack()
+    return failed
+
+
+async def replay(
+    channel: AbstractChannel,
+    queue_name: str,
+    selection: DeadLetterFilter,
+    rate: float = DEFAULT_RATE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    limit: Optional[int] = None,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """
+    Republish the selected messages of a queue's DLQ.
+
+    Only the current batch is held unacknowledged: other messages are moved
+    to the tail of the DLQ as soon as they are seen (held until the end in
+    dry-run mode, which leaves the DLQ untouched).
+
+    Args:
+        channel: Channel in publisher-confirm mode
+        queue_name: Primary queue (its DLQ is "<queue_name>.dlq")
+        selection: Messages to replay
+        rate: Maximum messages republished per second (0 = unlimited)
+        batch_size: Messages republished (and confirmed) together
+        limit: Maximum number of DLQ messages to scan
+        dry_run: Only report what would be replayed
+
+    Returns:
+        Counts of scanned, matched and replayed messages
+    """
+    dlq_name = f"{queue_name}.dlq"
+    limiter = RateLimiter(rate)
+    held: List[AbstractIncomingMessage] = []
+    batch: List[AbstractIncomingMessage] = []
+    counts = {"scanned": 0, "matched": 0, "replayed": 0}
+
+    async def keep(message: AbstractIncomingMessage) -> None:
+        if dry_run:
+            held.append(message)
+        else:
+            await _return_to_dlq(channel, message, dlq_name)
+
+    async def send(batch: List[AbstractIncomingMessage]) -> None:
+        await limiter.wait(len(batch))
+        failed = await _republish(channel, batch, queue_name)
+        for message in failed:
+            await keep(message)
+        counts["replayed"] += len(batch) - len(failed)
+        logger.info("Replayed batch", size=len(batch), total=counts["replayed"])
+
+    async for message in scan(channel, dlq_name, limit):
+        counts["scanned"] += 1
+        if not selection.matches(describe(message)):
+            await keep(message)
+            continue
+        counts["matched"] += 1
+        if dry_run:
+            held.append(message)
+            continue
+        batch.append(message)
+        if len(batch) >= batch_size:
+            await send(batch)
+            batch = []
+    if batch:
+        await send(batch)
+
+    # Dry run: give the messages back untouched
+    for message in held:
+        await message.reject(requeue=True)
+    return counts
+
+
+async def list_messages(
+    channel: AbstractChannel,
+    queue_name: str,
+    selection: DeadLetterFilter,
+    limit: Optional[int] = None,
+) -> int:
+    """
+    Print the selected messages of a queue's DLQ as JSON lines, leaving them in place.
+
+    Args:
+        channel: Channel to fetch on
+        queue_name: Primary queue (its DLQ is "<queue_name>.dlq")
+        selection: Messages to print
+        limit: Maximum number of DLQ messages to scan
+
+    Returns:
+        int: Number of messages printed
+    """
+    held: List[AbstractIncomingMessage] = []
+    printed = 0
+    async for message in scan(channel, f"{queue_name}.dlq", limit):
+        held.append(message)
+        info = describe(message)
+        if selection.matches(info):
+            print(encoder.encode(info).decode())
+            printed += 1
+    for message in held:
+        await message.reject(requeue=True)
+    return printed
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command-line interface of the tool."""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.dlq",
+        description="Inspect and replay dead-lettered incident events.",
+    )
+    parser.add_argument("command", choices=("list", "replay"))
+    parser.add_argument("--queue", default=settings.queue_name, help="Primary queue whose DLQ is read")
+    parser.add_argument("--incident-id", type=int, action="append", dest="incident_ids", help="Incident id (repeatable)")
+    parser.add_argument("--error", help="Regular expression matched against the last error")
+    parser.add_argument("--older-than", type=float, help="Minimum age in seconds")
+    parser.add_argument("--newer-than", type=float, help="Maximum age in seconds")
+    parser.add_argument("--limit", type=int, help="Maximum number of DLQ messages scanned")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Messages replayed per second (0 = unlimited)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Messages confirmed together")
+    parser.add_argument("--dry-run", action="store_true", help="Count matching messages without replaying them")
+    return parser
+
+
+async def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Run the tool."""
+    args = build_parser().parse_args(argv)
+    selection = DeadLetterFilter(args.incident_ids, args.error, args.older_than, args.newer_than)
+
+    connection = await aio_pika.connect_robust(settings.rabbitmq_url)
+    try:
+        # Returned (unroutable) mandatory messages fail their publish
+        channel = await connection.channel(publisher_confirms=True, on_return_raises=True)
+        if args.command == "list":
+            printed = await list_messages(channel, args.queue, selection, args.limit)
+            logger.info("Listed dead-lettered messages", matching=printed)
+        else:
+            counts = await replay(
+                channel,
+                args.queue,
+                selection,
+                rate=args.rate,
+                batch_size=args.batch_size,
+                limit=args.limit,
+                dry_run=args.dry_run,
+            )
+            logger.info("Replay finished", dry_run=args.dry_run, **counts)
+    finally:
+        await connection.close()
+
+
+if __name__ == "__main__":
+    configure_logging()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -0,0 +1,32 @@
+"""
+Event models consumed by the worker service.
+
+Copy of the Structs in backend/app/core/events.py (the two services ship as
+separate packages both named `app`, so the worker cannot import them). Keep
+both files in sync; the versioned "event" tag guards against silent drift.
+"""
+from datetime import datetime
+from typing import Optional
+
+import msgspec
+
+
+class IncidentValidated(
+    msgspec.Struct,
+    tag_field="event",
+    tag="incident.validated.v1",
+    frozen=True,
+    kw_only=True,
+):
+    """Event emitted by the backend when an incident is validated as a fire."""
+    id: int  # Incident ID
+    lat: float  # Latitude coordinate
+    lon: float  # Longitude coordinate
+    created_at: datetime  # Incident creation timestamp
+    severity: Optional[int] = None  # Severity level (1-5)
+    validated_at: Optional[datetime] = None  # Validation timestamp (absent in older events)
+
+
+# Cached codec instances, shared by every message
+encoder = msgspec.json.Encoder()
+incident_validated_decoder = msgspec.json.Decoder(IncidentValidated)
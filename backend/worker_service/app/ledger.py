@@ -0,0 +1,134 @@
+"""
+Per-incident ledger of completed side effects.
+
+A message is retried as a whole when one of its side effects fails, and the
+broker may deliver the same event more than once. The ledger records which
+steps already succeeded for an incident so a retry only redoes the failed
+steps and a duplicate delivery does nothing.
+
+Two stores are available: the incident_step_ledger table in PostgreSQL
+(shared by every worker replica) and an in-process dict for local runs and
+tests.
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.config import settings
+
+metadata = MetaData()
+
+# Created by the backend migrations (20251021_0900_add_incident_step_ledger)
+incident_step_ledger = Table(
+    "incident_step_ledger",
+    metadata,
+    Column("incident_id", Integer, primary_key=True),
+    Column("step", String(50), primary_key=True),
+    Column("completed_at", DateTime, nullable=False, server_default=func.now()),
+)
+
+
+class StepLedger(ABC):
+    """Records completed side effects per incident."""
+
+    @abstractmethod
+    async def completed(self, incident_id: int) -> Set[str]:
+        """
+        Get the steps already completed for an incident.
+
+        Args:
+            incident_id: The incident ID
+
+        Returns:
+            Names of the completed steps
+        """
+
+    @abstractmethod
+    async def record(self, incident_id: int, steps: Iterable[str]) -> None:
+        """
+        Mark steps as completed for an incident.
+
+        Args:
+            incident_id: The incident ID
+            steps: Names of the steps that succeeded
+        """
+
+    async def close(self) -> None:
+        """Release the resources held by the store."""
+
+
+class MemoryStepLedger(StepLedger):
+    """Ledger kept in process memory (lost on restart, not shared)."""
+
+    def __init__(self) -> None:
+        self._steps: Dict[int, Set[str]] = {}
+
+    async def completed(self, incident_id: int) -> Set[str]:
+        return set(self._steps.get(incident_id, ()))
+
+    async def record(self, incident_id: int, steps: Iterable[str]) -> None:
+        self._steps.setdefault(incident_id, set()).update(steps)
+
+
+class SqlStepLedger(StepLedger):
+    """Ledger stored in the incident_step_ledger table."""
+
+    def __init__(self, database_url: str) -> None:
+        """
+        Initialize the ledger; the engine is created on first use.
+
+        Args:
+            database_url: SQLAlchemy async database URL
+        """
+        self.database_url = database_url
+        self._engine: Optional[AsyncEngine] = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self._engine = create_async_engine(self.database_url, pool_pre_ping=True)
+        return self._engine
+
+    async def completed(self, incident_id: int) -> Set[str]:
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                select(incident_step_ledger.c.step).where(
+                    incident_step_ledger.c.incident_id == incident_id
+                )
+            )
+            return set(result.scalars().all())
+
+    async def record(self, incident_id: int, steps: Iterable[str]) -> None:
+        rows = [
+            {"incident_id": incident_id, "step": step, "completed_at": datetime.utcnow()}
+            for step in steps
+        ]
+        if not rows:
+            return
+
+        # Concurrent duplicates may record the same step: keep the first one
+        dialect = postgresql if self.engine.dialect.name == "postgresql" else sqlite
+        statement = dialect.insert(incident_step_ledger).values(rows).on_conflict_do_nothing()
+        async with self.engine.begin() as conn:
+            await conn.execute(statement)
+
+    async def close(self) -> None:
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+
+
+def create_step_ledger() -> StepLedger:
+    """
+    Build the ledger selected by the STEP_LEDGER setting.
+
+    Returns:
+        StepLedger: The configured store
+    """
+    if settings.step_ledger == "memory":
+        return MemoryStepLedger()
+    return SqlStepLedger(settings.database_url)
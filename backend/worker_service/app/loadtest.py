@@ -0,0 +1,262 @@
+"""
+Load generator measuring the throughput of the worker pipeline.
+
+Usage:
+    python -m app.loadtest [--count 1000] [--rate 200] [--first-id ID]
+                           [--routing-key incident.validated.load.{severity}]
+                           [--timeout 60]
+
+Publishes --count synthetic IncidentValidated events to the incident.events
+exchange at --rate events per second, stamping each one, then collects the
+completion reports the worker publishes on COMPLETION_EXCHANGE (set it on the
+worker too) and prints one JSON report: outcomes, throughput and end-to-end
+latency percentiles, from the publish to the end of processing as stamped by
+the worker (run both on the same host, the two clocks are compared).
+
+Event ids start at --first-id (by default derived from the current time) so
+that the worker's dedup index does not skip the events of a previous run.
+
+Reproducible offline run against a local broker, side effects stubbed out:
+
+    COMPLETION_EXCHANGE=incident.loadtest PUSH_SIMULATION_DELAY=0 FCM_ENABLED=false \\
+    ANALYTICS_SINK=none STEP_LEDGER=memory DEDUP_STORE=memory python -m app.main
+"""
+import argparse
+import asyncio
+import math
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import aio_pika
+import msgspec
+from aio_pika.abc import AbstractChannel, AbstractIncomingMessage
+from structlog import get_logger
+
+from app.config import settings
+from app.consumers import EVENTS_EXCHANGE, PARTITION_HEADER
+from app.dlq import RateLimiter
+from app.events import IncidentValidated, encoder
+from app.log_config import configure_logging
+
+logger = get_logger("loadtest")
+
+DEFAULT_COUNT = 1000
+DEFAULT_RATE = 200.0
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_ROUTING_KEY = "incident.validated.load.{severity}"
+DEFAULT_COMPLETION_EXCHANGE = "incident.loadtest"
+PERCENTILES = (50, 90, 95, 99)
+
+# Outcomes after which the worker is done with a delivery ("retry" comes back)
+FINAL_OUTCOMES = ("success", "duplicate", "dlq")
+
+
+def synthetic_event(incident_id: int, validated_at: datetime) -> IncidentValidated:
+    """
+    Build a plausible event, the same for a given id on every run.
+
+    Args:
+        incident_id: Incident ID (seeds the coordinates and severity)
+        validated_at: Validation timestamp
+
+    Returns:
+        IncidentValidated: The event
+    """
+    rng = random.Random(incident_id)
+    return IncidentValidated(
+        id=incident_id,
+        lat=rng.uniform(43.0, 50.0),
+        lon=rng.uniform(-1.0, 7.0),
+        created_at=validated_at - timedelta(seconds=rng.uniform(30, 600)),
+        severity=rng.randint(1, 5),
+        validated_at=validated_at,
+    )
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Nearest-rank percentile.
+
+    Args:
+        values: Sorted values
+        q: Percentile, between 0 and 100
+
+    Returns:
+        float: The percentile (0.0 when there are no values)
+    """
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+def summarize(
+    sent: Dict[int, float], finished: Dict[int, Tuple[float, str]], retries: int
+) -> Dict[str, Any]:
+    """
+    Build the report of a run.
+
+    Args:
+        sent: Publish time (epoch seconds) per incident id
+        finished: Worker completion time and final outcome per incident id
+        retries: Deliveries the worker sent to a retry queue
+
+    Returns:
+        Counts, throughput and latency percentiles in milliseconds
+    """
+    latencies = sorted(
+        (finished_at - sent[incident_id]) * 1000
+        for incident_id, (finished_at, _) in finished.items()
+    )
+    outcomes: Dict[str, int] = {}
+    for _, outcome in finished.values():
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    first_sent = min(sent.values(), default=0.0)
+    publish_span = max(sent.values(), default=0.0) - first_sent
+    span = max((finished_at for finished_at, _ in finished.values()), default=first_sent) - first_sent
+
+    latency = {f"p{q}": round(percentile(latencies, q), 1) for q in PERCENTILES}
+    latency["max"] = round(latencies[-1], 1) if latencies else 0.0
+    latency["mean"] = round(sum(latencies) / len(latencies), 1) if latencies else 0.0
+
+    return {
+        "sent": len(sent),
+        "completed": len(finished),
+        "missing": len(sent) - len(finished),
+        "outcomes": outcomes,
+        "retries": retries,
+        "publish_rate_per_second": round(len(sent) / publish_span, 1) if publish_span > 0 else None,
+        "throughput_per_second": round(len(finished) / span, 1) if span > 0 else None,
+        "duration_seconds": round(span, 3),
+        "latency_ms": latency,
+    }
+
+
+async def run(
+    channel: AbstractChannel,
+    count: int = DEFAULT_COUNT,
+    rate: float = DEFAULT_RATE,
+    first_id: int = 1,
+    routing_key: str = DEFAULT_ROUTING_KEY,
+    timeout: float = DEFAULT_TIMEOUT,
+    completion_exchange: str = DEFAULT_COMPLETION_EXCHANGE,
+) -> Dict[str, Any]:
+    """
+    Publish synthetic events and wait for the worker to finish them.
+
+    Args:
+        channel: Channel used to publish and to read the completion reports
+        count: Number of events
+        rate: Events published per second (0 = as fast as possible)
+        first_id: Incident id of the first event (ids are consecutive)
+        routing_key: Routing key template ({severity} is substituted)
+        timeout: Seconds to wait for reports after the last publish
+        completion_exchange: Fanout exchange the worker reports on
+
+    Returns:
+        The report (see summarize)
+    """
+    sent: Dict[int, float] = {}
+    finished: Dict[int, Tuple[float, str]] = {}
+    retries = 0
+    all_done = asyncio.Event()
+
+    async def on_report(message: AbstractIncomingMessage) -> None:
+        nonlocal retries
+        try:
+            report = msgspec.json.decode(message.body)
+            incident_id, outcome = report["id"], report["outcome"]
+        except (msgspec.DecodeError, KeyError, TypeError):
+            return
+        if incident_id not in sent or incident_id in finished:
+            return
+        if outcome not in FINAL_OUTCOMES:
+            retries += 1
+            return
+        finished[incident_id] = (report["finished_at"], outcome)
+        if len(finished) == count:
+            all_done.set()
+
+    # Listen before publishing so no report is missed
+    reports = await channel.declare_exchange(completion_exchange, type=aio_pika.ExchangeType.FANOUT)
+    queue = await channel.declare_queue(exclusive=True, auto_delete=True)
+    await queue.bind(reports)
+    await queue.consume(on_report, no_ack=True)
+
+    events = await channel.declare_exchange(EVENTS_EXCHANGE, type=aio_pika.ExchangeType.TOPIC, durable=True)
+    limiter = RateLimiter(rate)
+    publishes = []
+    for incident_id in range(first_id, first_id + count):
+        await limiter.wait(1)
+        event = synthetic_event(incident_id, datetime.utcnow())
+        sent[incident_id] = time.time()
+        publishes.append(asyncio.create_task(events.publish(
+            aio_pika.Message(
+                body=encoder.encode(event),
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                headers={PARTITION_HEADER: str(incident_id)},
+            ),
+            routing_key=routing_key.format(severity=event.severity),
+        )))
+    await asyncio.gather(*publishes)
+    logger.info("Events published", count=count)
+
+    try:
+        await asyncio.wait_for(all_done.wait(), timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Timed out waiting for the worker", missing=count - len(finished))
+    return summarize(sent, finished, retries)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command-line interface of the tool."""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.loadtest",
+        description="Measure worker throughput and end-to-end latency with synthetic incidents.",
+    )
+    parser.add_argument("--count", type=int, default=DEFAULT_COUNT, help="Number of events published")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Events per second (0 = unlimited)")
+    parser.add_argument("--first-id", type=int, help="Incident id of the first event (default: from the clock)")
+    parser.add_argument("--routing-key", default=DEFAULT_ROUTING_KEY, help="Routing key template ({severity})")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds to wait after the last publish")
+    parser.add_argument(
+        "--completion-exchange",
+        default=settings.completion_exchange or DEFAULT_COMPLETION_EXCHANGE,
+        help="Exchange the worker reports completions on (its COMPLETION_EXCHANGE)",
+    )
+    return parser
+
+
+async def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Run the tool."""
+    args = build_parser().parse_args(argv)
+    # Milliseconds wrap within the int32 range; a run of N events at <= 1000/s
+    # takes N ms or more, so consecutive runs do not reuse ids
+    first_id = args.first_id if args.first_id is not None else int(time.time() * 1000) % 2**31
+
+    connection = await aio_pika.connect_robust(settings.rabbitmq_url)
+    try:
+        channel = await connection.channel()
+        report = await run(
+            channel,
+            count=args.count,
+            rate=args.rate,
+            first_id=first_id,
+            routing_key=args.routing_key,
+            timeout=args.timeout,
+            completion_exchange=args.completion_exchange,
+        )
+    finally:
+        await connection.close()
+    print(encoder.encode(report).decode())
+
+
+if __name__ == "__main__":
+    configure_logging()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -4,13 +4,18 @@ Main entry point for the GreenSentinel Worker Service.
 import asyncio
 import signal
 import sys
-from typing import Dict, Set
+from typing import List, Optional
 
 from structlog import get_logger
 
 from app.config import settings
-from app.consumers import IncidentConsumer
+from app.consumers import IncidentConsumer, assigned_shards
+from app.analytics import create_analytics_sink
+from app.dedup import create_processed_events
+from app.ledger import create_step_ledger
+from app.push import create_push_dispatcher
 from app.log_config import configure_logging
+from app.supervisor import SHUTDOWN_GRACE, Supervisor, resolve_process_count
 
 
 # Configure structured logging
@@ -24,28 +29,82 @@ class WorkerService:
     Handles graceful startup and shutdown.
     """
 
-    def __init__(self) -> None:
-        """Initialize the worker service."""
-        self.incident_consumer = IncidentConsumer(settings.rabbitmq_url)
+    def __init__(self, consumers: int = 1, shards: Optional[List[int]] = None) -> None:
+        """
+        Initialize the worker service.
+        
+        Args:
+            consumers: Number of consumer tasks, each with its own connection
+            shards: Shards to consume serially, one consumer each (partitioned
+                mode; replaces the consumers of QUEUE_NAME)
+        """
+        # Consumers of one process share the step ledger, the analytics sink,
+        # the dedup index and the push dispatcher (and their pools), so
+        # analytics and FCM batches span every consumer and a duplicate is
+        # caught whichever consumer gets it
+        ledger = create_step_ledger()
+        analytics = create_analytics_sink()
+        processed = create_processed_events()
+        pushes = create_push_dispatcher()
+        # Closed once every consumer has drained (pushes and analytics flush first)
+        self.resources = [pushes, analytics, ledger, processed]
+        if shards is not None:
+            self.consumers = [
+                IncidentConsumer(
+                    settings.rabbitmq_url,
+                    ledger=ledger,
+                    shard=shard,
+                    analytics=analytics,
+                    processed=processed,
+                    push_dispatcher=pushes,
+                )
+                for shard in shards
+            ]
+        else:
+            self.consumers = [
+                IncidentConsumer(
+                    settings.rabbitmq_url,
+                    ledger=ledger,
+                    analytics=analytics,
+                    processed=processed,
+                    push_dispatcher=pushes,
+                )
+                for _ in range(consumers)
+            ]
         self.shutdown_event = asyncio.Event()
         
     async def start(self) -> None:
         """Start all consumers and wait for shutdown signal."""
         try:
-            # Start the incident consumer
-            logger.info("Starting GreenSentinel Worker Service", worker_name=settings.worker_name)
+            # Start the incident consumers
+            logger.info(
+                "Starting GreenSentinel Worker Service",
+                worker_name=settings.worker_name,
+                consumers=len(self.consumers),
+            )
             
-            consumer_task = asyncio.create_task(self.incident_consumer.start_consuming())
+            consumer_tasks = [
+                asyncio.create_task(consumer.start_consuming()) for consumer in self.consumers
+            ]
+            shutdown_task = asyncio.create_task(self.shutdown_event.wait())
             
-            # Wait for shutdown signal
-            await self.shutdown_event.wait()
+            # Wait for shutdown signal, or for a consumer to fail
+            done, _ = await asyncio.wait(
+                [shutdown_task, *consumer_tasks], return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in consumer_tasks:
+                if task in done and task.exception() is not None:
+                    raise task.exception()
             
-            # Stop the incident consumer
+            # Stop consuming and drain in-flight messages
             logger.info("Shutting down consumers")
-            await self.incident_consumer.stop_consuming()
+            await asyncio.gather(*(consumer.stop_consuming() for consumer in self.consumers))
+            
+            # Wait for consumer tasks to complete
+            await asyncio.gather(*consumer_tasks)
             
-            # Wait for consumer task to complete
-            await consumer_task
+            # Flush and release the shared resources, now that nothing uses them
+            await self.close_resources()
             
             logger.info("Worker service shutdown complete")
             
@@ -53,15 +112,33 @@ class WorkerService:
             logger.error("Error in worker service", error=str(e))
             sys.exit(1)
     
+    async def close_resources(self) -> None:
+        """Close the resources shared by the consumers, once, in order."""
+        for resource in self.resources:
+            try:
+                await resource.close()
+            except Exception as e:
+                logger.error(
+                    "Could not close worker resource",
+                    resource=type(resource).__name__,
+                    error=str(e),
+                )
+    
     def signal_shutdown(self) -> None:
         """Signal the worker to shut down gracefully."""
         logger.info("Shutdown signal received")
         self.shutdown_event.set()
 
 
-async def main() -> None:
-    """Main entry point for the worker service."""
-    worker = WorkerService()
+async def main(consumers: int = 1, shards: Optional[List[int]] = None) -> None:
+    """
+    Run the consumers of one worker process.
+    
+    Args:
+        consumers: Number of consumer tasks in this process
+        shards: Shards consumed by this process, in partitioned mode
+    """
+    worker = WorkerService(consumers, shards)
     
     # Set up signal handlers
     loop = asyncio.get_running_loop()
@@ -80,5 +157,30 @@ async def main() -> None:
     await worker.start()
 
 
+def run_worker_process(index: int) -> None:
+    """
+    Entry point of a supervised child process.
+    
+    Args:
+        index: Child index, used to name the worker in logs
+    """
+    # Forget the supervisor's handlers; main() installs its own
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    settings.worker_name = f"{settings.worker_name}-{index}"
+    
+    shards = None
+    if settings.shard_count > 0:
+        processes = resolve_process_count(settings.worker_processes)
+        shards = assigned_shards(settings.shard_count, settings.shards, index, processes)
+    asyncio.run(main(settings.consumers_per_process, shards))
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    Supervisor(
+        run_worker_process,
+        processes=resolve_process_count(settings.worker_processes),
+        restart_delay=settings.restart_delay,
+        shutdown_timeout=settings.drain_timeout + SHUTDOWN_GRACE,
+        metrics_port=settings.metrics_port,
+    ).run()
@@ -0,0 +1,64 @@
+"""
+Prometheus /metrics endpoint of the worker service.
+
+Worker processes record their metrics in PROMETHEUS_MULTIPROC_DIR (one file
+per process); the supervisor serves /metrics on METRICS_PORT and aggregates
+every process with prometheus_client's multiprocess collector. Gauges
+therefore declare how to combine processes (multiprocess_mode).
+"""
+import glob
+import os
+import tempfile
+
+from prometheus_client import CollectorRegistry, multiprocess, start_http_server
+from structlog import get_logger
+
+logger = get_logger("metrics")
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+
+def prepare_multiprocess_dir() -> str:
+    """
+    Create (or empty) the directory shared by the worker processes' metrics.
+
+    Must run before the worker processes start: they read the variable when
+    importing prometheus_client.
+
+    Returns:
+        str: The directory, also exported in PROMETHEUS_MULTIPROC_DIR
+    """
+    path = os.environ.get(MULTIPROC_DIR_ENV)
+    if not path:
+        path = tempfile.mkdtemp(prefix="greensentinel-worker-metrics-")
+        os.environ[MULTIPROC_DIR_ENV] = path
+    os.makedirs(path, exist_ok=True)
+
+    # Files of a previous run would be added to the new counters
+    for stale in glob.glob(os.path.join(path, "*.db")):
+        os.remove(stale)
+    return path
+
+
+def start_metrics_server(port: int) -> None:
+    """
+    Serve the metrics of every worker process on /metrics.
+
+    Args:
+        port: HTTP port to listen on
+    """
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    start_http_server(port, registry=registry)
+    logger.info("Metrics endpoint started", port=port)
+
+
+def mark_process_dead(pid: int) -> None:
+    """
+    Drop the live gauges of an exited worker process.
+
+    Args:
+        pid: Process ID of the exited worker
+    """
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        multiprocess.mark_process_dead(pid)
@@ -1,17 +1,54 @@
 """
 Firebase Cloud Messaging (FCM) integration for push notifications.
+
+send_push sends one message per call. PushDispatcher buffers notifications
+for PUSH_BATCH_WINDOW_MS after the first one and sends them together with
+messaging.send_each (at most 500 messages per call, one HTTP round-trip per
+call instead of per message). With PUSH_COALESCE, the notifications of a
+window that go to the same topic are merged into one digest, so firefighters
+get one alert listing the incidents instead of dozens.
 """
 import asyncio
 import os
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 import firebase_admin
 from firebase_admin import messaging, credentials
+from prometheus_client import Counter, Histogram
 from structlog import get_logger
 
+from app.config import settings
+
 logger = get_logger("fcm_push")
 
+# Messages accepted by one messaging.send_each call
+FCM_MAX_BATCH = 500
+
+# Incident lines listed in the body of a digest
+DIGEST_MAX_LINES = 10
+
+PUSH_BATCH_SIZE = Histogram(
+    "worker_push_batch_size",
+    "FCM messages sent by one send_each call",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500),
+)
+PUSH_LATENCY = Histogram(
+    "worker_push_latency_seconds",
+    "Time from a push request to the FCM response (buffering included)",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+PUSH_MESSAGES = Counter(
+    "worker_push_messages_total",
+    "FCM messages sent, by outcome (success, failure)",
+    ["outcome"],
+)
+PUSH_COALESCED = Counter(
+    "worker_push_notifications_coalesced_total",
+    "Push requests merged into a digest with others of the same topic",
+)
+
 # Configuration from environment variables
 cred_path = os.getenv("FCM_CREDENTIALS_JSON")
 _topic = os.getenv("FCM_TOPIC", "firefighters")
@@ -66,3 +103,210 @@ async def send_push(title: str, body: str, data: Dict[str, Any]) -> Optional[str
     except Exception as e:
         logger.error("Failed to send push notification", error=str(e))
         return None
+
+
+class _Notification:
+    """A push request waiting in the dispatcher buffer."""
+
+    __slots__ = ("title", "body", "data", "topic", "future", "queued_at")
+
+    def __init__(self, title: str, body: str, data: Dict[str, str], topic: str, future: asyncio.Future) -> None:
+        self.title = title
+        self.body = body
+        self.data = data
+        self.topic = topic
+        self.future = future
+        self.queued_at = time.perf_counter()
+
+
+def _digest(notifications: List[_Notification]) -> Tuple[str, str, Dict[str, str]]:
+    """
+    Merge notifications for one topic into a single title, body and data.
+
+    Data values are joined with commas, key by key (e.g. incident_id="12,15").
+    """
+    lines = [notification.body for notification in notifications[:DIGEST_MAX_LINES]]
+    if len(notifications) > DIGEST_MAX_LINES:
+        lines.append(f"… et {len(notifications) - DIGEST_MAX_LINES} autres")
+
+    data: Dict[str, List[str]] = {}
+    for notification in notifications:
+        for key, value in notification.data.items():
+            data.setdefault(key, []).append(value)
+    merged = {key: ",".join(values) for key, values in data.items()}
+    merged["count"] = str(len(notifications))
+    return f"🔥 {len(notifications)} incendies détectés", "\n".join(lines), merged
+
+
+class PushDispatcher:
+    """Buffers push notifications and sends them in FCM batches."""
+
+    def __init__(
+        self,
+        window: float = 0.25,
+        max_batch: int = FCM_MAX_BATCH,
+        coalesce: bool = False,
+        topic: str = _topic,
+    ) -> None:
+        """
+        Initialize the dispatcher; the flush task starts on first send.
+
+        Args:
+            window: Seconds notifications are buffered after the first one
+            max_batch: Messages per send_each call (a full batch is sent at once,
+                capped at FCM's limit of 500)
+            coalesce: Merge the notifications of a window for the same topic
+            topic: Default FCM topic
+        """
+        self.window = window
+        self.max_batch = min(max_batch, FCM_MAX_BATCH)
+        self.coalesce = coalesce
+        self.topic = topic
+        self._pending: List[_Notification] = []
+        self._ready = asyncio.Event()
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def send(
+        self, title: str, body: str, data: Dict[str, Any], topic: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Buffer a notification and wait until its batch is sent.
+
+        Args:
+            title: Title of the notification
+            body: Body text of the notification
+            data: Additional data to send with the notification
+            topic: FCM topic (defaults to the dispatcher topic)
+
+        Returns:
+            Message ID if sent successfully (the digest's, when coalesced), None otherwise
+        """
+        # Skip if Firebase Admin SDK is not initialized
+        if not firebase_admin._apps:
+            logger.warning("Skipping push notification - FCM not initialized")
+            return None
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(_Notification(
+            title,
+            body,
+            {k: str(v) for k, v in data.items()},  # FCM requires string values
+            topic or self.topic,
+            future,
+        ))
+        self._ready.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+
+        # A cancelled caller (step timeout) still gets its notification sent
+        return await asyncio.shield(future)
+
+    async def flush(self) -> None:
+        """Send every buffered notification now."""
+        async with self._flush_lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+
+            # One message per notification, or per topic when coalescing
+            groups: List[List[_Notification]] = []
+            if self.coalesce:
+                by_topic: Dict[str, List[_Notification]] = {}
+                for notification in pending:
+                    by_topic.setdefault(notification.topic, []).append(notification)
+                groups = list(by_topic.values())
+            else:
+                groups = [[notification] for notification in pending]
+
+            for start in range(0, len(groups), self.max_batch):
+                await self._send_batch(groups[start:start + self.max_batch])
+
+    def _message(self, group: List[_Notification]) -> messaging.Message:
+        """Build the FCM message of one notification or of a digest."""
+        if len(group) == 1:
+            title, body, data = group[0].title, group[0].body, group[0].data
+        else:
+            PUSH_COALESCED.inc(len(group))
+            title, body, data = _digest(group)
+        return messaging.Message(
+            notification=messaging.Notification(title=title, body=body),
+            data=data,
+            topic=group[0].topic,
+        )
+
+    async def _send_batch(self, groups: List[List[_Notification]]) -> None:
+        """Send one send_each call and resolve the callers waiting on it."""
+        PUSH_BATCH_SIZE.observe(len(groups))
+        cancelled: Optional[BaseException] = None
+        try:
+            messages = [self._message(group) for group in groups]
+            # Run blocking FCM send in executor to avoid blocking the event loop
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(None, messaging.send_each, messages)
+            results = [
+                result.message_id if result.success else result.exception
+                for result in response.responses
+            ]
+        except BaseException as e:
+            # Also on cancellation, so no caller waits forever
+            logger.error("Failed to send push batch", messages=len(groups), error=repr(e))
+            results = [e] * len(groups)
+            if not isinstance(e, Exception):
+                cancelled = e
+
+        now = time.perf_counter()
+        for group, result in zip(groups, results):
+            failed = isinstance(result, BaseException)
+            PUSH_MESSAGES.labels(outcome="failure" if failed else "success").inc()
+            if failed:
+                logger.error("Failed to send push notification", topic=group[0].topic, error=str(result))
+            for notification in group:
+                PUSH_LATENCY.observe(now - notification.queued_at)
+                if not notification.future.done():
+                    notification.future.set_result(None if failed else result)
+
+        if cancelled is not None:
+            raise cancelled
+        logger.info("Push batch sent", messages=len(groups), notifications=sum(map(len, groups)))
+
+    async def _run(self) -> None:
+        """Send a batch when full or one window after its first notification."""
+        while True:
+            await self._ready.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.window)
+            except asyncio.TimeoutError:
+                pass
+            self._ready.clear()
+            self._full.clear()
+            await self.flush()
+
+    async def close(self) -> None:
+        """Stop the flush task and send the remaining notifications."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+def create_push_dispatcher() -> PushDispatcher:
+    """
+    Build the dispatcher configured by the PUSH_* settings.
+
+    Returns:
+        PushDispatcher: The configured dispatcher
+    """
+    return PushDispatcher(
+        window=settings.push_batch_window_ms / 1000,
+        max_batch=settings.push_max_batch,
+        coalesce=settings.push_coalesce,
+    )
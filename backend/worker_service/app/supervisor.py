@@ -0,0 +1,160 @@
+"""
+Multi-process supervisor for the worker service.
+
+The supervisor starts WORKER_PROCESSES child processes (one per CPU core by
+default), each running CONSUMERS_PER_PROCESS consumers. A child that exits
+unexpectedly is restarted after RESTART_DELAY seconds. On SIGTERM or SIGINT
+the signal is forwarded to every child, which stops consuming, drains its
+in-flight messages and exits; children still alive after the drain timeout
+are killed.
+
+The supervisor also serves the /metrics endpoint aggregating every child
+(see app/metrics.py). Children are started with the "spawn" method so they
+import prometheus_client with PROMETHEUS_MULTIPROC_DIR already set.
+"""
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing.connection import wait
+from multiprocessing.process import BaseProcess
+from typing import Callable, Dict, Optional
+
+from structlog import get_logger
+
+from app.config import settings
+from app.metrics import mark_process_dead, prepare_multiprocess_dir, start_metrics_server
+
+logger = get_logger("supervisor")
+
+# Extra seconds granted to children after their own drain timeout
+SHUTDOWN_GRACE = 5.0
+
+
+def resolve_process_count(configured: int) -> int:
+    """
+    Number of child processes to run.
+
+    Args:
+        configured: WORKER_PROCESSES (0 or less means one per CPU core)
+
+    Returns:
+        int: At least 1
+    """
+    if configured > 0:
+        return configured
+    return os.cpu_count() or 1
+
+
+class Supervisor:
+    """Runs and restarts the worker processes."""
+
+    def __init__(
+        self,
+        target: Callable[[int], None],
+        processes: int,
+        restart_delay: float = 1.0,
+        shutdown_timeout: float = 35.0,
+        metrics_port: int = 0,
+    ) -> None:
+        """
+        Initialize the supervisor.
+
+        Args:
+            target: Function run in each child, called with the child index
+            processes: Number of child processes
+            restart_delay: Seconds before a crashed child is restarted
+            shutdown_timeout: Seconds children get to exit after SIGTERM
+            metrics_port: Port of the /metrics endpoint (0 disables it)
+        """
+        self.target = target
+        self.processes = processes
+        self.restart_delay = restart_delay
+        self.shutdown_timeout = shutdown_timeout
+        self.metrics_port = metrics_port
+        self.children: Dict[int, BaseProcess] = {}
+        self.restarts = 0
+        self.stopping = False
+        self._context = multiprocessing.get_context("spawn")
+
+    def start_child(self, index: int) -> BaseProcess:
+        """
+        Start (or restart) the child at a given index.
+
+        Args:
+            index: Child index, passed to the target
+
+        Returns:
+            The started process
+        """
+        process = self._context.Process(
+            target=self.target,
+            args=(index,),
+            name=f"{settings.worker_name}-{index}",
+        )
+        process.start()
+        self.children[index] = process
+        logger.info("Worker process started", index=index, pid=process.pid)
+        return process
+
+    def request_stop(self, *_: object) -> None:
+        """Signal handler: stop restarting children and shut them down."""
+        self.stopping = True
+
+    def supervise_once(self, timeout: Optional[float] = 1.0) -> None:
+        """
+        Wait for a child to exit and restart it unless stopping.
+
+        Args:
+            timeout: Maximum seconds to wait for a child to exit
+        """
+        sentinels = {process.sentinel: index for index, process in self.children.items()}
+        for sentinel in wait(list(sentinels), timeout=timeout):
+            if self.stopping:
+                return
+            index = sentinels[sentinel]
+            process = self.children[index]
+            process.join()
+            mark_process_dead(process.pid)
+            logger.error(
+                "Worker process exited, restarting",
+                index=index,
+                pid=process.pid,
+                exitcode=process.exitcode,
+            )
+            self.restarts += 1
+            time.sleep(self.restart_delay)
+            self.start_child(index)
+
+    def shutdown(self) -> None:
+        """Forward SIGTERM to every child and wait for them to drain."""
+        logger.info("Stopping worker processes", processes=len(self.children))
+        for process in self.children.values():
+            if process.is_alive():
+                process.terminate()
+
+        deadline = time.monotonic() + self.shutdown_timeout
+        for index, process in self.children.items():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning("Worker process did not drain in time, killing", index=index)
+                process.kill()
+                process.join()
+
+    def run(self) -> None:
+        """Start the children and supervise them until SIGTERM/SIGINT."""
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+
+        logger.info("Starting worker supervisor", processes=self.processes)
+        if self.metrics_port:
+            prepare_multiprocess_dir()
+            start_metrics_server(self.metrics_port)
+        for index in range(self.processes):
+            self.start_child(index)
+
+        while not self.stopping:
+            self.supervise_once()
+
+        self.shutdown()
+        logger.info("Worker supervisor stopped", restarts=self.restarts)
@@ -0,0 +1,10 @@
+"""
+Shared test configuration.
+"""
+import os
+
+# Keep the step ledger and the dedup index in memory and log analytics:
+# tests never reach PostgreSQL
+os.environ.setdefault("STEP_LEDGER", "memory")
+os.environ.setdefault("DEDUP_STORE", "memory")
+os.environ.setdefault("ANALYTICS_SINK", "log")
@@ -0,0 +1,126 @@
+"""
+Tests for ordered, batched acknowledgements and concurrent processing.
+"""
+import asyncio
+import json
+import time
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.acks import AckTracker
+from app.consumers import IncidentConsumer
+
+
+def _message(channel, tag: int) -> MagicMock:
+    """Build a delivery with an awaitable ack/reject."""
+    message = MagicMock()
+    message.channel = channel
+    message.delivery_tag = tag
+    message.ack = AsyncMock()
+    message.reject = AsyncMock()
+    message.headers = {}
+    message.body = json.dumps({
+        "id": tag,
+        "lat": 48.8566,
+        "lon": 2.3522,
+        "created_at": datetime(2025, 6, 19).isoformat(),
+        "severity": 3,
+    }).encode()
+    return message
+
+
+@pytest.mark.asyncio
+async def test_acks_wait_for_earlier_deliveries():
+    """A finished delivery is not acked while an earlier one is still running."""
+    tracker = AckTracker(batch_size=1)
+    channel = object()
+    first, second = _message(channel, 1), _message(channel, 2)
+    tracker.track(first)
+    tracker.track(second)
+
+    await tracker.ack(second)
+    second.ack.assert_not_called()
+    first.ack.assert_not_called()
+
+    await tracker.ack(first)
+    # One multiple-ack on the highest tag covers both
+    second.ack.assert_called_once_with(multiple=True)
+    first.ack.assert_not_called()
+    assert tracker.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_acks_are_batched():
+    """With a batch size, one multiple-ack is sent per batch of deliveries."""
+    tracker = AckTracker(batch_size=3, flush_interval=60)
+    channel = object()
+    messages = [_message(channel, tag) for tag in range(1, 5)]
+    for message in messages:
+        tracker.track(message)
+
+    for message in messages:
+        await tracker.ack(message)
+
+    messages[2].ack.assert_called_once_with(multiple=True)
+    assert sum(message.ack.call_count for message in messages) == 1
+
+    # The partial batch goes out on flush
+    await tracker.flush()
+    messages[3].ack.assert_called_once_with(multiple=True)
+
+
+@pytest.mark.asyncio
+async def test_partial_batch_flushed_after_interval():
+    """A partial batch does not wait forever for more deliveries."""
+    tracker = AckTracker(batch_size=10, flush_interval=0.01)
+    message = _message(object(), 1)
+    tracker.track(message)
+
+    await tracker.ack(message)
+    await asyncio.sleep(0.05)
+
+    message.ack.assert_called_once_with(multiple=True)
+
+
+@pytest.mark.asyncio
+async def test_rejected_delivery_is_not_covered_by_multiple_ack():
+    """Earlier acks are flushed before a failed delivery is rejected on its own."""
+    tracker = AckTracker(batch_size=10, flush_interval=60)
+    channel = object()
+    messages = [_message(channel, tag) for tag in range(1, 4)]
+    for message in messages:
+        tracker.track(message)
+
+    await tracker.ack(messages[0])
+    await tracker.reject(messages[1])
+    await tracker.ack(messages[2])
+    await tracker.flush()
+
+    messages[0].ack.assert_called_once_with(multiple=True)
+    messages[1].reject.assert_called_once_with(requeue=False)
+    messages[1].ack.assert_not_called()
+    messages[2].ack.assert_called_once_with(multiple=True)
+
+
+@pytest.mark.asyncio
+async def test_consumer_processes_deliveries_concurrently():
+    """Throughput scales with concurrency instead of one message at a time."""
+    with patch("app.config.settings.max_concurrency", 10):
+        consumer = IncidentConsumer("amqp://localhost")
+
+    async def slow_handler(event):
+        await asyncio.sleep(0.1)
+
+    consumer._handle_incident_validated = slow_handler
+    channel = object()
+    messages = [_message(channel, tag) for tag in range(1, 11)]
+
+    started = time.monotonic()
+    await asyncio.gather(*(consumer.process_message(message) for message in messages))
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.5
+    assert consumer.acks.pending == 0
+    assert sum(message.ack.call_count for message in messages) >= 1
@@ -0,0 +1,133 @@
+"""
+Tests for the buffered analytics sink.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from app.analytics import BufferedAnalyticsSink, incident_response_times, metadata
+from app.consumers import IncidentConsumer
+from app.events import IncidentValidated
+
+
+def _row(incident_id: int) -> dict:
+    now = datetime(2025, 6, 19, 12, 0)
+    return {
+        "incident_id": incident_id,
+        "severity": 3,
+        "lat": 48.8566,
+        "lon": 2.3522,
+        "created_at": now,
+        "validated_at": None,
+        "notified_at": now,
+        "validation_seconds": None,
+        "notification_seconds": 0.0,
+    }
+
+
+@pytest_asyncio.fixture
+async def sink():
+    """Sink writing to an in-memory SQLite database."""
+    sink = BufferedAnalyticsSink("sqlite+aiosqlite:///:memory:", batch_size=3, flush_interval=60)
+    async with sink.engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+    yield sink
+    await sink.close()
+
+
+async def _stored(sink) -> list:
+    async with sink.engine.connect() as conn:
+        result = await conn.execute(select(incident_response_times.c.incident_id))
+        return sorted(result.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_written_at_once(sink):
+    """Writers return once the batch holding their row is committed."""
+    inserts = 0
+    original = sink._insert
+
+    async def counting_insert(rows, waiters):
+        nonlocal inserts
+        inserts += 1
+        await original(rows, waiters)
+
+    sink._insert = counting_insert
+    await asyncio.wait_for(asyncio.gather(*(sink.write(_row(i)) for i in range(3))), timeout=1)
+
+    assert inserts == 1
+    assert await _stored(sink) == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_partial_batch_written_after_interval(sink):
+    """A lone row does not wait for a full batch."""
+    sink.flush_interval = 0.02
+
+    await asyncio.wait_for(sink.write(_row(7)), timeout=1)
+
+    assert await _stored(sink) == [7]
+
+
+@pytest.mark.asyncio
+async def test_retried_row_is_not_duplicated(sink):
+    """A row written again for the same incident (retried step) is skipped."""
+    sink.flush_interval = 0.01
+
+    await asyncio.wait_for(sink.write(_row(7)), timeout=1)
+    await asyncio.wait_for(asyncio.gather(sink.write(_row(7)), sink.write(_row(8))), timeout=1)
+
+    assert await _stored(sink) == [7, 8]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_fails_writers(sink):
+    """Writers see the insert error, so the analytics step is retried."""
+    engine, sink._engine = sink._engine, MagicMock()
+    sink._engine.begin.side_effect = ConnectionError("db down")
+    sink.flush_interval = 0.01
+
+    with pytest.raises(ConnectionError):
+        await asyncio.wait_for(sink.write(_row(1)), timeout=1)
+    sink._engine = engine
+
+
+@pytest.mark.asyncio
+async def test_full_buffer_blocks_writers():
+    """Writers wait for room once max_buffer rows are pending."""
+    sink = BufferedAnalyticsSink("sqlite+aiosqlite:///:memory:", batch_size=10, flush_interval=60, max_buffer=2)
+    sink._insert = AsyncMock()  # Never resolves the writers
+
+    first = [asyncio.create_task(sink.write(_row(i))) for i in range(2)]
+    third = asyncio.create_task(sink.write(_row(2)))
+    await asyncio.sleep(0.01)
+
+    assert len(sink._rows) == 2
+    assert not third.done()
+    for task in (*first, third):
+        task.cancel()
+    sink._task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_update_analytics_computes_response_times():
+    """Rows hold the delays from creation to validation and notification."""
+    analytics = AsyncMock()
+    consumer = IncidentConsumer("amqp://localhost", analytics=analytics)
+    created = datetime.now(timezone.utc) - timedelta(seconds=30)
+    event = IncidentValidated(
+        id=1, lat=48.8, lon=2.3, created_at=created, severity=4,
+        validated_at=created + timedelta(seconds=10),
+    )
+
+    await consumer._update_analytics(event)
+
+    row = analytics.write.call_args[0][0]
+    assert row["incident_id"] == 1
+    assert row["validation_seconds"] == 10
+    assert 30 <= row["notification_seconds"] < 35
+    assert row["created_at"].tzinfo is None
@@ -10,7 +10,8 @@ import pytest
 import aio_pika
 from aio_pika.abc import AbstractIncomingMessage
 
-from app.consumers import IncidentConsumer
+from app.consumers import IncidentConsumer, parse_binding_keys, parse_retry_tiers
+from app.events import IncidentValidated
 
 
 @pytest.fixture
@@ -29,11 +30,11 @@ def mock_message():
     mock.body = json.dumps(message_body).encode()
     mock.headers = {"x-retry-count": 0}
     
-    # Mock the process context manager
-    process_context = AsyncMock()
-    process_context.__aenter__ = AsyncMock()
-    process_context.__aexit__ = AsyncMock()
-    mock.process.return_value = process_context
+    # Delivery details used by the ack tracker
+    mock.channel = MagicMock()
+    mock.delivery_tag = 1
+    mock.ack = AsyncMock()
+    mock.reject = AsyncMock()
     
     return mock
 
@@ -54,7 +55,10 @@ async def test_incident_consumer_setup():
     
     # Configure mocks
     mock_connection.channel.return_value = mock_channel
-    mock_channel.declare_queue.side_effect = [mock_queue, mock_dlq, mock_retry_queue]
+    # Primary queue, DLQ, then one retry queue per back-off tier
+    mock_channel.declare_queue.side_effect = [mock_queue, mock_dlq] + [
+        mock_retry_queue for _ in consumer.retry_tiers
+    ]
     mock_channel.declare_exchange.return_value = mock_exchange
     
     # Patch the aio_pika.connect_robust function
@@ -73,8 +77,58 @@ async def test_incident_consumer_setup():
             durable=True
         )
         
-        # Verify exchange declarations
-        mock_channel.declare_exchange.assert_called_once()
+        # Verify exchange declarations (events topic, broadcast fanout and retry exchanges)
+        assert mock_channel.declare_exchange.call_count == 3
+        mock_channel.declare_exchange.assert_any_call(
+            "incident.events",
+            type=aio_pika.ExchangeType.TOPIC,
+            durable=True
+        )
+        mock_channel.declare_exchange.assert_any_call(
+            "incident.broadcast",
+            type=aio_pika.ExchangeType.FANOUT,
+            durable=True
+        )
+        
+        # By default every incident event is bound to the primary queue
+        mock_queue.bind.assert_called_once_with(mock_exchange, routing_key="incident.validated.#")
+
+
+@pytest.mark.asyncio
+async def test_incident_consumer_binding_patterns():
+    """Test that a regional consumer binds only its own patterns and queues."""
+    consumer = IncidentConsumer(
+        "amqp://localhost",
+        queue_name="incident.validated.paris",
+        binding_keys=parse_binding_keys("incident.validated.u09t.*, incident.validated.u09w.*"),
+    )
+    
+    mock_connection = AsyncMock()
+    mock_channel = AsyncMock()
+    mock_queue = AsyncMock()
+    mock_exchange = AsyncMock()
+    
+    mock_connection.channel.return_value = mock_channel
+    mock_channel.declare_queue.side_effect = [mock_queue] + [AsyncMock() for _ in range(5)]
+    mock_channel.declare_exchange.return_value = mock_exchange
+    
+    with patch("aio_pika.connect_robust", return_value=mock_connection), \
+         patch("app.config.settings.retry_tiers_ms", "1000,10000,60000,600000"):
+        await consumer.setup()
+    
+    assert [call.kwargs["routing_key"] for call in mock_queue.bind.call_args_list] == [
+        "incident.validated.u09t.*",
+        "incident.validated.u09w.*",
+    ]
+    declared = [call.args[0] for call in mock_channel.declare_queue.call_args_list]
+    assert declared == [
+        "incident.validated.paris",
+        "incident.validated.paris.dlq",
+        "incident.validated.paris.retry.1000ms",
+        "incident.validated.paris.retry.10000ms",
+        "incident.validated.paris.retry.60000ms",
+        "incident.validated.paris.retry.600000ms",
+    ]
 
 
 @pytest.mark.asyncio
@@ -92,8 +146,23 @@ async def test_process_message_success(mock_message):
     # Verify that _handle_incident_validated was called
     consumer._handle_incident_validated.assert_called_once()
     
-    # Verify that the message was acknowledged (by calling process)
-    mock_message.process.assert_called_once()
+    # Verify that the message was acknowledged
+    mock_message.ack.assert_called_once_with(multiple=True)
+
+
+@pytest.mark.asyncio
+async def test_process_message_decodes_typed_event(mock_message):
+    """Test that the handler receives a typed IncidentValidated event."""
+    consumer = IncidentConsumer("amqp://localhost")
+    consumer._handle_incident_validated = AsyncMock()
+    
+    await consumer.process_message(mock_message)
+    
+    event = consumer._handle_incident_validated.call_args[0][0]
+    assert isinstance(event, IncidentValidated)
+    assert event.id == 123
+    assert event.severity == 3
+    assert isinstance(event.created_at, datetime)
 
 
 @pytest.mark.asyncio
@@ -116,6 +185,39 @@ async def test_process_message_retry(mock_message):
     consumer._send_to_retry.assert_called_once_with(mock_message.body, 1)
 
 
+@pytest.mark.asyncio
+async def test_retry_tiers_back_off_with_jitter():
+    """Each attempt goes to a longer tier, with its delay jittered."""
+    with patch("app.config.settings.retry_tiers_ms", "1000,10000,60000"), \
+         patch("app.config.settings.retry_jitter", 0.2):
+        consumer = IncidentConsumer("amqp://localhost")
+        consumer.retry_exchange = AsyncMock()
+        
+        for retry_count in (1, 2, 3, 4):
+            await consumer._send_to_retry(b"{}", retry_count)
+    
+    calls = consumer.retry_exchange.publish.call_args_list
+    assert [call.kwargs["routing_key"] for call in calls] == [
+        "incident.validated.retry.1000ms",
+        "incident.validated.retry.10000ms",
+        "incident.validated.retry.60000ms",
+        "incident.validated.retry.60000ms",  # Last tier reused
+    ]
+    for call, tier in zip(calls, (1000, 10000, 60000, 60000)):
+        message = call.args[0]
+        assert message.headers["x-retry-count"] >= 1
+        assert 0.8 * tier <= message.expiration * 1000 <= 1.2 * tier
+
+
+def test_parse_retry_tiers():
+    """Tiers are positive delays in milliseconds."""
+    assert parse_retry_tiers("1000, 10000,60000") == [1000, 10000, 60000]
+    with pytest.raises(ValueError):
+        parse_retry_tiers("1000,0")
+    with pytest.raises(ValueError):
+        parse_retry_tiers("")
+
+
 @pytest.mark.asyncio
 async def test_process_message_dlq_after_max_retries():
     """Test that messages are sent to DLQ after max retries."""
@@ -136,11 +238,11 @@ async def test_process_message_dlq_after_max_retries():
     mock_message.body = json.dumps(message_body).encode()
     mock_message.headers = {"x-retry-count": 3}  # Max retries
     
-    # Mock the process context manager
-    process_context = AsyncMock()
-    process_context.__aenter__ = AsyncMock()
-    process_context.__aexit__ = AsyncMock()
-    mock_message.process.return_value = process_context
+    # Delivery details used by the ack tracker
+    mock_message.channel = MagicMock()
+    mock_message.delivery_tag = 1
+    mock_message.ack = AsyncMock()
+    mock_message.reject = AsyncMock()
     
     # Make _handle_incident_validated raise an exception
     consumer._handle_incident_validated = AsyncMock(side_effect=Exception("Test error"))
@@ -154,7 +256,9 @@ async def test_process_message_dlq_after_max_retries():
         await consumer.process_message(mock_message)
         
         # Verify that _send_to_dlq was called
-        consumer._send_to_dlq.assert_called_once_with(mock_message.body)
+        consumer._send_to_dlq.assert_called_once_with(
+            mock_message.body, error="Test error", retry_count=3
+        )
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,145 @@
+"""
+Tests for idempotent consumption (processed-event index).
+"""
+import json
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.consumers import IncidentConsumer
+from app.dedup import MemoryEventStore, ProcessedEvents, SqlEventStore, metadata, processed_events
+
+
+def _message(incident_id: int = 7) -> MagicMock:
+    """Build a delivery with an awaitable ack/reject."""
+    message = MagicMock()
+    message.channel = object()
+    message.delivery_tag = 1
+    message.ack = AsyncMock()
+    message.reject = AsyncMock()
+    message.headers = {}
+    message.body = json.dumps({
+        "id": incident_id,
+        "lat": 48.8566,
+        "lon": 2.3522,
+        "created_at": datetime(2025, 6, 19).isoformat(),
+        "severity": 3,
+    }).encode()
+    return message
+
+
+def _consumer(processed: ProcessedEvents) -> IncidentConsumer:
+    """Consumer with mocked side effects."""
+    consumer = IncidentConsumer("amqp://localhost", processed=processed)
+    consumer._simulate_push_notification = AsyncMock()
+    consumer._update_analytics = AsyncMock()
+    consumer._send_fcm = AsyncMock()
+    consumer._broadcast = AsyncMock()
+    return consumer
+
+
+@pytest.mark.asyncio
+async def test_duplicate_delivery_acked_without_side_effects():
+    """A redelivered event is acknowledged without reaching the handler or the store."""
+    store = MemoryEventStore()
+    consumer = _consumer(ProcessedEvents(store))
+
+    await consumer.process_message(_message())
+    store.contains = AsyncMock(return_value=False)
+    duplicate = _message()
+    await consumer.process_message(duplicate)
+    await consumer.acks.flush()
+
+    consumer._send_fcm.assert_awaited_once()
+    consumer._simulate_push_notification.assert_awaited_once()
+    # Answered by the in-process LRU
+    store.contains.assert_not_awaited()
+    duplicate.ack.assert_called_once_with(multiple=True)
+
+
+@pytest.mark.asyncio
+async def test_duplicate_seen_by_another_replica():
+    """An event recorded in the shared store is skipped by a fresh consumer."""
+    store = MemoryEventStore()
+    await _consumer(ProcessedEvents(store)).process_message(_message())
+
+    other = _consumer(ProcessedEvents(store))
+    await other.process_message(_message())
+
+    other._send_fcm.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_failed_event_is_not_marked_processed():
+    """A delivery sent to retry is processed again when it comes back."""
+    processed = ProcessedEvents(MemoryEventStore())
+    consumer = _consumer(processed)
+    consumer._update_analytics.side_effect = RuntimeError("db down")
+    consumer._send_to_retry = AsyncMock()
+
+    await consumer.process_message(_message())
+
+    consumer._send_to_retry.assert_awaited_once()
+    assert not await processed.seen("incident.validated:7")
+
+
+@pytest.mark.asyncio
+async def test_unavailable_store_processes_the_event():
+    """Without the store the event is processed (the step ledger still guards side effects)."""
+    store = MemoryEventStore()
+    store.contains = AsyncMock(side_effect=ConnectionError("db down"))
+    store.add = AsyncMock(side_effect=ConnectionError("db down"))
+    consumer = _consumer(ProcessedEvents(store))
+    message = _message()
+
+    await consumer.process_message(message)
+    await consumer.acks.flush()
+
+    consumer._send_fcm.assert_awaited_once()
+    message.ack.assert_called_once_with(multiple=True)
+
+
+@pytest.mark.asyncio
+async def test_lru_is_bounded():
+    """The least recently used keys are evicted past the cache size."""
+    store = MemoryEventStore()
+    processed = ProcessedEvents(store, cache_size=2)
+    for key in ("a", "b", "c"):
+        await processed.mark(key)
+
+    assert list(processed._cache) == ["b", "c"]
+    # Evicted keys are still found in the store
+    assert await processed.seen("a")
+
+
+@pytest.mark.asyncio
+async def test_entries_expire():
+    """An event is forgotten once its TTL has elapsed."""
+    processed = ProcessedEvents(MemoryEventStore(), ttl=0.0)
+    await processed.mark("a")
+
+    assert not await processed.seen("a")
+
+
+@pytest.mark.asyncio
+async def test_sql_store_expires_and_purges():
+    """Expired rows are ignored, refreshed on re-insert and purged."""
+    store = SqlEventStore("sqlite+aiosqlite:///:memory:", purge_interval=0.0)
+    async with store.engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+        past = datetime.utcnow() - timedelta(hours=1)
+        await conn.execute(insert(processed_events).values([
+            {"event_key": "old", "processed_at": past, "expires_at": past},
+            {"event_key": "stale", "processed_at": past, "expires_at": past},
+        ]))
+
+    assert not await store.contains("old")
+    await store.add("old", ttl=60)
+    assert await store.contains("old")
+
+    async with store.engine.connect() as conn:
+        keys = (await conn.execute(select(processed_events.c.event_key))).scalars().all()
+    assert keys == ["old"]
+    await store.close()
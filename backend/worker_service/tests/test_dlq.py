@@ -0,0 +1,162 @@
+"""
+Tests for the DLQ inspection and replay tool.
+"""
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aio_pika.exceptions import PublishError
+from pamqp.commands import Basic
+
+from app.dlq import DeadLetterFilter, RateLimiter, describe, list_messages, replay
+
+
+def _dead_letter(incident_id: int, error: str = "analytics timeout", age: float = 60) -> MagicMock:
+    message = MagicMock()
+    message.body = json.dumps({"id": incident_id, "lat": 1.0, "lon": 2.0,
+                               "created_at": "2025-06-19T00:00:00"}).encode()
+    message.headers = {"x-error": error, "x-retry-count": 4, "x-original-queue": "incident.validated"}
+    message.timestamp = datetime.now(timezone.utc) - timedelta(seconds=age)
+    message.content_type = "application/json"
+    message.message_id = f"dead-{incident_id}"
+    message.ack = AsyncMock()
+    message.reject = AsyncMock()
+    return message
+
+
+def _channel(messages) -> MagicMock:
+    """Channel whose DLQ returns the given messages, then nothing."""
+    channel = MagicMock()
+    queue = MagicMock()
+    queue.get = AsyncMock(side_effect=list(messages) + [None])
+    queue.declaration_result.message_count = len(messages)
+    channel.declare_queue = AsyncMock(return_value=queue)
+    channel.default_exchange.publish = AsyncMock()
+    return channel
+
+
+def test_filter_by_incident_error_and_age():
+    """Every criterion must match."""
+    info = describe(_dead_letter(7, error="ConnectionError: db down", age=120))
+    assert info["incident_id"] == 7
+    assert DeadLetterFilter().matches(info)
+    assert DeadLetterFilter(incident_ids=[7, 8], error="db down").matches(info)
+    assert not DeadLetterFilter(incident_ids=[8]).matches(info)
+    assert not DeadLetterFilter(error="^Timeout").matches(info)
+    assert DeadLetterFilter(older_than=60, newer_than=600).matches(info)
+    assert not DeadLetterFilter(newer_than=60).matches(info)
+
+
+@pytest.mark.asyncio
+async def test_replay_republishes_matching_messages_with_confirms():
+    """Matching messages go back to their queue with a reset retry count; others move to the DLQ tail."""
+    messages = [_dead_letter(1), _dead_letter(2, error="poison"), _dead_letter(3)]
+    channel = _channel(messages)
+
+    counts = await replay(channel, "incident.validated", DeadLetterFilter(error="timeout"), rate=0, batch_size=10)
+
+    assert counts == {"scanned": 3, "matched": 2, "replayed": 2}
+    published = channel.default_exchange.publish.call_args_list
+    assert [call.kwargs["routing_key"] for call in published] == [
+        "incident.validated.dlq", "incident.validated", "incident.validated",
+    ]
+    assert all(call.args[0].headers["x-retry-count"] == 0 for call in published[1:])
+    # A missing target queue returns the message instead of confirming it
+    assert all(call.kwargs["mandatory"] for call in published)
+
+    # The skipped message is copied unchanged before being acked
+    kept = published[0].args[0]
+    assert kept.body == messages[1].body
+    assert kept.headers == messages[1].headers
+    assert kept.timestamp == messages[1].timestamp
+    for message in messages:
+        message.ack.assert_awaited_once()
+        message.reject.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_replay_settles_each_batch_before_the_next():
+    """Only the current batch is unacknowledged while the replay runs."""
+    messages = [_dead_letter(i) for i in range(1, 6)]
+    channel = _channel(messages)
+    queue = channel.declare_queue.return_value
+    unacked_at_publish = []
+
+    async def publish(message, routing_key, mandatory):
+        fetched = messages[:queue.get.await_count]
+        unacked_at_publish.append(sum(1 for m in fetched if not m.ack.await_count))
+
+    channel.default_exchange.publish.side_effect = publish
+
+    counts = await replay(channel, "incident.validated", DeadLetterFilter(), rate=0, batch_size=2)
+
+    assert counts["replayed"] == 5
+    assert max(unacked_at_publish) <= 2
+    # The scan stops at the initial message count, without an extra basic.get
+    assert queue.get.await_count == 5
+
+
+@pytest.mark.asyncio
+async def test_unconfirmed_republish_stays_in_dlq():
+    """A nacked republish leaves the message in the DLQ."""
+    message = _dead_letter(1)
+    channel = _channel([message])
+    channel.default_exchange.publish.side_effect = RuntimeError("nack")
+
+    counts = await replay(channel, "incident.validated", DeadLetterFilter(), rate=0)
+
+    assert counts["replayed"] == 0
+    message.reject.assert_awaited_once_with(requeue=True)
+    message.ack.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_failed_republish_moves_message_to_dlq_tail():
+    """A message returned by the broker (original queue gone) stays in the DLQ, settled at once."""
+    message = _dead_letter(1)
+    channel = _channel([message])
+    returned = Basic.Return(reply_code=312, reply_text="NO_ROUTE", routing_key="incident.validated")
+    channel.default_exchange.publish.side_effect = [
+        PublishError(MagicMock(delivery=returned), returned), None,
+    ]
+
+    counts = await replay(channel, "incident.validated", DeadLetterFilter(), rate=0)
+
+    assert counts["replayed"] == 0
+    assert channel.default_exchange.publish.call_args.kwargs["routing_key"] == "incident.validated.dlq"
+    message.ack.assert_awaited_once()
+    message.reject.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_dry_run_and_list_leave_messages_in_place(capsys):
+    """Inspection never removes or republishes messages."""
+    messages = [_dead_letter(1), _dead_letter(2)]
+    channel = _channel(messages)
+    counts = await replay(channel, "incident.validated", DeadLetterFilter(incident_ids=[1]), dry_run=True)
+    assert counts["matched"] == 1 and counts["replayed"] == 0
+    channel.default_exchange.publish.assert_not_called()
+    for message in messages:
+        message.reject.assert_awaited_once_with(requeue=True)
+        message.ack.assert_not_called()
+
+    messages = [_dead_letter(1), _dead_letter(2)]
+    printed = await list_messages(_channel(messages), "incident.validated", DeadLetterFilter(incident_ids=[2]))
+    assert printed == 1
+    assert json.loads(capsys.readouterr().out)["incident_id"] == 2
+    for message in messages:
+        message.reject.assert_awaited_once_with(requeue=True)
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_paces_batches():
+    """Batches are spaced so the configured rate is not exceeded."""
+    limiter = RateLimiter(rate=100)
+    started = time.monotonic()
+    for _ in range(3):
+        await limiter.wait(5)
+
+    # 10 messages had to wait for 0.1 s at 100 msg/s
+    assert time.monotonic() - started >= 0.09
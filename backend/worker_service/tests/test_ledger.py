@@ -0,0 +1,89 @@
+"""
+Tests for the step ledger and step-level retries.
+"""
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.consumers import IncidentConsumer, StepFailed
+from app.events import IncidentValidated
+from app.ledger import MemoryStepLedger, SqlStepLedger, StepLedger, metadata
+
+EVENT = IncidentValidated(id=7, lat=48.8566, lon=2.3522, created_at=datetime(2025, 6, 19), severity=3)
+
+
+def _consumer() -> IncidentConsumer:
+    """Consumer with mocked side effects and an in-memory ledger."""
+    consumer = IncidentConsumer("amqp://localhost", ledger=MemoryStepLedger())
+    consumer._simulate_push_notification = AsyncMock()
+    consumer._update_analytics = AsyncMock()
+    consumer._send_fcm = AsyncMock()
+    consumer._broadcast = AsyncMock()
+    return consumer
+
+
+@pytest.mark.asyncio
+async def test_retry_only_redoes_failed_steps():
+    """Steps that succeeded on the first attempt are not repeated."""
+    consumer = _consumer()
+    consumer._update_analytics.side_effect = [RuntimeError("db down"), None]
+
+    with pytest.raises(StepFailed):
+        await consumer._handle_incident_validated(EVENT)
+    await consumer._handle_incident_validated(EVENT)
+
+    assert consumer._update_analytics.await_count == 2
+    assert consumer._simulate_push_notification.await_count == 1
+    assert consumer._send_fcm.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_duplicate_delivery_is_a_no_op():
+    """A fully processed incident triggers no side effect when redelivered."""
+    consumer = _consumer()
+
+    await consumer._handle_incident_validated(EVENT)
+    await consumer._handle_incident_validated(EVENT)
+
+    assert consumer._simulate_push_notification.await_count == 1
+    assert consumer._update_analytics.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_unavailable_ledger_runs_every_step():
+    """Without a ledger the worker falls back to redoing every step."""
+    ledger = MemoryStepLedger()
+    ledger.completed = AsyncMock(side_effect=ConnectionError("db down"))
+    consumer = _consumer()
+    consumer.ledger = ledger
+
+    await consumer._handle_incident_validated(EVENT)
+
+    consumer._simulate_push_notification.assert_awaited_once()
+    consumer._update_analytics.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_sql_ledger_records_steps_once():
+    """The SQL ledger ignores steps recorded twice (concurrent duplicates)."""
+    ledger = SqlStepLedger("sqlite+aiosqlite:///:memory:")
+    async with ledger.engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+
+    await ledger.record(7, ["analytics", "fcm"])
+    await ledger.record(7, ["analytics"])
+
+    assert await ledger.completed(7) == {"analytics", "fcm"}
+    assert await ledger.completed(8) == set()
+    await ledger.close()
+
+
+def test_incomplete_ledger_fails_at_instantiation():
+    """A store missing part of the interface is rejected before any message."""
+    class PartialLedger(StepLedger):
+        async def completed(self, incident_id):
+            return set()
+
+    with pytest.raises(TypeError):
+        PartialLedger()
@@ -0,0 +1,81 @@
+"""
+Tests for the load generator and the worker's completion reports.
+"""
+import json
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import msgspec
+import pytest
+
+from app.consumers import IncidentConsumer
+from app.loadtest import percentile, summarize, synthetic_event
+
+
+def test_synthetic_events_are_reproducible():
+    """The same id yields the same event on every run."""
+    now = datetime(2025, 10, 23, 9, 0)
+    first, again = synthetic_event(42, now), synthetic_event(42, now)
+
+    assert first == again
+    assert 1 <= first.severity <= 5
+    assert first.created_at < first.validated_at == now
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile(values, 100) == 100.0
+    assert percentile([], 50) == 0.0
+
+
+def test_summary_reports_latency_and_throughput():
+    """Latency runs from the publish to the worker's completion stamp."""
+    sent = {1: 100.0, 2: 100.5, 3: 101.0}
+    finished = {1: (100.1, "success"), 2: (100.7, "success"), 3: (102.0, "dlq")}
+
+    report = summarize(sent, finished, retries=4)
+
+    assert report["completed"] == 3
+    assert report["missing"] == 0
+    assert report["outcomes"] == {"success": 2, "dlq": 1}
+    assert report["retries"] == 4
+    assert report["duration_seconds"] == 2.0
+    assert report["throughput_per_second"] == 1.5
+    assert report["latency_ms"]["p50"] == 200.0
+    assert report["latency_ms"]["max"] == 1000.0
+
+
+@pytest.mark.asyncio
+async def test_consumer_reports_completion():
+    """With COMPLETION_EXCHANGE set, every finished delivery is reported."""
+    consumer = IncidentConsumer("amqp://localhost")
+    consumer._handle_incident_validated = AsyncMock()
+    consumer.completion_exchange = MagicMock(publish=AsyncMock())
+    message = MagicMock(ack=AsyncMock(), headers={}, delivery_tag=1, channel=object())
+    message.body = json.dumps({
+        "id": 9,
+        "lat": 48.8566,
+        "lon": 2.3522,
+        "created_at": datetime(2025, 6, 19).isoformat(),
+    }).encode()
+
+    await consumer.process_message(message)
+
+    report = msgspec.json.decode(consumer.completion_exchange.publish.call_args[0][0].body)
+    assert report["id"] == 9
+    assert report["outcome"] == "success"
+
+
+@pytest.mark.asyncio
+async def test_fcm_can_be_stubbed_out():
+    """FCM_ENABLED=false skips the FCM call."""
+    consumer = IncidentConsumer("amqp://localhost")
+    consumer.push_dispatcher.send = AsyncMock()
+
+    with patch("app.config.settings.fcm_enabled", False):
+        await consumer._send_fcm(1, 48.8566, 2.3522, 3)
+
+    consumer.push_dispatcher.send.assert_not_called()
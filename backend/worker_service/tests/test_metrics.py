@@ -0,0 +1,65 @@
+"""
+Tests for the worker metrics.
+"""
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.consumers import IncidentConsumer
+from app.metrics import prepare_multiprocess_dir
+from tests.test_acks import _message
+
+
+def _value(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_processing_outcomes_are_measured():
+    """Successes, DLQ moves and message ages are recorded per delivery."""
+    consumer = IncidentConsumer("amqp://localhost")
+    consumer._handle_incident_validated = AsyncMock(side_effect=[None, RuntimeError("boom")])
+    consumer._send_to_dlq = AsyncMock()
+    before_success = _value("worker_message_processing_seconds_count", outcome="success")
+    before_dlq = _value("worker_dlq_messages_total")
+    before_age = _value("worker_message_age_seconds_count")
+
+    channel = object()
+    await consumer.process_message(_message(channel, 1))
+    failing = _message(channel, 2)
+    failing.headers = {"x-retry-count": 99}
+    await consumer.process_message(failing)
+
+    assert _value("worker_message_processing_seconds_count", outcome="success") == before_success + 1
+    assert _value("worker_dlq_messages_total") == before_dlq + 1
+    assert _value("worker_message_age_seconds_count") == before_age + 2
+    assert _value("worker_messages_in_flight") == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_depth_is_read_from_the_broker():
+    """Depths of the consumed queue and its DLQ come from passive declares."""
+    consumer = IncidentConsumer("amqp://localhost")
+    consumer.channel = AsyncMock()
+    depths = {"incident.validated": 42, "incident.validated.dlq": 3}
+
+    async def declare(name, passive):
+        queue = MagicMock()
+        queue.declaration_result.message_count = depths[name]
+        return queue
+
+    consumer.channel.declare_queue.side_effect = declare
+    await consumer.update_queue_depth()
+
+    assert _value("worker_queue_depth", queue="incident.validated") == 42
+    assert _value("worker_queue_depth", queue="incident.validated.dlq") == 3
+
+
+def test_prepare_multiprocess_dir_removes_stale_files(tmp_path, monkeypatch):
+    """Counters of a previous run are not carried over."""
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    (tmp_path / "counter_123.db").write_bytes(b"old")
+
+    assert prepare_multiprocess_dir() == str(tmp_path)
+    assert list(tmp_path.iterdir()) == []
@@ -123,19 +123,19 @@ async def test_send_push_with_no_firebase():
 
 @pytest.mark.asyncio
 async def test_consumer_send_push(reset_mocks):
-    """Test that IncidentConsumer calls send_push for validated incidents."""
-    # Import push et mock sa fonction send_push
+    """Test that IncidentConsumer hands validated incidents to the push dispatcher."""
+    # Import push et mock l'envoi du dispatcher
     from app import push
     
-    # Garder une référence à la fonction originale
-    original_send_push = push.send_push
+    # Garder une référence à la méthode originale
+    original_send = push.PushDispatcher.send
     
-    # Créer un mock asynchrone pour send_push
+    # Créer un mock asynchrone pour PushDispatcher.send
     async def mock_async_send_push(title, body, data):
         return "mock-message-id"
     
     send_push_mock = MagicMock(side_effect=mock_async_send_push)
-    push.send_push = send_push_mock
+    push.PushDispatcher.send = send_push_mock
     
     # Patcher module 'app.services.ws_manager' pour éviter l'import error
     sys.modules['app.services.ws_manager'] = MagicMock()
@@ -161,8 +161,10 @@ async def test_consumer_send_push(reset_mocks):
             "severity": 3
         }
         
-        # Appeler la méthode de traitement
-        await test_consumer._handle_incident_validated(incident_data)
+        # Appeler la méthode de traitement avec l'événement typé
+        from app.events import incident_validated_decoder
+        event = incident_validated_decoder.decode(json.dumps(incident_data))
+        await test_consumer._handle_incident_validated(event)
         
         # Vérifier que send_push a été appelé
         send_push_mock.assert_called_once()
@@ -184,8 +186,8 @@ async def test_consumer_send_push(reset_mocks):
             assert isinstance(kwargs.get("data"), dict)
             assert kwargs.get("data", {}).get("incident_id") == "123"
     finally:
-        # Restaurer la fonction originale
-        push.send_push = original_send_push
+        # Restaurer la méthode originale
+        push.PushDispatcher.send = original_send
         
         # Nettoyer le mock de ws_manager
         if 'app.services.ws_manager' in sys.modules:
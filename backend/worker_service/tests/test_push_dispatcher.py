@@ -0,0 +1,107 @@
+"""
+Tests for batched FCM delivery and alert coalescing.
+"""
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.push import PushDispatcher
+
+
+def _send_response(count: int, failed=()) -> MagicMock:
+    """BatchResponse of a send_each call."""
+    responses = []
+    for index in range(count):
+        if index in failed:
+            responses.append(MagicMock(success=False, message_id=None, exception=RuntimeError("invalid topic")))
+        else:
+            responses.append(MagicMock(success=True, message_id=f"msg-{index}", exception=None))
+    return MagicMock(responses=responses)
+
+
+@pytest.fixture
+def messaging():
+    """FCM initialized, messaging mocked (send_each echoes one success per message)."""
+    with patch("app.push.firebase_admin._apps", {"[DEFAULT]": MagicMock()}), \
+            patch("app.push.messaging") as mocked:
+        mocked.send_each.side_effect = lambda messages: _send_response(len(messages))
+        yield mocked
+
+
+async def _send_all(dispatcher: PushDispatcher, count: int, topic=None):
+    return await asyncio.gather(*(
+        dispatcher.send("🔥 Incendie détecté", f"Niv. 3 – incident {n}", {"incident_id": n}, topic=topic)
+        for n in range(count)
+    ))
+
+
+@pytest.mark.asyncio
+async def test_notifications_of_a_window_share_one_call(messaging):
+    """Concurrent notifications go out in a single send_each call."""
+    dispatcher = PushDispatcher(window=0.01)
+
+    message_ids = await _send_all(dispatcher, 3)
+
+    messaging.send_each.assert_called_once()
+    assert len(messaging.send_each.call_args[0][0]) == 3
+    assert message_ids == ["msg-0", "msg-1", "msg-2"]
+    await dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_batches_respect_max_batch(messaging):
+    """A full batch is sent at once and no call exceeds max_batch messages."""
+    dispatcher = PushDispatcher(window=60, max_batch=2)
+
+    await asyncio.wait_for(_send_all(dispatcher, 4), timeout=1)
+
+    assert [len(call[0][0]) for call in messaging.send_each.call_args_list] == [2, 2]
+    await dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_coalesced_digest_per_topic(messaging):
+    """With coalescing, one digest per topic lists every incident."""
+    dispatcher = PushDispatcher(window=0.01, coalesce=True)
+
+    results = await asyncio.gather(
+        _send_all(dispatcher, 3, topic="firefighters"),
+        dispatcher.send("🔥 Incendie détecté", "Niv. 5", {"incident_id": 9}, topic="paris"),
+    )
+
+    assert len(messaging.send_each.call_args[0][0]) == 2
+    notifications = {call[1]["title"]: call[1]["body"] for call in messaging.Notification.call_args_list}
+    assert notifications["🔥 Incendie détecté"] == "Niv. 5"
+    assert notifications["🔥 3 incendies détectés"].count("\n") == 2
+    data = {call[1]["topic"]: call[1]["data"] for call in messaging.Message.call_args_list}
+    assert data["firefighters"] == {"incident_id": "0,1,2", "count": "3"}
+    # Every caller of the digest gets the digest's message id
+    assert len(set(results[0])) == 1
+    assert results[0][0] != results[1]
+    await dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_message_resolves_to_none(messaging):
+    """Per-message failures and failed calls do not raise to the caller."""
+    messaging.send_each.side_effect = lambda messages: _send_response(len(messages), failed={1})
+    dispatcher = PushDispatcher(window=0.01)
+
+    assert await _send_all(dispatcher, 2) == ["msg-0", None]
+
+    messaging.send_each.side_effect = ConnectionError("FCM unreachable")
+    assert await _send_all(dispatcher, 1) == [None]
+    await dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_close_sends_pending_notifications(messaging):
+    """Stopping the worker does not drop buffered notifications."""
+    dispatcher = PushDispatcher(window=60)
+    pending = asyncio.create_task(dispatcher.send("title", "body", {"incident_id": 1}))
+    await asyncio.sleep(0)
+
+    await dispatcher.close()
+
+    assert await pending == "msg-0"
@@ -0,0 +1,69 @@
+"""
+Tests for partitioned consumers (per-incident ordering).
+"""
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.consumers import IncidentConsumer, assigned_shards
+from tests.test_acks import _message
+
+
+def test_assigned_shards():
+    """Shards are dealt round-robin to the supervisor's processes."""
+    assert assigned_shards(4, "") == [0, 1, 2, 3]
+    assert assigned_shards(4, "", index=1, processes=2) == [1, 3]
+    assert assigned_shards(8, "2,5,7", index=0, processes=2) == [2, 7]
+    with pytest.raises(ValueError):
+        assigned_shards(4, "4")
+
+
+@pytest.mark.asyncio
+async def test_shard_consumer_setup():
+    """A shard queue is fed by the consistent-hash exchange, with one active consumer."""
+    consumer = IncidentConsumer("amqp://localhost", shard=3)
+    assert consumer.queue_name == "incident.events.3"
+    
+    mock_connection = AsyncMock()
+    mock_channel = AsyncMock()
+    mock_queue = AsyncMock()
+    mock_exchange = AsyncMock()
+    mock_connection.channel.return_value = mock_channel
+    mock_channel.declare_queue.side_effect = [mock_queue] + [AsyncMock() for _ in range(10)]
+    mock_channel.declare_exchange.return_value = mock_exchange
+    
+    with patch("aio_pika.connect_robust", return_value=mock_connection):
+        await consumer.setup()
+    
+    mock_channel.declare_exchange.assert_any_call(
+        "incident.events.sharded",
+        type="x-consistent-hash",
+        durable=True,
+        arguments={"hash-header": "x-incident-id"},
+    )
+    mock_exchange.bind.assert_any_call(mock_exchange, routing_key="incident.validated.#")
+    mock_channel.declare_queue.assert_any_call(
+        "incident.events.3",
+        durable=True,
+        arguments={"x-single-active-consumer": True},
+    )
+    mock_queue.bind.assert_called_once_with(mock_exchange, routing_key="1")
+
+
+@pytest.mark.asyncio
+async def test_shard_consumer_processes_in_delivery_order():
+    """Deliveries of a shard are handled one at a time, in order."""
+    consumer = IncidentConsumer("amqp://localhost", shard=0)
+    handled = []
+    
+    async def handler(event):
+        # Earlier deliveries take longer: concurrent processing would reorder them
+        await asyncio.sleep(0.05 / event.id)
+        handled.append(event.id)
+    
+    consumer._handle_incident_validated = handler
+    channel = object()
+    await asyncio.gather(*(consumer.process_message(_message(channel, tag)) for tag in range(1, 6)))
+    
+    assert handled == [1, 2, 3, 4, 5]
@@ -0,0 +1,83 @@
+"""
+Tests for concurrent side effects with per-step deadlines.
+"""
+import asyncio
+import time
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+import aio_pika
+import pytest
+
+from app.consumers import STEP_RESULTS, IncidentConsumer, StepFailed
+from app.events import IncidentValidated, incident_validated_decoder
+
+EVENT = IncidentValidated(id=1, lat=48.8566, lon=2.3522, created_at=datetime(2025, 6, 19), severity=3)
+
+
+def _consumer(push=0.0, analytics=0.0, fcm=0.0) -> IncidentConsumer:
+    """Consumer whose steps sleep for the given durations."""
+    consumer = IncidentConsumer("amqp://localhost")
+
+    async def sleep_for(delay, *args):
+        await asyncio.sleep(delay)
+
+    consumer._simulate_push_notification = lambda *args: sleep_for(push)
+    consumer._update_analytics = lambda *args: sleep_for(analytics)
+    consumer._send_fcm = lambda *args: sleep_for(fcm)
+    consumer.broadcast_exchange = AsyncMock()
+    return consumer
+
+
+def _count(step: str, outcome: str) -> float:
+    return STEP_RESULTS.labels(step=step, outcome=outcome)._value.get()
+
+
+@pytest.mark.asyncio
+async def test_side_effects_run_concurrently():
+    """An incident takes as long as its slowest step, not the sum of all steps."""
+    consumer = _consumer(push=0.2, analytics=0.2, fcm=0.2)
+
+    started = time.monotonic()
+    await consumer._handle_incident_validated(EVENT)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.4
+
+
+@pytest.mark.asyncio
+async def test_broadcast_fans_out_to_api_replicas():
+    """The event is published, transient, on the broadcast fanout exchange."""
+    consumer = _consumer()
+
+    await consumer._handle_incident_validated(EVENT)
+
+    message = consumer.broadcast_exchange.publish.call_args[0][0]
+    assert incident_validated_decoder.decode(message.body) == EVENT
+    assert message.delivery_mode == aio_pika.DeliveryMode.NOT_PERSISTENT
+
+
+@pytest.mark.asyncio
+async def test_required_step_timeout_fails_message():
+    """A required step over its deadline is counted as a timeout and retried."""
+    consumer = _consumer(analytics=1.0)
+    before = _count("analytics", "timeout")
+
+    with patch("app.config.settings.analytics_timeout", 0.05):
+        with pytest.raises(StepFailed, match="analytics"):
+            await consumer._handle_incident_validated(EVENT)
+
+    assert _count("analytics", "timeout") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_best_effort_failure_does_not_fail_message():
+    """A failed broadcast is counted but the message is still acknowledged."""
+    consumer = _consumer()
+    consumer.broadcast_exchange.publish.side_effect = RuntimeError("down")
+    before = _count("broadcast", "failure")
+
+    await consumer._handle_incident_validated(EVENT)
+
+    assert _count("broadcast", "failure") == before + 1
+    assert _count("push_simulation", "success") >= 1
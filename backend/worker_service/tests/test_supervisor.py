@@ -0,0 +1,116 @@
+"""
+Tests for the multi-process supervisor and graceful drain.
+"""
+import asyncio
+import os
+import signal
+import sys
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.consumers import IncidentConsumer
+from app.main import WorkerService
+from app.supervisor import Supervisor, resolve_process_count
+from tests.test_acks import _message
+
+
+def _crash(index: int) -> None:
+    sys.exit(1)
+
+
+def _wait_for_sigterm(index: int) -> None:
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    # Tell the test the handler is installed
+    open(os.path.join(os.environ["READY_DIR"], str(index)), "w").close()
+    time.sleep(30)
+
+
+def test_resolve_process_count():
+    """0 means one process per CPU core."""
+    assert resolve_process_count(3) == 3
+    with patch("os.cpu_count", return_value=8):
+        assert resolve_process_count(0) == 8
+
+
+def test_crashed_child_is_restarted():
+    """A child that exits on its own is started again in the same slot."""
+    supervisor = Supervisor(_crash, processes=1, restart_delay=0)
+    first = supervisor.start_child(0)
+
+    supervisor.supervise_once(timeout=5)
+
+    assert supervisor.restarts == 1
+    assert supervisor.children[0] is not first
+    supervisor.children[0].join(5)
+
+
+def test_shutdown_forwards_sigterm(tmp_path, monkeypatch):
+    """Children receive SIGTERM and exit; none are restarted."""
+    monkeypatch.setenv("READY_DIR", str(tmp_path))
+    supervisor = Supervisor(_wait_for_sigterm, processes=2, shutdown_timeout=5)
+    for index in range(2):
+        supervisor.start_child(index)
+    deadline = time.monotonic() + 10
+    while len(os.listdir(tmp_path)) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    supervisor.request_stop()
+    supervisor.supervise_once(timeout=0)
+    supervisor.shutdown()
+
+    assert supervisor.restarts == 0
+    assert all(process.exitcode == 0 for process in supervisor.children.values())
+
+
+@pytest.mark.asyncio
+async def test_stop_consuming_drains_in_flight_messages():
+    """Stopping waits for running messages to be acknowledged before closing."""
+    consumer = IncidentConsumer("amqp://localhost")
+    consumer.queue = AsyncMock()
+    consumer.consumer_tag = "ctag"
+    consumer.connection = MagicMock(is_closed=False, close=AsyncMock())
+
+    async def slow_handler(event):
+        await asyncio.sleep(0.2)
+
+    consumer._handle_incident_validated = slow_handler
+    message = _message(object(), 1)
+    in_flight = asyncio.create_task(consumer.process_message(message))
+    await asyncio.sleep(0.01)
+
+    await consumer.stop_consuming()
+
+    consumer.queue.cancel.assert_awaited_once_with("ctag")
+    message.ack.assert_called_once_with(multiple=True)
+    consumer.connection.close.assert_awaited_once()
+    assert consumer.acks.pending == 0
+    await in_flight
+
+
+@pytest.mark.asyncio
+async def test_drain_gives_up_after_timeout():
+    """Messages still running at the deadline are left to the broker."""
+    consumer = IncidentConsumer("amqp://localhost")
+    consumer.acks.track(_message(object(), 1))
+
+    assert await consumer.drain(timeout=0.05) is False
+
+
+@pytest.mark.asyncio
+async def test_shared_resources_closed_once_after_every_consumer_stopped():
+    """A consumer that finishes draining first does not close what others still use."""
+    worker = WorkerService(consumers=2)
+    for resource in worker.resources:
+        resource.close = AsyncMock()
+    for consumer in worker.consumers:
+        consumer.connection = MagicMock(is_closed=False, close=AsyncMock())
+
+    await asyncio.gather(*(consumer.stop_consuming() for consumer in worker.consumers))
+    for resource in worker.resources:
+        resource.close.assert_not_awaited()
+
+    await worker.close_resources()
+    for resource in worker.resources:
+        resource.close.assert_awaited_once()